@@ -13,13 +13,19 @@ Purpose:
     Send custom packet that allows the user to send a custom packet through the network
 
 Usage syntax:
-    Nil, intended to be used as a custom module
+    Intended to be used as a custom module
+    Flow spec files can be sent without the menu, e.g. python custom_packet.py --flows flows.jsonl --output flows.pcap
+    Capture files can be replayed without the menu, e.g. python custom_packet.py --replay capture.pcap --speed 2 --rewrite-dest 10.0.0.5
+    Packet fields can be fuzzed without the menu, e.g. python custom_packet.py --fuzz spec.json --dest 10.0.0.5 --cursor-file fuzz.cursor
 
 Input file(s):
-    Nil
+    Optional JSONL or CSV flow spec file with the fields src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data and pkt_count
+    Optional capture file (.pcap or .pcapng) to replay
+    Optional JSON fuzz spec file with the values of every fuzzed field, e.g. {"dest_port": "1-1024", "tcp_flags": ["S", "SA"]}
 
 Output file(s):
-    Nil
+    Optional capture file (.pcap or .pcapng) that the crafted packets are written to instead of being sent
+    Optional cursor file that records how far a fuzz run has got, so that it can be resumed
 
 Python version:
     Python 3.10.9
@@ -27,13 +33,28 @@ Python version:
 Reference:
 https://stackoverflow.com/questions/106179/regular-expression-to-match-dns-hostname-or-ip-address
 https://docs.python.org/3/library/re.html#re.IGNORECASE
+https://docs.python.org/3/library/asyncio-runner.html#asyncio.run
+https://docs.python.org/3/library/re.html#re.compile
+https://docs.python.org/3/library/csv.html#csv.DictReader
+https://jsonlines.org/
 
 Library/Module:
 - modules used that are installed by default in Python 3.10.9
+    - argparse
+    - asyncio
+    - csv
+    - itertools
+    - json
     - os
     - re
+    - socket
 - required external modules installed using pip: pip install <module name>  # e.g. pip install scapy
     - scapy
+- custom module(s) from python scripts in the same directory
+    - packet_engine
+    - packet_fuzzer
+    - packet_probe
+    - pcap_io
 
 Known issues:
     Nil
@@ -41,9 +62,46 @@ Known issues:
 
 """
 
+import argparse
+import asyncio
+import csv
+import itertools
+import json
 import os
 import re
-from scapy.all import send, IP, TCP, ICMP, UDP   
+import socket
+# Only the scapy layers that are used, "scapy.all" loads every layer and takes more than a second
+from scapy.compat import raw
+from scapy.error import Scapy_Exception
+from scapy.layers.inet import IP, TCP, ICMP, UDP
+from scapy.sendrecv import send
+from packet_engine import RawPacketSocket, PacketTemplate, ParallelSender, PacedSender, ReplayEngine, TEMPLATE_FIELDS
+from packet_fuzzer import PacketFuzzer, parse_field_values, FUZZ_MODES
+from packet_probe import ProbeEngine
+from pcap_io import PcapWriter
+
+
+# Compiled once at import, the validators run for every row of a flow spec file
+# Check for a numbers only input within the address
+NUMBERS_ONLY_REGEX = re.compile(r"^\d+$")
+
+# Address regex matches a hostname. Leading HTTP/HTTPS scheme is optional. Ignore casing for address as it does not matter
+ADDRESS_REGEX = re.compile(r"^(http://|https://)?(([a-z0-9]|[a-z0-9][a-z0-9\-]*[a-z0-9])\.)*([a-z0-9]|[a-z0-9][a-z0-9\-]*[a-z0-9])$", re.IGNORECASE)
+
+# IPv4 address regex matches an IPv4 address
+IPV4_ADDR_REGEX = re.compile(r"^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$")
+
+# Flows that are built and sent together in flow spec file mode
+DEFAULT_FLOW_BATCH_SIZE = 1024
+
+# Line numbers of invalid rows that are kept for the report, the rest are only counted
+MAX_REPORTED_INVALID = 100
+
+# Fuzz cases that are sent between saves of the cursor file
+FUZZ_CHUNK_SIZE = 4096
+
+# Errors of building or sending packets that are reported instead of ending the menu, e.g. PermissionError without root
+SEND_ERRORS = (OSError, ValueError, Scapy_Exception)
 
 
 # Does not need an initializer "__init__()"
@@ -86,6 +144,21 @@ class CustomPacketSender:
                 bool: True if packet type is valid, False otherwise
 
 
+        build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data):
+            Create a packet based on the provided parameters
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+
+            Returns:
+                Packet: The scapy packet that was created
+
+
         send_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data):
             Create and send a packet based on the provided parameters
 
@@ -101,6 +174,254 @@ class CustomPacketSender:
                 bool: True if packets are sent successfully, False otherwise
 
 
+        send_burst(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, output_file):
+            Build a packet once and send it pkt_count times through one reused socket
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+                pkt_count(int): Number of packets to send
+                output_file(str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        validate_output_file(filename):
+            Check if the capture file name is blank or ends with .pcap or .pcapng
+
+            Args:
+                filename (str): Capture file name to validate
+
+            Returns:
+                bool: True if the capture file name is valid, False otherwise
+
+
+        open_sink(output_file):
+            Open where the packets go, the raw socket or a capture file
+
+            Args:
+                output_file (str | None): Capture file to write the packets to, None to send them on the wire
+
+            Returns:
+                RawPacketSocket | PcapWriter: The opened packet sink
+
+
+        validate_vary_fields(fields):
+            Check if every comma separated field is a field that a packet template can vary
+
+            Args:
+                fields (str): Comma separated field names, blank for none
+
+            Returns:
+                bool: True if every field is valid, False otherwise
+
+
+        validate_workers(number):
+            Check if the number of sending processes is blank or within 1 and the number of CPUs
+
+            Args:
+                number (str): The number to validate
+
+            Returns:
+                bool: True if it is a valid number of sending processes, otherwise False
+
+
+        send_template_burst(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, vary, output_file):
+            Serialize a packet once and send pkt_count variations of it by patching fields in place
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+                pkt_count(int): Number of packets to send
+                vary(list)    : Fields that are incremented per packet, ip_id, src_port, seq or counter
+                output_file(str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        send_parallel(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, vary, workers, show_progress):
+            Split pkt_count across worker processes that each send their share through their own socket
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+                pkt_count(int): Number of packets to send
+                vary(list)    : Fields that are incremented per packet, empty to send identical packets
+                workers(int)  : Number of worker processes
+                show_progress(bool): Print the live counters of every worker while they run
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        parse_rate(rate):
+            Parse a target rate such as 500pps, 20kpps or 10Mbps
+
+            Args:
+                rate (str): Rate to parse, a number with an optional k/M/G prefix and a pps or bps unit
+
+            Returns:
+                tuple[float, str] | None: The rate and its unit "pps" or "bps", None if the rate is invalid
+
+
+        validate_rate(rate):
+            Check if the target rate is blank or a valid rate
+
+            Args:
+                rate (str): Rate to validate
+
+            Returns:
+                bool: True if the rate is valid, False otherwise
+
+
+        send_paced(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, vary, rate, unit, burst, output_file):
+            Send pkt_count packets with asyncio at a target rate that is held by a token bucket
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+                pkt_count(int): Number of packets to send
+                vary(list)    : Fields that are incremented per packet, empty to send identical packets
+                rate(float)   : Target rate in packets or bits per second
+                unit(str)     : "pps" or "bps"
+                burst(int)    : Packets that may be sent back to back
+                output_file(str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                dict: sent, failed, elapsed (s), rate_pps, rate_bps, jitter (s) and missed deadlines of the run
+
+
+        send_and_match(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, timeout):
+            Send pkt_count probes, match the replies to them and measure the RTT of every probe and the loss
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet
+                pkt_count(int): Number of probes to send
+                timeout(float): Seconds to wait for replies after the last probe
+
+            Returns:
+                dict | None: Loss summary and per-probe RTTs, None if the probes could not be sent
+
+
+        read_flow_specs(filename):
+            Open a JSONL or CSV flow spec file and lazily read and validate its flow definitions
+
+            Args:
+                filename (str): Flow spec file, ".csv" files need a header row, any other file is read as JSONL
+
+            Returns:
+                Iterator[tuple[int, dict | None]]: Line number and the validated flow, None if the row is invalid
+
+
+        validate_flow_rows(file, is_csv):
+            Lazily read and validate the rows of an open flow spec file, the file is closed at the end
+
+            Args:
+                file (TextIO): Open flow spec file
+                is_csv (bool): True if the file is CSV with a header row, False if it is JSONL
+
+            Returns:
+                Iterator[tuple[int, dict | None]]: Line number and the validated flow, None if the row is invalid
+
+
+        send_flow_file(filename, batch_size, workers, output_file):
+            Build and send the flows of a flow spec file in batches, memory use does not depend on the file size
+
+            Args:
+                filename (str): JSONL or CSV flow spec file
+                batch_size (int): Number of flows that are built and sent together
+                workers (int): Number of sending processes that the batches are streamed to
+                output_file (str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                tuple[int, int, int, list] | None: Packets sent, packets that failed, invalid rows and the line numbers of the first invalid rows, None if the file could not be opened
+
+
+        replay_pcap(filename, speed, src_addr, dest_addr, src_port, dest_port, output_file):
+            Replay the IPv4 packets of a capture file at their original timing, a multiple of it or at top speed
+
+            Args:
+                filename (str): pcap or pcapng file to replay
+                speed (float): Multiple of the original timing, 0 sends at top speed
+                src_addr (str | None): Rewrite the source address, None to keep it
+                dest_addr (str | None): Rewrite the destination address, None to keep it
+                src_port (int | None): Rewrite the TCP/UDP source port, None to keep it
+                dest_port (int | None): Rewrite the TCP/UDP destination port, None to keep it
+                output_file (str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                dict | None: sent, failed, skipped, late and elapsed (s) of the replay, None if the replay failed
+
+
+        read_fuzz_spec(filename):
+            Read the values of every fuzzed field from a JSON fuzz spec file
+
+            Args:
+                filename (str): JSON fuzz spec file, an object of field name to values
+
+            Returns:
+                dict: FieldValues of every fuzzed field by field name
+
+
+        send_fuzz(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, spec_file, mode, seed, count, cursor_file, output_file):
+            Send the fuzz cases of a fuzz spec file, generated lazily and resumed from a cursor file
+
+            Args:
+                src_addr(str) : Source IP address
+                src_port(int) : Source Port
+                dest_addr(str): Destination IP address
+                dest_port(int): Destination Port
+                pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+                pkt_data(str) : Data in the packet, unless the payload is fuzzed
+                spec_file(str): JSON fuzz spec file
+                mode(str)     : "product" for every combination, "random" for a shuffled order
+                seed(int)     : Seed of the shuffled order of random mode
+                count(int | None): Number of cases to send in this run, None for every remaining case
+                cursor_file(str | None): File to resume from and save the cursor position to, None to start from 0
+                output_file(str | None): Capture file to write the packets to instead of sending them
+
+            Returns:
+                dict | None: sent, failed, cursor and total of the run, None if the fuzz could not be started
+
+
+        report_error(action, error):
+            Print why packets could not be built or sent
+
+            Args:
+                action (str): What failed, e.g. "sending packets"
+                error (Exception): The error
+
+
+        print_worker_progress(counters):
+            Print the live sent and failed counters of every worker on one line
+
+            Args:
+                counters (list): (sent, failed) of every worker
+
+
         print_buffered_menu(menu):
             Print line by line of a buffered menu
 
@@ -123,22 +444,12 @@ class CustomPacketSender:
         Returns:
             bool: If the entered hostname or ipv4 is valid return True, else return False
         """
-        # Check for a numbers only input within the address
-        numbers_only_pattern = r"^\d+$"
-
-        # Address regex matches a hostname. Leading HTTP/HTTPS scheme is optional.
-        address_regex = r"^(http://|https://)?(([a-z0-9]|[a-z0-9][a-z0-9\-]*[a-z0-9])\.)*([a-z0-9]|[a-z0-9][a-z0-9\-]*[a-z0-9])$"
-
-        # IPv4 address regex matches an IPv4 address
-        ipv4_addr_regex = r"^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$" 
-
-        if re.match(pattern=numbers_only_pattern, string=address):
+        if NUMBERS_ONLY_REGEX.match(address):
             return False
 
-        # Ignore casing for address as it does not matter
-        if re.match(pattern=address_regex, string=address, flags=re.IGNORECASE):
+        if ADDRESS_REGEX.match(address):
             return True
-        elif re.match(pattern=ipv4_addr_regex, string=address):
+        elif IPV4_ADDR_REGEX.match(address):
             return True
         return False
 
@@ -182,10 +493,10 @@ class CustomPacketSender:
 
 
     # User-defined method
-    def send_packet(self, src_addr: str, src_port: int, dest_addr: str, 
-                dest_port: int, pkt_type: str, pkt_data: str)  -> bool:
+    def build_packet(self, src_addr: str, src_port: int, dest_addr: str,
+                dest_port: int, pkt_type: str, pkt_data: str):
         """
-        Create and send a packet based on the provided parameters
+        Create a packet based on the provided parameters
 
         Args:
             src_addr(str) : Source IP address
@@ -194,15 +505,36 @@ class CustomPacketSender:
             dest_port(int): Destination Port
             pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
             pkt_data(str) : Data in the packet
+
         Returns:
-            bool: True if packets are sent successfully, False otherwise
-        """    
+            Packet: The scapy packet that was created
+        """
         if pkt_type == "T":
             pkt = IP(dst=dest_addr, src=src_addr) / TCP(dport=dest_port, sport=src_port) / pkt_data
         elif pkt_type == "U":
             pkt = IP(dst=dest_addr, src=src_addr) / UDP(dport=dest_port, sport=src_port) / pkt_data
         elif pkt_type == "I":
             pkt = IP(dst=dest_addr, src=src_addr) / ICMP() / pkt_data
+        return pkt
+
+
+    # User-defined method
+    def send_packet(self, src_addr: str, src_port: int, dest_addr: str, 
+                dest_port: int, pkt_type: str, pkt_data: str)  -> bool:
+        """
+        Create and send a packet based on the provided parameters
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+        Returns:
+            bool: True if packets are sent successfully, False otherwise
+        """    
+        pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
 
         try:
             send(pkt ,verbose = False)   # Hide "Send 1 packets" message on console
@@ -211,6 +543,544 @@ class CustomPacketSender:
             return False
     
 
+    # User-defined method
+    def send_burst(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int,
+                pkt_type: str, pkt_data: str, pkt_count: int, output_file: str | None = None) -> tuple[int, int]:
+        """
+        Build a packet once and send it pkt_count times through one reused socket
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+            pkt_count(int): Number of packets to send
+            output_file(str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            # Serialize once, hostnames are resolved to the IPv4 address here as well
+            data = raw(pkt)
+            with self.open_sink(output_file=output_file) as sock:
+                return sock.send_burst(data=data, dest_addr=socket.inet_ntoa(data[16:20]), pkt_count=pkt_count)
+        except SEND_ERRORS as error:
+            self.report_error(action="sending packets", error=error)
+            return 0, pkt_count
+
+
+    # User-defined method
+    def validate_output_file(self, filename: str) -> bool:
+        """
+        Check if the capture file name is blank or ends with .pcap or .pcapng
+
+        Args:
+            filename (str): Capture file name to validate
+
+        Returns:
+            bool: True if the capture file name is valid, False otherwise
+        """
+        if filename == "":
+            return True
+        if re.match(pattern=r"^[^<>:\"|?*]+\.(pcap|pcapng)$", string=filename, flags=re.IGNORECASE):
+            return True
+        return False
+
+
+    # User-defined method
+    def open_sink(self, output_file: str | None = None):
+        """
+        Open where the packets go, the raw socket or a capture file
+
+        Args:
+            output_file (str | None): Capture file to write the packets to, None to send them on the wire
+
+        Returns:
+            RawPacketSocket | PcapWriter: The opened packet sink
+        """
+        if output_file:
+            return PcapWriter(filename=output_file)
+        return RawPacketSocket()
+
+
+    # User-defined method
+    def validate_vary_fields(self, fields: str) -> bool:
+        """
+        Check if every comma separated field is a field that a packet template can vary
+
+        Args:
+            fields (str): Comma separated field names, blank for none
+
+        Returns:
+            bool: True if every field is valid, False otherwise
+        """
+        if fields.strip() == "":
+            return True
+        for field in fields.split(","):
+            if field.strip() not in TEMPLATE_FIELDS:
+                return False
+        return True
+
+
+    # User-defined method
+    def validate_workers(self, number: str) -> bool:
+        """
+        Check if the number of sending processes is blank or within 1 and the number of CPUs
+
+        Args:
+            number (str): The number to validate
+
+        Returns:
+            bool: True if it is a valid number of sending processes, otherwise False
+        """
+        if number == "":
+            return True
+        if number.isnumeric():
+            if int(number) >= 1 and int(number) <= (os.cpu_count() or 1):
+                return True
+        return False
+
+
+    # User-defined method
+    def send_template_burst(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int,
+                pkt_type: str, pkt_data: str, pkt_count: int, vary: list, output_file: str | None = None) -> tuple[int, int]:
+        """
+        Serialize a packet once and send pkt_count variations of it by patching fields in place
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+            pkt_count(int): Number of packets to send
+            vary(list)    : Fields that are incremented per packet, ip_id, src_port, seq or counter
+            output_file(str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            template = PacketTemplate(data=raw(pkt))
+            with self.open_sink(output_file=output_file) as sock:
+                return sock.send_many(packets=template.generate(pkt_count=pkt_count, vary=vary), dest_addr=template.dest_addr)
+        except SEND_ERRORS as error:
+            self.report_error(action="sending packets", error=error)
+            return 0, pkt_count
+
+
+    # User-defined method
+    def send_parallel(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int, pkt_type: str,
+                pkt_data: str, pkt_count: int, vary: list, workers: int, show_progress: bool = True) -> tuple[int, int]:
+        """
+        Split pkt_count across worker processes that each send their share through their own socket
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+            pkt_count(int): Number of packets to send
+            vary(list)    : Fields that are incremented per packet, empty to send identical packets
+            workers(int)  : Number of worker processes
+            show_progress(bool): Print the live counters of every worker while they run
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            sender = ParallelSender(workers=workers)
+            worker_jobs = sender.split_count(data=raw(pkt), pkt_count=pkt_count)
+            return sender.send(worker_jobs=worker_jobs, vary=vary, progress=self.print_worker_progress if show_progress else None)
+        except SEND_ERRORS as error:
+            self.report_error(action="sending packets", error=error)
+            return 0, pkt_count
+
+
+    # User-defined method
+    def parse_rate(self, rate: str) -> tuple[float, str] | None:
+        """
+        Parse a target rate such as 500pps, 20kpps or 10Mbps
+
+        Args:
+            rate (str): Rate to parse, a number with an optional k/M/G prefix and a pps or bps unit
+
+        Returns:
+            tuple[float, str] | None: The rate and its unit "pps" or "bps", None if the rate is invalid
+        """
+        rate_match = re.match(pattern=r"^(\d+(\.\d+)?)\s*([kmg]?)(pps|bps)$", string=rate.strip(), flags=re.IGNORECASE)
+        if not rate_match:
+            return None
+
+        multiplier = {"": 1, "k": 1_000, "m": 1_000_000, "g": 1_000_000_000}[rate_match.group(3).lower()]
+        value = float(rate_match.group(1)) * multiplier
+        if value <= 0:
+            return None
+        return value, rate_match.group(4).lower()
+
+
+    # User-defined method
+    def validate_rate(self, rate: str) -> bool:
+        """
+        Check if the target rate is blank or a valid rate
+
+        Args:
+            rate (str): Rate to validate
+
+        Returns:
+            bool: True if the rate is valid, False otherwise
+        """
+        if rate == "":
+            return True
+        return self.parse_rate(rate=rate) is not None
+
+
+    # User-defined method
+    def send_paced(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int, pkt_type: str, pkt_data: str,
+                pkt_count: int, vary: list, rate: float, unit: str = "pps", burst: int = 1, output_file: str | None = None) -> dict:
+        """
+        Send pkt_count packets with asyncio at a target rate that is held by a token bucket
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+            pkt_count(int): Number of packets to send
+            vary(list)    : Fields that are incremented per packet, empty to send identical packets
+            rate(float)   : Target rate in packets or bits per second
+            unit(str)     : "pps" or "bps"
+            burst(int)    : Packets that may be sent back to back
+            output_file(str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            dict: sent, failed, elapsed (s), rate_pps, rate_bps, jitter (s) and missed deadlines of the run
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            template = PacketTemplate(data=raw(pkt))
+            if len(vary) > 0:
+                packets = template.generate(pkt_count=pkt_count, vary=vary)
+            else:
+                data = bytes(template.buffer)
+                packets = (data for _ in range(pkt_count))
+
+            pacer = PacedSender(rate=rate, unit=unit, burst=burst)
+            with self.open_sink(output_file=output_file) as sock:
+                return asyncio.run(pacer.run(packets=packets, sink=sock, dest_addr=template.dest_addr))
+        except SEND_ERRORS as error:
+            self.report_error(action="sending packets", error=error)
+            return {"sent": 0, "failed": pkt_count, "elapsed": 0.0, "rate_pps": 0.0, "rate_bps": 0.0, "jitter": 0.0, "missed": 0}
+
+
+    # User-defined method
+    def send_and_match(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int, pkt_type: str,
+                pkt_data: str, pkt_count: int, timeout: float = 2.0) -> dict | None:
+        """
+        Send pkt_count probes, match the replies to them and measure the RTT of every probe and the loss
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet
+            pkt_count(int): Number of probes to send
+            timeout(float): Seconds to wait for replies after the last probe
+
+        Returns:
+            dict | None: Loss summary and per-probe RTTs, None if the probes could not be sent
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            return ProbeEngine(timeout=timeout).run(data=raw(pkt), pkt_count=pkt_count)
+        except SEND_ERRORS as error:
+            self.report_error(action="sending probes", error=error)
+            return None
+
+
+    # User-defined method
+    def read_flow_specs(self, filename: str):
+        """
+        Open a JSONL or CSV flow spec file and lazily read and validate its flow definitions
+
+        Every row has src_addr, src_port, dest_addr, dest_port and pkt_type, pkt_data and pkt_count are optional.
+        The rows are checked with the same rules as the custom packet menu.
+        The file is opened straight away so that a missing or unreadable file raises OSError here, not on the first row.
+
+        Args:
+            filename (str): Flow spec file, ".csv" files need a header row, any other file is read as JSONL
+
+        Returns:
+            Iterator[tuple[int, dict | None]]: Line number and the validated flow, None if the row is invalid
+        """
+        # Bytes that are not UTF-8 are replaced so that they make their row invalid instead of ending the file
+        file = open(filename, "r", newline="", encoding="utf-8", errors="replace")
+        return self.validate_flow_rows(file=file, is_csv=filename.lower().endswith(".csv"))
+
+
+    # User-defined method
+    def validate_flow_rows(self, file, is_csv: bool):
+        """
+        Lazily read and validate the rows of an open flow spec file, the file is closed at the end
+
+        Args:
+            file (TextIO): Open flow spec file
+            is_csv (bool): True if the file is CSV with a header row, False if it is JSONL
+
+        Returns:
+            Iterator[tuple[int, dict | None]]: Line number and the validated flow, None if the row is invalid
+        """
+        with file:
+            if is_csv:
+                # Line 1 is the header row
+                rows = enumerate(csv.DictReader(file), start=2)
+            else:
+                rows = ((line_no, line) for line_no, line in enumerate(file, start=1) if line.strip() != "")
+
+            for line_no, row in rows:
+                try:
+                    if isinstance(row, str):
+                        row = json.loads(row)
+                    flow = {
+                        "src_addr": str(row["src_addr"]),
+                        "src_port": str(row["src_port"]),
+                        "dest_addr": str(row["dest_addr"]),
+                        "dest_port": str(row["dest_port"]),
+                        "pkt_type": str(row["pkt_type"]),
+                        "pkt_data": str(row.get("pkt_data") or "DISM-DISM-DISM-DISM"),
+                        "pkt_count": str(row.get("pkt_count") or "1"),
+                    }
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    yield line_no, None
+                    continue
+
+                # Port numbers are ignored for ICMP, as in the custom packet menu
+                ports_valid = flow["pkt_type"] == "I" or (self.validate_port(number=flow["src_port"]) and self.validate_port(number=flow["dest_port"]))
+                if not (self.validate_address(address=flow["src_addr"]) and self.validate_address(address=flow["dest_addr"])
+                        and self.validate_pkt_type(packet=flow["pkt_type"]) and ports_valid
+                        and self.validate_port(number=flow["pkt_count"])):
+                    yield line_no, None
+                    continue
+
+                flow["src_port"] = int(flow["src_port"]) if flow["src_port"].isnumeric() else 0
+                flow["dest_port"] = int(flow["dest_port"]) if flow["dest_port"].isnumeric() else 0
+                flow["pkt_count"] = int(flow["pkt_count"])
+                yield line_no, flow
+
+
+    # User-defined method
+    def send_flow_file(self, filename: str, batch_size: int = DEFAULT_FLOW_BATCH_SIZE,
+                workers: int = 1, output_file: str | None = None) -> tuple[int, int, int, list] | None:
+        """
+        Build and send the flows of a flow spec file in batches, memory use does not depend on the file size
+
+        Args:
+            filename (str): JSONL or CSV flow spec file
+            batch_size (int): Number of flows that are built and sent together
+            workers (int): Number of sending processes that the batches are streamed to
+            output_file (str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            tuple[int, int, int, list] | None: Packets sent, packets that failed, invalid rows and the line numbers of the first invalid rows, None if the file could not be opened
+        """
+        try:
+            flow_specs = self.read_flow_specs(filename=filename)
+        except OSError as error:
+            self.report_error(action=f"opening {filename}", error=error)
+            return None
+
+        sent = 0
+        failed = 0
+        invalid = 0
+        invalid_lines = []
+
+        def build_batches():
+            nonlocal failed, invalid
+            batch = []
+            for line_no, flow in flow_specs:
+                if flow is None:
+                    invalid += 1
+                    if len(invalid_lines) < MAX_REPORTED_INVALID:
+                        invalid_lines.append(line_no)
+                    continue
+                try:
+                    pkt = self.build_packet(flow["src_addr"], flow["src_port"], flow["dest_addr"],
+                                            flow["dest_port"], flow["pkt_type"], flow["pkt_data"])
+                    batch.append((raw(pkt), flow["pkt_count"]))
+                except SEND_ERRORS as error:
+                    # e.g. a hostname that does not resolve
+                    self.report_error(action=f"building the flow of line {line_no}", error=error)
+                    failed += flow["pkt_count"]
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if len(batch) > 0:
+                yield batch
+
+        # A capture file is written by one process, so sending processes only apply to the network
+        if workers > 1 and not output_file:
+            # The workers are started once and the batches are streamed to them
+            sender = ParallelSender(workers=workers)
+            sent, send_failed = sender.send_batches(batches=build_batches())
+            failed += send_failed
+        else:
+            with self.open_sink(output_file=output_file) as sock:
+                for batch in build_batches():
+                    for data, pkt_count in batch:
+                        flow_sent, flow_failed = sock.send_burst(data=data, dest_addr=socket.inet_ntoa(data[16:20]), pkt_count=pkt_count)
+                        sent += flow_sent
+                        failed += flow_failed
+
+        return sent, failed, invalid, invalid_lines
+
+
+    # User-defined method
+    def replay_pcap(self, filename: str, speed: float = 1.0, src_addr: str | None = None, dest_addr: str | None = None,
+                src_port: int | None = None, dest_port: int | None = None, output_file: str | None = None) -> dict | None:
+        """
+        Replay the IPv4 packets of a capture file at their original timing, a multiple of it or at top speed
+
+        Args:
+            filename (str): pcap or pcapng file to replay
+            speed (float): Multiple of the original timing, 0 sends at top speed
+            src_addr (str | None): Rewrite the source address, None to keep it
+            dest_addr (str | None): Rewrite the destination address, None to keep it
+            src_port (int | None): Rewrite the TCP/UDP source port, None to keep it
+            dest_port (int | None): Rewrite the TCP/UDP destination port, None to keep it
+            output_file (str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            dict | None: sent, failed, skipped, late and elapsed (s) of the replay, None if the replay failed
+        """
+        try:
+            # Hostnames are resolved once here instead of per packet
+            if src_addr is not None:
+                src_addr = socket.gethostbyname(src_addr)
+            if dest_addr is not None:
+                dest_addr = socket.gethostbyname(dest_addr)
+
+            replayer = ReplayEngine(speed=speed, src_addr=src_addr, dest_addr=dest_addr, src_port=src_port, dest_port=dest_port)
+            with self.open_sink(output_file=output_file) as sock:
+                return replayer.run(filename=filename, sink=sock)
+        except SEND_ERRORS as error:
+            self.report_error(action=f"replaying {filename}", error=error)
+            return None
+
+
+    # User-defined method
+    def read_fuzz_spec(self, filename: str) -> dict:
+        """
+        Read the values of every fuzzed field from a JSON fuzz spec file
+
+        Args:
+            filename (str): JSON fuzz spec file, an object of field name to values
+
+        Returns:
+            dict: FieldValues of every fuzzed field by field name
+        """
+        with open(filename, "r", encoding="utf-8") as file:
+            spec = json.load(file)
+        if not isinstance(spec, dict):
+            raise ValueError("A fuzz spec must be a JSON object of field name to values")
+        return {field: parse_field_values(field=field, spec=values) for field, values in spec.items()}
+
+
+    # User-defined method
+    def send_fuzz(self, src_addr: str, src_port: int, dest_addr: str, dest_port: int, pkt_type: str, pkt_data: str,
+                spec_file: str, mode: str = "product", seed: int = 0, count: int | None = None,
+                cursor_file: str | None = None, output_file: str | None = None) -> dict | None:
+        """
+        Send the fuzz cases of a fuzz spec file, generated lazily and resumed from a cursor file
+
+        The cursor is saved after every chunk of cases, so an interrupted run resends at most one chunk when resumed
+
+        Args:
+            src_addr(str) : Source IP address
+            src_port(int) : Source Port
+            dest_addr(str): Destination IP address
+            dest_port(int): Destination Port
+            pkt_type(str) : Type of packet (T)TCP, (U)UDP, (I)ICMP echo request. Note it is case sensitive
+            pkt_data(str) : Data in the packet, unless the payload is fuzzed
+            spec_file(str): JSON fuzz spec file
+            mode(str)     : "product" for every combination, "random" for a shuffled order
+            seed(int)     : Seed of the shuffled order of random mode
+            count(int | None): Number of cases to send in this run, None for every remaining case
+            cursor_file(str | None): File to resume from and save the cursor position to, None to start from 0
+            output_file(str | None): Capture file to write the packets to instead of sending them
+
+        Returns:
+            dict | None: sent, failed, cursor and total of the run, None if the fuzz could not be started
+        """
+        try:
+            pkt = self.build_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data)
+            fuzzer = PacketFuzzer(data=raw(pkt), fields=self.read_fuzz_spec(filename=spec_file), mode=mode, seed=seed)
+            cursor = fuzzer.load_cursor(filename=cursor_file) if cursor_file else 0
+            sink = self.open_sink(output_file=output_file)
+        except (*SEND_ERRORS, KeyError, TypeError) as error:
+            # A fuzz spec or cursor file with the wrong structure raises KeyError or TypeError
+            self.report_error(action="starting the fuzz", error=error)
+            return None
+
+        end = fuzzer.total if count is None else min(fuzzer.total, cursor + count)
+        packets = fuzzer.generate(start=cursor, count=end - cursor)
+        dest_addr = socket.inet_ntoa(raw(pkt)[16:20])
+        sent = 0
+        failed = 0
+        with sink:
+            try:
+                while cursor < end:
+                    chunk = min(FUZZ_CHUNK_SIZE, end - cursor)
+                    chunk_sent, chunk_failed = sink.send_many(packets=itertools.islice(packets, chunk), dest_addr=dest_addr)
+                    sent += chunk_sent
+                    failed += chunk_failed
+                    cursor += chunk
+                    if cursor_file:
+                        fuzzer.save_cursor(filename=cursor_file, cursor=cursor)
+            except KeyboardInterrupt:
+                # The cursor file still points at the start of the unfinished chunk
+                pass
+
+        return {"sent": sent, "failed": failed, "cursor": cursor, "total": fuzzer.total}
+
+
+    # User-defined method
+    def report_error(self, action: str, error: Exception):
+        """
+        Print why packets could not be built or sent
+
+        Args:
+            action (str): What failed, e.g. "sending packets"
+            error (Exception): The error
+        """
+        hint = " (raw sockets need administrator/root privileges)" if isinstance(error, PermissionError) else ""
+        print(f"Error in {action}: {type(error).__name__}: {error}{hint}")
+
+
+    # User-defined method
+    def print_worker_progress(self, counters: list):
+        """
+        Print the live sent and failed counters of every worker on one line
+
+        Args:
+            counters (list): (sent, failed) of every worker
+        """
+        workers = " | ".join(f"#{worker_id} {sent}/{failed}" for worker_id, (sent, failed) in enumerate(counters))
+        print(f"\rSent/failed per worker: {workers}", end="", flush=True)
+
+
     # User-defined method
     def print_buffered_menu(self, menu: list):
         """
@@ -331,16 +1201,138 @@ class CustomPacketSender:
         os.system("cls")
         self.print_buffered_menu(menu=menu_buffer)
 
-        start_now = input("Enter Y/yes to continue, no to return to the main menu. Any other response is \"no\": ") 
+        # Fields that change per packet are patched into a precompiled packet template instead of rebuilding the packet
+        vary_prompt = "Fields to vary per packet, comma separated ip_id,src_port,seq,counter (optional, identical packets if left blank): "
+        vary_fields = input(vary_prompt)
+        vary_fields_flag = self.validate_vary_fields(fields=vary_fields)
+        while vary_fields_flag == False:
+            os.system("cls")
+            self.print_buffered_menu(menu_buffer)
+            print("\nPlease enter fields from ip_id, src_port, seq and counter separated by a comma.\n")
+            vary_fields = input(vary_prompt)
+            vary_fields_flag = self.validate_vary_fields(fields=vary_fields)
+        vary = [field.strip() for field in vary_fields.split(",") if field.strip() != ""]
+        menu_buffer.append(f"{vary_prompt}{vary_fields}")
 
-        if start_now == "Y" or start_now == "y" or start_now == "Yes" or start_now == "yes": 
-            count = 0
+        os.system("cls")
+        self.print_buffered_menu(menu=menu_buffer)
+
+        # Validate output_file, no type casting
+        output_prompt = "Write packets to a .pcap/.pcapng file instead of sending them (optional, sent on the network if left blank): "
+        output_file = input(output_prompt)
+        output_file_flag = self.validate_output_file(filename=output_file)
+        while output_file_flag == False:
+            os.system("cls")
+            self.print_buffered_menu(menu_buffer)
+            print("\nPlease enter a file name that ends with .pcap or .pcapng.\n")
+            output_file = input(output_prompt)
+            output_file_flag = self.validate_output_file(filename=output_file)
+        menu_buffer.append(f"{output_prompt}{output_file}")
+
+        os.system("cls")
+        self.print_buffered_menu(menu=menu_buffer)
+
+        match_replies = "no"
+        if output_file == "":
+            match_prompt = "Match replies to measure RTT and loss? (Y/yes to match, default is \"no\"): "
+            match_replies = input(match_prompt)
+            menu_buffer.append(f"{match_prompt}{match_replies}")
+
+            os.system("cls")
+            self.print_buffered_menu(menu=menu_buffer)
+
+        # Validate and cast workers to int type
+        workers_prompt = f"No of sending processes (1-{os.cpu_count() or 1}, optional, 1 if left blank): "
+        workers = input(workers_prompt)
+        workers_flag = self.validate_workers(number=workers)
+        while workers_flag == False:
+            os.system("cls")
+            self.print_buffered_menu(menu_buffer)
+            print(f"\nPlease enter a number of sending processes in the range of 1-{os.cpu_count() or 1}.\n")
+            workers = input(workers_prompt)
+            workers_flag = self.validate_workers(number=workers)
+        menu_buffer.append(f"{workers_prompt}{workers}")
+        workers = int(workers) if workers != "" else 1
 
-            for _ in range(pkt_count):
-                if self.send_packet(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data):
-                    count  = count + 1
+        os.system("cls")
+        self.print_buffered_menu(menu=menu_buffer)
+
+        # Validate and parse rate, e.g. "20kpps" to (20000.0, "pps")
+        # A target rate is held by one sending process, so it is only asked for when a single process sends
+        rate = ""
+        if workers == 1:
+            rate_prompt = "Target rate, e.g. 500pps, 20kpps or 10Mbps (optional, as fast as possible if left blank): "
+            rate = input(rate_prompt)
+            rate_flag = self.validate_rate(rate=rate)
+            while rate_flag == False:
+                os.system("cls")
+                self.print_buffered_menu(menu_buffer)
+                print("\nPlease enter a rate as a number followed by pps or bps, with an optional k, M or G prefix.\n")
+                rate = input(rate_prompt)
+                rate_flag = self.validate_rate(rate=rate)
+            menu_buffer.append(f"{rate_prompt}{rate}")
+
+        burst = 1
+        if rate != "":
+            os.system("cls")
+            self.print_buffered_menu(menu=menu_buffer)
+
+            # Uses "self.validate_port" to validate the burst size as it has the same number range
+            burst_prompt = "Burst size in packets (1-65535, optional, 1 if left blank): "
+            burst = input(burst_prompt)
+            while burst != "" and self.validate_port(number=burst) == False:
+                os.system("cls")
+                self.print_buffered_menu(menu_buffer)
+                print("\nPlease enter a burst size in the range of 1-65535.\n")
+                burst = input(burst_prompt)
+            menu_buffer.append(f"{burst_prompt}{burst}")
+            burst = int(burst) if burst != "" else 1
+
+        os.system("cls")
+        self.print_buffered_menu(menu=menu_buffer)
 
-            print(f"{count} packet(s) sent" )
+        start_now = input("Enter Y/yes to continue, no to return to the main menu. Any other response is \"no\": ") 
+
+        if start_now == "Y" or start_now == "y" or start_now == "Yes" or start_now == "yes": 
+            try:
+                # A capture file is written by one process, so sending processes only apply to the network
+                if match_replies == "Y" or match_replies == "y" or match_replies == "Yes" or match_replies == "yes":
+                    report = self.send_and_match(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count)
+                    if report is None:
+                        sent, failed = 0, pkt_count
+                    else:
+                        sent, failed = report["sent"], pkt_count - report["sent"]
+                        print(f"{report['received']} reply(s) matched, {report['lost']} lost ({report['loss']:.1f}% loss)")
+                        if report["received"] > 0:
+                            print(f"RTT min/avg/max/stddev: {report['rtt_min'] * 1000:.3f}/{report['rtt_avg'] * 1000:.3f}/"
+                                  f"{report['rtt_max'] * 1000:.3f}/{report['rtt_stddev'] * 1000:.3f} ms")
+                elif rate != "":
+                    rate_value, rate_unit = self.parse_rate(rate=rate)
+                    report = self.send_paced(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data,
+                                             pkt_count, vary, rate_value, rate_unit, burst, output_file)
+                    sent, failed = report["sent"], report["failed"]
+                    print(f"Achieved rate: {report['rate_pps']:.1f} pps, {report['rate_bps'] / 1_000_000:.3f} Mbps in {report['elapsed']:.3f}s")
+                    print(f"Jitter: {report['jitter'] * 1_000_000:.1f} us, missed deadlines: {report['missed']}")
+                elif workers > 1 and output_file == "":
+                    sent, failed = self.send_parallel(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, vary, workers)
+                    print()
+                elif len(vary) > 0:
+                    sent, failed = self.send_template_burst(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, vary, output_file)
+                else:
+                    sent, failed = self.send_burst(src_addr, src_port, dest_addr, dest_port, pkt_type, pkt_data, pkt_count, output_file)
+            except KeyboardInterrupt:
+                # Ctrl+C stops the sending and returns to the menu instead of ending the program
+                print("\nSending was interrupted by the user, the packets that were already sent are not counted.")
+                sent, failed = None, 0
+
+            if sent is None:
+                pass
+            elif output_file != "":
+                print(f"{sent} packet(s) written to {output_file}")
+            else:
+                print(f"{sent} packet(s) sent" )
+            if failed > 0:
+                print(f"{failed} packet(s) failed to send")
             input("Press \"Enter\" to return to the main menu.....")
             os.system("cls")
         else:
@@ -348,3 +1340,78 @@ class CustomPacketSender:
             input("Press \"Enter\" to return to the main menu.....")
             os.system("cls")
 
+
+# Main program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a flow spec file, replay a capture file or fuzz packet fields without the menu")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--flows", help="JSONL or CSV flow spec file")
+    source.add_argument("--replay", help="pcap or pcapng file to replay")
+    source.add_argument("--fuzz", help="JSON fuzz spec file of the values of every fuzzed field")
+    parser.add_argument("--output", default=None, help="Write the packets to a .pcap/.pcapng file instead of sending them")
+    parser.add_argument("--workers", type=int, default=1, help="Number of sending processes for --flows")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_FLOW_BATCH_SIZE, help="Flows that are built and sent together")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed as a multiple of the original timing, 0 for top speed")
+    parser.add_argument("--rewrite-src", default=None, help="Rewrite the source address of replayed packets")
+    parser.add_argument("--rewrite-dest", default=None, help="Rewrite the destination address of replayed packets")
+    parser.add_argument("--rewrite-sport", type=int, default=None, help="Rewrite the TCP/UDP source port of replayed packets")
+    parser.add_argument("--rewrite-dport", type=int, default=None, help="Rewrite the TCP/UDP destination port of replayed packets")
+    parser.add_argument("--src", default="127.0.0.1", help="Source address of fuzzed packets")
+    parser.add_argument("--sport", type=int, default=40000, help="Source port of fuzzed packets")
+    parser.add_argument("--dest", default=None, help="Destination address of fuzzed packets")
+    parser.add_argument("--dport", type=int, default=80, help="Destination port of fuzzed packets")
+    parser.add_argument("--type", default="T", choices=["T", "U", "I"], help="Packet type of fuzzed packets (T)TCP, (U)UDP, (I)ICMP")
+    parser.add_argument("--data", default="DISM-DISM-DISM-DISM", help="Payload of fuzzed packets, unless the payload is fuzzed")
+    parser.add_argument("--mode", default="product", choices=FUZZ_MODES, help="Every combination in order or a shuffled order")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the shuffled order of --mode random")
+    parser.add_argument("--count", type=int, default=None, help="Fuzz cases to send in this run, every remaining case if left out")
+    parser.add_argument("--cursor-file", default=None, help="Resume the fuzz from and save its cursor position to this file")
+    args = parser.parse_args()
+
+    packet_sender = CustomPacketSender()
+    if args.output is not None and not packet_sender.validate_output_file(filename=args.output):
+        parser.error("--output must end with .pcap or .pcapng")
+    for port in (args.rewrite_sport, args.rewrite_dport):
+        if port is not None and not packet_sender.validate_port(number=str(port)):
+            parser.error("Rewritten ports must be in the range of 1-65535")
+    action = f"written to {args.output}" if args.output else "sent"
+
+    if args.fuzz is not None:
+        if args.dest is None or not packet_sender.validate_address(address=args.dest) or not packet_sender.validate_address(address=args.src):
+            parser.error("--fuzz needs a valid --dest address and --src address")
+        if not (packet_sender.validate_port(number=str(args.sport)) and packet_sender.validate_port(number=str(args.dport))):
+            parser.error("--sport and --dport must be in the range of 1-65535")
+        report = packet_sender.send_fuzz(src_addr=args.src, src_port=args.sport, dest_addr=args.dest, dest_port=args.dport,
+                                         pkt_type=args.type, pkt_data=args.data, spec_file=args.fuzz, mode=args.mode, seed=args.seed,
+                                         count=args.count, cursor_file=args.cursor_file, output_file=args.output)
+        if report is None:
+            print(f"Error in fuzzing with: {args.fuzz}")
+        else:
+            print(f"{report['sent']} packet(s) {action}, cursor at {report['cursor']} of {report['total']} case(s)")
+            if report["failed"] > 0:
+                print(f"{report['failed']} packet(s) failed to send")
+    elif args.replay is not None:
+        report = packet_sender.replay_pcap(filename=args.replay, speed=args.speed, src_addr=args.rewrite_src, dest_addr=args.rewrite_dest,
+                                           src_port=args.rewrite_sport, dest_port=args.rewrite_dport, output_file=args.output)
+        if report is None:
+            print(f"Error in replaying: {args.replay}")
+        else:
+            print(f"{report['sent']} packet(s) {action} in {report['elapsed']:.3f}s")
+            if report["failed"] > 0:
+                print(f"{report['failed']} packet(s) failed to send")
+            if report["skipped"] > 0:
+                print(f"{report['skipped']} record(s) skipped as they are not IPv4")
+            if report["late"] > 0:
+                print(f"{report['late']} packet(s) sent late")
+    else:
+        report = packet_sender.send_flow_file(filename=args.flows, batch_size=args.batch_size,
+                                              workers=args.workers, output_file=args.output)
+        if report is None:
+            print(f"Error in sending the flows of: {args.flows}")
+        else:
+            sent, failed, invalid, invalid_lines = report
+            print(f"{sent} packet(s) {action}")
+            if failed > 0:
+                print(f"{failed} packet(s) failed to send")
+            if invalid > 0:
+                print(f"{invalid} invalid row(s), first at line(s): {', '.join(str(line_no) for line_no in invalid_lines[:10])}")
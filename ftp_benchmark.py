@@ -0,0 +1,458 @@
+"""
+FTP Benchmark Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    ftp_benchmark.py
+
+Purpose:
+    Benchmark FTP transfers against a local pyftpdlib server, set up like ftp_server.py, in a temporary directory.
+    Many small files are uploaded and downloaded with a new connect() and login() for every file,
+    with sessions from the session pool and in batches over several FTP connections at the same time,
+    and the files/s and MiB/s of every mode are compared.
+    A large file is downloaded with one RETR and in segments over several FTP connections, and checked with SHA-256.
+    The server is a ThreadedFTPServer by default, the single threaded FTPServer of ftp_server.py handles the commands of all
+    connections one at a time, so the parallel modes can not be faster than the server is at its own file system work
+
+Usage syntax:
+    Run with command line in the directory where this script is located, e.g. python ftp_benchmark.py --files 1000 --size 1024 --workers 2 4 8
+    or python ftp_benchmark.py --large-mib 512 --segments 2 4 8 for the segmented download benchmark,
+    add --server async to benchmark against the single threaded server of ftp_server.py instead
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil, the files that are transferred are written to a temporary directory that is removed afterwards
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://pyftpdlib.readthedocs.io/en/latest/api.html#pyftpdlib.servers.FTPServer
+https://pyftpdlib.readthedocs.io/en/latest/api.html#pyftpdlib.servers.ThreadedFTPServer
+https://docs.python.org/3/library/tempfile.html#tempfile.TemporaryDirectory
+https://docs.python.org/3/library/time.html#time.perf_counter
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - argparse
+    - ftplib
+    - hashlib
+    - logging
+    - multiprocessing
+    - os
+    - tempfile
+    - time
+- required external modules installed using pip: pip install <module name>  # e.g. pip install pyftpdlib
+    - pyftpdlib
+- custom module(s) from python scripts in the same directory
+    - ftp_pool
+    - ftp_transfer
+
+Known issues:
+    The client and the server run on the same machine, with one or two CPUs the batch modes compete with the server for them
+    and are barely faster than the session pool, the speedup of the batches needs a server with CPUs of its own.
+
+
+"""
+
+import argparse
+import ftplib
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer, ThreadedFTPServer
+from ftp_pool import FTPSessionPool
+from ftp_transfer import BatchTransfer, SegmentedDownload, TRANSFER_BLOCK_SIZE
+
+
+# pyftpdlib server class of every --server choice
+SERVER_CLASSES = {"threaded": ThreadedFTPServer, "async": FTPServer}
+
+
+# User-defined function
+def serve(home_directory: str, ports, server_type: str = "threaded"):
+    """
+    Run a pyftpdlib server on a free loopback port until the process is stopped, set up like ftp_server.py
+
+    Args:
+        home_directory (str): Directory that the anonymous user can read and write
+        ports (multiprocessing.Queue): Queue that the port of the server is put on once it listens
+        server_type (str): "threaded" for a thread per connection, "async" for the single threaded server of ftp_server.py
+    """
+    # pyftpdlib logs every command unless its logger is already set up, which would cost more than the transfers
+    logger = logging.getLogger("pyftpdlib")
+    logger.setLevel(logging.WARNING)
+    logger.addHandler(logging.NullHandler())
+    authorizer = DummyAuthorizer()
+    authorizer.add_anonymous(home_directory, perm="elrw")
+    FTPHandler.authorizer = authorizer
+    server = SERVER_CLASSES[server_type](("127.0.0.1", 0), FTPHandler)
+    ports.put(server.socket.getsockname()[1])
+    server.serve_forever()
+
+
+# User-defined function
+def file_sha256(filename: str) -> str:
+    """
+    SHA-256 of a file, read one block at a time
+
+    Args:
+        filename (str): The file
+
+    Returns:
+        str: Hex digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(TRANSFER_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# User-defined function
+def bench_segmented(client_directory: str, server_directory: str, port: int, size_mib: int, segments: list) -> list:
+    """
+    Download a large file with one RETR and in segments, checking every download against the SHA-256 of the file
+
+    Args:
+        client_directory (str): Directory that the file is downloaded to
+        server_directory (str): Home directory of the local FTP server
+        port (int): Port of the local FTP server
+        size_mib (int): MiB of the file
+        segments (list): Numbers of segments to download the file in
+
+    Returns:
+        list: mode, seconds and MiB/s of every download
+    """
+    name = "bench_large.bin"
+    with open(os.path.join(server_directory, name), "wb") as file:
+        for _ in range(size_mib):
+            file.write(os.urandom(2 ** 20))
+    expected = file_sha256(filename=os.path.join(server_directory, name))
+    destination = os.path.join(client_directory, name)
+
+    results = []
+    print(f"{size_mib} MiB file\n")
+    print(f"{'Mode':<14}{'Seconds':>10}{'MiB/s':>10}{'Speedup':>10}{'SHA-256':>10}")
+    session = ftplib.FTP()
+    session.connect("127.0.0.1", port)
+    session.login()
+    start = time.perf_counter()
+    with open(destination, "wb") as file:
+        session.retrbinary(f"RETR {name}", file.write, blocksize=TRANSFER_BLOCK_SIZE)
+    results.append({"mode": "retrbinary", "seconds": time.perf_counter() - start, "correct": file_sha256(filename=destination) == expected})
+    session.quit()
+
+    pool = FTPSessionPool()
+    initial_path = os.getcwd()
+    os.chdir(client_directory)
+    try:
+        for count in segments:
+            stats = SegmentedDownload(pool=pool, name=name, segments=count, directory="/", port=port).run()
+            results.append({"mode": f"segments x{stats['segments']}", "seconds": stats["seconds"],
+                            "correct": file_sha256(filename=destination) == expected})
+    finally:
+        os.chdir(initial_path)
+        pool.close_all()
+
+    for result in results:
+        result["mib_per_second"] = size_mib / result["seconds"]
+        print(f"{result['mode']:<14}{result['seconds']:>10.2f}{result['mib_per_second']:>10.1f}"
+              f"{results[0]['seconds'] / result['seconds']:>9.2f}x{str(result['correct']):>10}")
+    return results
+
+
+class LocalFTPServer:
+    """
+    A class for a pyftpdlib server in a process of its own, like ftp_server.py in a separate terminal
+
+    Attributes:
+        port (int): Port that the server listens on
+
+    Methods:
+        __init__(home_directory, server_type):
+            Start the server process and wait until it listens
+
+            Args:
+                home_directory (str): Directory that the anonymous user can read and write
+                server_type (str): "threaded" or "async", a key of SERVER_CLASSES
+
+
+        close():
+            Stop the server process
+    """
+
+    # Initializer
+    def __init__(self, home_directory: str, server_type: str = "threaded") -> None:
+        """
+        Start the server process and wait until it listens
+
+        Args:
+            home_directory (str): Directory that the anonymous user can read and write
+            server_type (str): "threaded" or "async", a key of SERVER_CLASSES
+        """
+        ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=serve, args=(home_directory, ports, server_type), daemon=True)
+        self.process.start()
+        self.port = ports.get(timeout=30)
+
+
+    # User-defined method
+    def close(self):
+        """
+        Stop the server process
+        """
+        self.process.terminate()
+        self.process.join(timeout=5)
+
+
+class FTPBenchmark:
+    """
+    A class for benchmarking FTP transfers of many small files against a local server
+
+    Attributes:
+        files (list): Names of the files that are transferred
+        size (int): Bytes of every file
+
+    Methods:
+        __init__(files, size, client_directory, server_directory, port, workers):
+            Initialize the benchmark, writing the files to upload to the client directory
+
+            Args:
+                files (int): Number of files
+                size (int): Bytes of every file
+                client_directory (str): Directory that the files are uploaded from and downloaded to
+                server_directory (str): Home directory of the local FTP server
+                port (int): Port of the local FTP server
+                workers (list): Numbers of FTP connections of the batch transfers
+
+
+        upload(session, name):
+            Upload one file of the client directory
+
+            Args:
+                session (ftplib.FTP): Logged in FTP session
+                name (str): Name of the file
+
+
+        download(session, name):
+            Download one file to the client directory
+
+            Args:
+                session (ftplib.FTP): Logged in FTP session
+                name (str): Name of the file
+
+
+        bench_connect(transfer):
+            Transfer every file with a new connect() and login() for every file, like a CustomFTPClient per file did
+
+            Args:
+                transfer (function): upload or download
+
+            Returns:
+                float: Wall time in seconds
+
+
+        bench_pool(transfer):
+            Transfer every file with a session from the session pool
+
+            Args:
+                transfer (function): upload or download
+
+            Returns:
+                float: Wall time in seconds
+
+
+        bench_batch(direction, workers):
+            Transfer every file in a batch over several FTP connections at the same time
+
+            Args:
+                direction (str): "upload" or "download"
+                workers (int): Number of FTP connections
+
+            Returns:
+                float: Wall time in seconds
+
+
+        run():
+            Run every mode and print the results
+    """
+
+    # Initializer
+    def __init__(self, files: int, size: int, client_directory: str, server_directory: str, port: int, workers: list) -> None:
+        """
+        Initialize the benchmark, writing the files to upload to the client directory
+
+        Args:
+            files (int): Number of files
+            size (int): Bytes of every file
+            client_directory (str): Directory that the files are uploaded from and downloaded to
+            server_directory (str): Home directory of the local FTP server
+            port (int): Port of the local FTP server
+            workers (list): Numbers of FTP connections of the batch transfers
+        """
+        self.workers = workers
+        self.files = [f"bench_{number:06d}.bin" for number in range(files)]
+        self.size = size
+        self.client_directory = client_directory
+        self.server_directory = server_directory
+        self.port = port
+        for name in self.files:
+            with open(os.path.join(client_directory, name), "wb") as file:
+                file.write(os.urandom(size))
+
+
+    # User-defined method
+    def upload(self, session: ftplib.FTP, name: str):
+        """
+        Upload one file of the client directory
+
+        Args:
+            session (ftplib.FTP): Logged in FTP session
+            name (str): Name of the file
+        """
+        with open(os.path.join(self.client_directory, name), "rb") as file:
+            session.storbinary(f"STOR {name}", file)
+
+
+    # User-defined method
+    def download(self, session: ftplib.FTP, name: str):
+        """
+        Download one file to the client directory
+
+        Args:
+            session (ftplib.FTP): Logged in FTP session
+            name (str): Name of the file
+        """
+        with open(os.path.join(self.client_directory, name), "wb") as file:
+            session.retrbinary(f"RETR {name}", file.write)
+
+
+    # User-defined method
+    def bench_connect(self, transfer) -> float:
+        """
+        Transfer every file with a new connect() and login() for every file, like a CustomFTPClient per file did
+
+        Args:
+            transfer (function): upload or download
+
+        Returns:
+            float: Wall time in seconds
+        """
+        start = time.perf_counter()
+        for name in self.files:
+            session = ftplib.FTP()
+            session.connect("127.0.0.1", self.port)
+            session.login()
+            transfer(session, name)
+            session.close()
+        return time.perf_counter() - start
+
+
+    # User-defined method
+    def bench_pool(self, transfer) -> float:
+        """
+        Transfer every file with a session from the session pool
+
+        Args:
+            transfer (function): upload or download
+
+        Returns:
+            float: Wall time in seconds
+        """
+        pool = FTPSessionPool()
+        start = time.perf_counter()
+        for name in self.files:
+            session = pool.acquire(host="127.0.0.1", port=self.port)
+            transfer(session, name)
+            pool.release(session=session, reset_directory=False)
+        elapsed = time.perf_counter() - start
+        pool.close_all()
+        return elapsed
+
+
+    # User-defined method
+    def bench_batch(self, direction: str, workers: int) -> float:
+        """
+        Transfer every file in a batch over several FTP connections at the same time
+
+        Args:
+            direction (str): "upload" or "download"
+            workers (int): Number of FTP connections
+
+        Returns:
+            float: Wall time in seconds
+        """
+        pool = FTPSessionPool()
+        batch = BatchTransfer(pool=pool, direction=direction, workers=workers, directory="/", port=self.port)
+        # The batch transfers the files of the current directory
+        initial_path = os.getcwd()
+        os.chdir(self.client_directory)
+        try:
+            stats = batch.run(files=[(name, self.size) for name in self.files])
+        finally:
+            os.chdir(initial_path)
+        pool.close_all()
+        if len(stats["failed"]) > 0:
+            raise RuntimeError(f"{len(stats['failed'])} file(s) of the batch failed")
+        return stats["seconds"]
+
+
+    # User-defined method
+    def run(self):
+        """
+        Run every mode and print the results
+        """
+        total_mib = len(self.files) * self.size / 2 ** 20
+        print(f"{len(self.files)} files of {self.size} bytes, {total_mib:.2f} MiB\n")
+        print(f"{'Transfer':<10}{'Mode':<12}{'Seconds':>10}{'Files/s':>12}{'MiB/s':>10}{'Speedup':>10}")
+        for direction, transfer in (("upload", self.upload), ("download", self.download)):
+            baseline = None
+            modes = [("connect", lambda: self.bench_connect(transfer=transfer)), ("pool", lambda: self.bench_pool(transfer=transfer))]
+            for workers in self.workers:
+                modes.append((f"batch x{workers}", lambda workers=workers: self.bench_batch(direction=direction, workers=workers)))
+            for mode, bench in modes:
+                # Every upload creates the files on the server, instead of the later modes overwriting them
+                if direction == "upload":
+                    for name in os.listdir(self.server_directory):
+                        os.remove(os.path.join(self.server_directory, name))
+                elapsed = bench()
+                baseline = baseline or elapsed
+                print(f"{direction:<10}{mode:<12}{elapsed:>10.2f}{len(self.files) / elapsed:>12.0f}"
+                      f"{total_mib / elapsed:>10.2f}{baseline / elapsed:>9.2f}x")
+
+
+# Main program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FTP transfers against a local pyftpdlib server")
+    parser.add_argument("--files", type=int, default=1000, help="Number of files to transfer")
+    parser.add_argument("--size", type=int, default=1024, help="Bytes of every file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8], help="Numbers of FTP connections of the batch transfers")
+    parser.add_argument("--large-mib", type=int, help="Benchmark the segmented download of a file of this many MiB instead")
+    parser.add_argument("--segments", type=int, nargs="+", default=[2, 4, 8], help="Numbers of segments of the segmented downloads")
+    parser.add_argument("--server", choices=sorted(SERVER_CLASSES), default="threaded",
+                        help="threaded: a thread per connection, async: the single threaded server of ftp_server.py")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as server_directory, tempfile.TemporaryDirectory() as client_directory:
+        server = LocalFTPServer(home_directory=server_directory, server_type=args.server)
+        try:
+            if args.large_mib is not None:
+                bench_segmented(client_directory=client_directory, server_directory=server_directory, port=server.port,
+                                size_mib=args.large_mib, segments=args.segments)
+            else:
+                FTPBenchmark(files=args.files, size=args.size, client_directory=client_directory,
+                             server_directory=server_directory, port=server.port, workers=args.workers).run()
+        finally:
+            server.close()
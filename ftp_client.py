@@ -10,7 +10,11 @@ Script name:
     ftp_client.py
 
 Purpose:
-    FTP client script that allows the user to upload/download files to/from an FTP server
+    FTP client script that allows the user to upload/download files to/from an FTP server.
+    Logged in sessions are taken from a shared session pool and given back after every transfer,
+    so later transfers to the same server do not connect and log in again.
+    Many files can be uploaded/downloaded in a batch over several FTP connections at the same time,
+    and a large file can be downloaded in segments over several FTP connections
 
 Usage syntax:
     Nil, intended to be used as a custom module
@@ -32,15 +36,20 @@ https://docs.python.org/3/library/ftplib.html#ftplib.FTP.dir
 https://docs.python.org/3/library/ftplib.html#ftplib.FTP.pwd
 https://www.geeksforgeeks.org/python-os-path-isfile-method/
 https://www.geeksforgeeks.org/how-to-download-and-upload-files-in-ftp-server-using-python/
+https://docs.python.org/3/library/ftplib.html#ftplib.FTP.voidcmd
+https://docs.python.org/3/library/glob.html#glob.glob
+https://datatracker.ietf.org/doc/html/rfc3659#section-5
 
 Library/Module:
 - modules used that are installed by default in Python 3.10.9
-    - socket
     - ftplib
     - os
     - re
 - required external modules installed using pip on the command line: pip install <module name>  # e.g. pip install python-magic-bin
     - python-magic-bin
+- custom module(s) from python scripts in the same directory
+    - ftp_pool
+    - ftp_transfer
 
 
 Known issues:
@@ -52,11 +61,12 @@ Known issues:
 
 """
 
-import socket  # For handling the "socket.gaierror"
 import ftplib
 import os
 import re
 import magic
+from ftp_pool import SESSION_POOL
+from ftp_transfer import BatchTransfer, SegmentedDownload, local_files, remote_files, DEFAULT_TRANSFER_WORKERS, MAX_TRANSFER_WORKERS
 
 
 class CustomFTPClient:
@@ -64,15 +74,19 @@ class CustomFTPClient:
     A class for setting up a Custom FTP Client
 
     Attributes:
-        Nil
+        pool (FTPSessionPool): Pool that the FTP session is taken from and given back to
+        ftp_client (ftplib.FTP | None): The FTP session, None until there is a connection
 
     Methods:
-        __init__():
-            Instantiate FTP client with the current working directory and an instance of the ftplib client
+        __init__(pool):
+            Instantiate FTP client with the current working directory and the pool of FTP sessions
+
+            Args:
+                pool (FTPSessionPool): Pool of FTP sessions, the pool shared by every client if not given
 
 
         connection():
-            Initiate connection to the ftp server
+            Take a logged in session to the ftp server from the pool, connecting a new one if there is none
 
             Returns:
                 bool: True if there is a successful connection to the ftp server, False otherwise 
@@ -100,38 +114,63 @@ class CustomFTPClient:
 
 
         upload_file():
-            Uploads a file from the ftp client to the ftp server and closes the FTP session afterwards
+            Uploads a file from the ftp client to the ftp server and gives the FTP session back to the pool afterwards
 
 
         download_file():
-            Downloads a file from an ftp server and closes the FTP session afterwards
+            Downloads a file from an ftp server and gives the FTP session back to the pool afterwards
+
+
+        validate_workers(number):
+            Check if the number of parallel FTP connections is blank or within 1 and MAX_TRANSFER_WORKERS
+
+            Args:
+                number (str): The number to validate
+
+            Returns:
+                bool: True if it is a valid number of FTP connections, otherwise False
+
+
+        transfer_batch(direction):
+            Uploads/downloads the files that match names or glob patterns over several FTP connections at the same time
+            and gives the FTP session back to the pool afterwards
+
+            Args:
+                direction (str): "upload" or "download"
+
+
+        download_segmented():
+            Downloads a large file in segments over several FTP connections at the same time, verifies it
+            and gives the FTP session back to the pool afterwards
     """
 
     # Initializer
-    def __init__(self) -> None:
+    def __init__(self, pool=SESSION_POOL) -> None:
         """
-        Instantiate FTP client with the current working directory and an instance of the ftplib client
+        Instantiate FTP client with the current working directory and the pool of FTP sessions
+
+        Args:
+            pool (FTPSessionPool): Pool of FTP sessions, the pool shared by every client if not given
         """
-        self.ftp_client = ftplib.FTP()
+        self.pool = pool
+        self.ftp_client = None
         self.initial_path = os.getcwd()
 
 
     # User-defined method
     def connection(self) -> bool:
         """
-        Initiate connection to the ftp server
+        Take a logged in session to the ftp server from the pool, connecting a new one if there is none
 
         Returns:
             bool: True if there is a successful connection to the ftp server, False otherwise 
         """
         try:
             # As per assignment's details, use "127.0.0.1" for the interface and port "2121"
-            self.ftp_client.connect("127.0.0.1", 2121)
-            self.ftp_client.login()
+            self.ftp_client = self.pool.acquire(host="127.0.0.1", port=2121, user="anonymous")
             return True
-        except ConnectionRefusedError:
-            return False
-        except socket.gaierror:
+        except (OSError, ftplib.Error):
+            # e.g. a refused connection, a timeout or a failed login
             return False
 
 
@@ -229,7 +268,7 @@ class CustomFTPClient:
     # User-defined method
     def upload_file(self):
         """
-        Uploads a file from the ftp client to the ftp server and closes the FTP session afterwards
+        Uploads a file from the ftp client to the ftp server and gives the FTP session back to the pool afterwards
         """
         error_msg = ""
         while True:
@@ -264,16 +303,16 @@ class CustomFTPClient:
                         os.system("cls")
                         continue
                     else:
-                        print("\nEnding FTP client session....")
-                        self.ftp_client.close()
+                        print("\nReturning FTP session to the session pool....")
+                        self.pool.release(session=self.ftp_client)
                         input("Press \"enter\" to return to the Info Security Apps menu....")
                         os.system("cls")
                         break
 
                 print(f"\nUploaded file: {selected_file}.")
-                print("Ending FTP client session....")
+                print("Returning FTP session to the session pool....")
 
-                self.ftp_client.close()
+                self.pool.release(session=self.ftp_client)
                 os.chdir(self.initial_path)  # Revert local directory to where the menu script was executed
 
                 input("Press \"enter\" to return to the Info Security Apps menu....")
@@ -284,7 +323,7 @@ class CustomFTPClient:
     # User-defined method
     def download_file(self):
         """
-        Downloads a file from an ftp server and closes the FTP session afterwards
+        Downloads a file from an ftp server and gives the FTP session back to the pool afterwards
         """
         error_msg = ""
         while True:
@@ -323,16 +362,185 @@ class CustomFTPClient:
                     os.system("cls")
                     continue
                 else:
-                    print("\nEnding FTP client session....")
-                    self.ftp_client.close()
+                    print("\nReturning FTP session to the session pool....")
+                    self.pool.release(session=self.ftp_client)
                     input("Press \"enter\" to return to the Info Security Apps menu....")
                     os.system("cls")
                     break
 
             print(f"\nDownloaded file: {selected_file}")
-            print("Ending FTP client session....")
+            print("Returning FTP session to the session pool....")
+
+            self.pool.release(session=self.ftp_client)
+            os.chdir(self.initial_path)  # Revert local directory to where the menu script was executed
+
+            input("Press \"enter\" to return to the Info Security Apps menu....")
+            os.system("cls")
+            break
+
+
+    # User-defined method
+    def validate_workers(self, number: str) -> bool:
+        """
+        Check if the number of parallel FTP connections is blank or within 1 and MAX_TRANSFER_WORKERS
+
+        Args:
+            number (str): The number to validate
+
+        Returns:
+            bool: True if it is a valid number of FTP connections, otherwise False
+        """
+        if number == "":
+            return True
+        if number.isnumeric():
+            if int(number) >= 1 and int(number) <= MAX_TRANSFER_WORKERS:
+                return True
+        return False
+
+
+    # User-defined method
+    def transfer_batch(self, direction: str):
+        """
+        Uploads/downloads the files that match names or glob patterns over several FTP connections at the same time
+        and gives the FTP session back to the pool afterwards
+
+        Args:
+            direction (str): "upload" or "download"
+        """
+        error_msg = ""
+        while True:
+            if direction == "upload":
+                print("Choose the files to upload.")
+                print("Home directory listing:")
+                self.list_directory(filesystem="client")
+                print(f"FTP server directory path: \"{self.ftp_client.pwd()}\"")
+            else:
+                print("Choose the files to download.")
+                self.list_directory(filesystem="server")
+
+            if error_msg != "":
+                print(f"{error_msg}\n")
+
+            selection = input("Select files, names or glob patterns separated by spaces e.g. *.txt (Use \"/cwd <directory>\" to change FTP server directory): ")
+
+            try:
+                if re.match(pattern=r"^/cwd\b.*", string=selection):
+                    error_msg = ''
+                    directory = re.search(pattern=r"^/cwd\b(.*)", string=selection).group(1).strip()
+                    self.ftp_client.cwd(directory)
+                    os.system("cls")
+                    continue
+            except:
+                error_msg = "Error in changing directory, please select a valid directory."
+                os.system("cls")
+                continue
+
+            try:
+                if direction == "upload":
+                    files = local_files(patterns=selection.split())
+                else:
+                    files = remote_files(session=self.ftp_client, patterns=selection.split())
+            except:
+                files = []
+
+            if len(files) == 0:
+                os.system("cls")
+                error_msg = "Error - Please select files that exist."
+                continue
+            break
+
+        workers_prompt = f"No of parallel FTP connections (1-{MAX_TRANSFER_WORKERS}, optional, {DEFAULT_TRANSFER_WORKERS} if left blank): "
+        workers = input(workers_prompt)
+        while self.validate_workers(number=workers) == False:
+            print(f"Please enter a number of FTP connections in the range of 1-{MAX_TRANSFER_WORKERS}")
+            workers = input(workers_prompt)
+        workers = int(workers) if workers != "" else DEFAULT_TRANSFER_WORKERS
+
+        # The batch takes all of its sessions from the pool, so this session is given back to be one of them
+        directory = self.ftp_client.pwd()
+        self.pool.release(session=self.ftp_client)
+
+        transfer_mode = self.determine_transfer_mode if direction == "upload" else None
+        batch = BatchTransfer(pool=self.pool, direction=direction, workers=workers, directory=directory, transfer_mode=transfer_mode)
+        print(f"\nTransferring {len(files)} file(s) over {min(workers, len(files))} FTP connection(s)....")
+        stats = batch.run(files=files)
+
+        mebibytes = stats["bytes"] / 2 ** 20
+        seconds = max(stats["seconds"], 1e-6)
+        print(f"{direction.capitalize()}ed {stats['files']} file(s), {mebibytes:.2f} MiB in {stats['seconds']:.2f}s "
+              f"({mebibytes / seconds:.2f} MiB/s, {stats['files'] / seconds:.0f} files/s)")
+        if len(stats["failed"]) > 0:
+            print(f"Error in transferring {len(stats['failed'])} file(s): {', '.join(stats['failed'])}")
+        print("Returning FTP sessions to the session pool....")
+
+        os.chdir(self.initial_path)  # Revert local directory to where the menu script was executed
+
+        input("Press \"enter\" to return to the Info Security Apps menu....")
+        os.system("cls")
+
+
+    # User-defined method
+    def download_segmented(self):
+        """
+        Downloads a large file in segments over several FTP connections at the same time, verifies it
+        and gives the FTP session back to the pool afterwards
+        """
+        error_msg = ""
+        while True:
+            print("Choose a file to download in segments.")
+            self.list_directory(filesystem="server")
+
+            if error_msg != "":
+                print(f"{error_msg}\n")
+
+            selected_file = input("Select a file (Use \"/cwd <directory>\" to change FTP server directory): ")
+
+            try:
+                if re.match(pattern=r"^/cwd\b.*", string=selected_file):
+                    error_msg = ''
+                    directory = re.search(pattern=r"^/cwd\b(.*)", string=selected_file).group(1).strip()
+                    self.ftp_client.cwd(directory)
+                    os.system("cls")
+                    continue
+            except:
+                error_msg = "Error in changing directory, please select a valid directory."
+                os.system("cls")
+                continue
+
+            segments_prompt = f"No of segments downloaded at the same time (1-{MAX_TRANSFER_WORKERS}, optional, {DEFAULT_TRANSFER_WORKERS} if left blank): "
+            segments = input(segments_prompt)
+            while self.validate_workers(number=segments) == False:
+                print(f"Please enter a number of segments in the range of 1-{MAX_TRANSFER_WORKERS}")
+                segments = input(segments_prompt)
+            segments = int(segments) if segments != "" else DEFAULT_TRANSFER_WORKERS
+
+            try:
+                # pwd() is asked inside the try, the session may have been timed out by the server while the user chose
+                download = SegmentedDownload(pool=self.pool, name=selected_file, segments=segments, directory=self.ftp_client.pwd())
+                print(f"\nDownloading {selected_file}....")
+                stats = download.run()
+            except:
+                print(f"Error in downloading: {selected_file}")
+
+                err_qns = input("Would you like to try again? (Y/yes to try again, default response is \"no\"): ")
+
+                if err_qns == "Y" or err_qns == "y" or err_qns == "Yes" or err_qns == "yes":
+                    error_msg = ''
+                    os.system("cls")
+                    continue
+                else:
+                    print("\nReturning FTP session to the session pool....")
+                    self.pool.release(session=self.ftp_client)
+                    input("Press \"enter\" to return to the Info Security Apps menu....")
+                    os.system("cls")
+                    break
+
+            mebibytes = stats["bytes"] / 2 ** 20
+            print(f"\nDownloaded file: {selected_file}, {mebibytes:.2f} MiB in {stats['segments']} segment(s) in {stats['seconds']:.2f}s "
+                  f"({mebibytes / max(stats['seconds'], 1e-6):.2f} MiB/s), {stats['verified']}")
+            print("Returning FTP session to the session pool....")
 
-            self.ftp_client.close()
+            self.pool.release(session=self.ftp_client)
             os.chdir(self.initial_path)  # Revert local directory to where the menu script was executed
 
             input("Press \"enter\" to return to the Info Security Apps menu....")
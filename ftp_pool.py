@@ -0,0 +1,397 @@
+"""
+FTP Pool Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    ftp_pool.py
+
+Purpose:
+    Pool of logged in FTP control connections, keyed by host, port, user and a hash of the password. A transfer takes a session from the pool
+    and gives it back when it is done, so only the first transfer pays for connect() and login(). Idle sessions are
+    kept alive with NOOP commands, and sessions that the server has closed are replaced without the caller noticing
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/ftplib.html#ftplib.FTP.voidcmd
+https://datatracker.ietf.org/doc/html/rfc959#section-4.1.3
+https://pyftpdlib.readthedocs.io/en/latest/api.html#pyftpdlib.handlers.FTPHandler.timeout
+https://docs.python.org/3/library/atexit.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - atexit
+    - collections
+    - ftplib
+    - hashlib
+    - threading
+    - time
+
+Known issues:
+    A session is only checked with a NOOP when it has been idle for more than STALE_AFTER_SECONDS, so a connection
+    that dropped just after it was given back is only found out by the transfer that uses it
+
+
+"""
+
+import atexit
+import ftplib
+import hashlib
+import threading
+import time
+from collections import Counter
+
+
+# Seconds between the NOOP commands that keep idle sessions alive, well under pyftpdlib's idle timeout of 300 seconds
+KEEPALIVE_INTERVAL = 60.0
+
+# Sessions that have been idle for longer than this are checked with a NOOP before they are handed out
+STALE_AFTER_SECONDS = 15.0
+
+# Idle sessions that are kept for every host, port, user and password, the extra ones are logged out when they are given back
+MAX_IDLE_SESSIONS = 16
+
+# Errors of a control connection that the server has closed or that can not be used any more
+CONNECTION_ERRORS = (OSError, EOFError, ftplib.error_temp, ftplib.error_proto, ftplib.error_reply)
+
+
+# User-defined function
+def session_key(host: str, port: int, user: str, password: str) -> tuple:
+    """
+    Key of the sessions of a login, the password is hashed so that the pool does not keep it in memory as it is
+
+    Args:
+        host (str): Address of the FTP server
+        port (int): Port of the FTP server
+        user (str): User to log in as
+        password (str): Password of the user
+
+    Returns:
+        tuple: (host, port, user, SHA-256 of the password)
+    """
+    return (host, port, user, hashlib.sha256(password.encode()).hexdigest())
+
+
+class FTPSessionPool:
+    """
+    A class for a pool of logged in FTP sessions, keyed by host, port, user and a hash of the password, so a session
+    is only handed out to a caller that knows the password it logged in with
+
+    Attributes:
+        stats (Counter): Sessions that were created, reused, replaced because they were dead, and keepalives sent
+
+    Methods:
+        __init__(timeout):
+            Initialize an empty pool
+
+            Args:
+                timeout (float): Seconds that the connect and every command of a session may take
+
+
+        connect(host, port, user, password):
+            Connect and log in a new session
+
+            Args:
+                host (str): Address of the FTP server
+                port (int): Port of the FTP server
+                user (str): User to log in as
+                password (str): Password of the user
+
+            Returns:
+                ftplib.FTP: The logged in session
+
+
+        acquire(host, port, user, password):
+            Take an idle session of the host, port, user and password from the pool, or connect a new one if there is none
+            that is still alive
+
+            Args:
+                host (str): Address of the FTP server
+                port (int): Port of the FTP server
+                user (str): User to log in as, "anonymous" for an anonymous login
+                password (str): Password of the user
+
+            Returns:
+                ftplib.FTP: A logged in session in the directory that it logged in to
+
+            Raises:
+                OSError: If the FTP server can not be connected to
+                ftplib.Error: If the login is refused
+
+
+        release(session, reset_directory):
+            Give a session back to the pool once a transfer is done with it, sessions that are dead are closed instead
+
+            Args:
+                session (ftplib.FTP): Session from acquire()
+                reset_directory (bool): True to change back to the directory that the session logged in to,
+                    False if the transfer did not change directory
+
+
+        discard(session):
+            Close a session that was acquired instead of giving it back, e.g. after a transfer failed half way
+
+            Args:
+                session (ftplib.FTP): Session from acquire()
+
+
+        forget(session):
+            Close a session and remove it from the pool without logging out, for sessions that are already dead
+
+            Args:
+                session (ftplib.FTP): A session of the pool
+
+
+        start_keepalive():
+            Start the thread that sends the keepalives, if it is not running yet
+
+
+        run_keepalive():
+            Send the keepalives every KEEPALIVE_INTERVAL seconds until the pool is closed
+
+
+        keepalive():
+            Send a NOOP on every idle session, closing the ones that do not answer
+
+
+        close_all():
+            Log out of every idle session and stop the keepalives
+    """
+
+    # Initializer
+    def __init__(self, timeout: float = 30.0) -> None:
+        """
+        Initialize an empty pool
+
+        Args:
+            timeout (float): Seconds that the connect and every command of a session may take
+        """
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # (host, port, user, password hash) -> [session, time.monotonic() it was given back] of every idle session
+        self.idle = {}
+        # Key and login directory of every session of the pool, idle or handed out
+        self.keys = {}
+        self.homes = {}
+        self.stats = Counter()
+        self.stopped = threading.Event()
+        self.keepalive_thread = None
+
+
+    # User-defined method
+    def connect(self, host: str, port: int, user: str, password: str) -> ftplib.FTP:
+        """
+        Connect and log in a new session
+
+        Args:
+            host (str): Address of the FTP server
+            port (int): Port of the FTP server
+            user (str): User to log in as
+            password (str): Password of the user
+
+        Returns:
+            ftplib.FTP: The logged in session
+        """
+        session = ftplib.FTP(timeout=self.timeout)
+        try:
+            session.connect(host, port)
+            session.login(user=user, passwd=password)
+            home = session.pwd()
+        except:
+            session.close()
+            raise
+        with self.lock:
+            self.keys[session] = session_key(host=host, port=port, user=user, password=password)
+            self.homes[session] = home
+            self.stats["created"] += 1
+        return session
+
+
+    # User-defined method
+    def acquire(self, host: str = "127.0.0.1", port: int = 2121, user: str = "anonymous", password: str = "") -> ftplib.FTP:
+        """
+        Take an idle session of the host, port, user and password from the pool, or connect a new one if there is none
+        that is still alive
+
+        Args:
+            host (str): Address of the FTP server
+            port (int): Port of the FTP server
+            user (str): User to log in as, "anonymous" for an anonymous login
+            password (str): Password of the user
+
+        Returns:
+            ftplib.FTP: A logged in session in the directory that it logged in to
+
+        Raises:
+            OSError: If the FTP server can not be connected to
+            ftplib.Error: If the login is refused
+        """
+        key = session_key(host=host, port=port, user=user, password=password)
+        while True:
+            with self.lock:
+                if len(self.idle.get(key, [])) == 0:
+                    break
+                session, released = self.idle[key].pop()
+
+            # The server may have closed a session that was idle for a while, so it is checked before it is used
+            if time.monotonic() - released > STALE_AFTER_SECONDS:
+                try:
+                    session.voidcmd("NOOP")
+                except CONNECTION_ERRORS:
+                    self.forget(session=session)
+                    with self.lock:
+                        self.stats["replaced"] += 1
+                    continue
+            with self.lock:
+                self.stats["reused"] += 1
+            return session
+
+        session = self.connect(host=host, port=port, user=user, password=password)
+        self.start_keepalive()
+        return session
+
+
+    # User-defined method
+    def release(self, session: ftplib.FTP, reset_directory: bool = True):
+        """
+        Give a session back to the pool once a transfer is done with it, sessions that are dead are closed instead
+
+        Args:
+            session (ftplib.FTP): Session from acquire()
+            reset_directory (bool): True to change back to the directory that the session logged in to,
+                False if the transfer did not change directory
+        """
+        if session not in self.keys or session.sock is None:
+            self.discard(session=session)
+            return
+        if reset_directory:
+            # Any error, e.g. a 550 for a login directory that was removed, leaves the session in an unknown directory
+            try:
+                session.cwd(self.homes[session])
+            except (*CONNECTION_ERRORS, ftplib.Error):
+                self.discard(session=session)
+                return
+
+        with self.lock:
+            idle = self.idle.setdefault(self.keys[session], [])
+            if len(idle) < MAX_IDLE_SESSIONS and not self.stopped.is_set():
+                idle.append([session, time.monotonic()])
+                return
+        self.discard(session=session)
+
+
+    # User-defined method
+    def discard(self, session: ftplib.FTP):
+        """
+        Close a session that was acquired instead of giving it back, e.g. after a transfer failed half way
+
+        Args:
+            session (ftplib.FTP): Session from acquire()
+        """
+        try:
+            session.quit()
+        except (*CONNECTION_ERRORS, ftplib.Error, AttributeError):
+            pass
+        self.forget(session=session)
+
+
+    # User-defined method
+    def forget(self, session: ftplib.FTP):
+        """
+        Close a session and remove it from the pool without logging out, for sessions that are already dead
+
+        Args:
+            session (ftplib.FTP): A session of the pool
+        """
+        session.close()
+        with self.lock:
+            self.keys.pop(session, None)
+            self.homes.pop(session, None)
+
+
+    # User-defined method
+    def start_keepalive(self):
+        """
+        Start the thread that sends the keepalives, if it is not running yet
+        """
+        with self.lock:
+            if self.keepalive_thread is not None or self.stopped.is_set():
+                return
+            # A daemon thread, so a pool that is never closed does not keep the program running
+            self.keepalive_thread = threading.Thread(target=self.run_keepalive, name="ftp-keepalive", daemon=True)
+            self.keepalive_thread.start()
+
+
+    # User-defined method
+    def run_keepalive(self):
+        """
+        Send the keepalives every KEEPALIVE_INTERVAL seconds until the pool is closed
+        """
+        while not self.stopped.wait(KEEPALIVE_INTERVAL):
+            self.keepalive()
+
+
+    # User-defined method
+    def keepalive(self):
+        """
+        Send a NOOP on every idle session, closing the ones that do not answer
+        """
+        with self.lock:
+            # The idle sessions are taken out while they are checked, so acquire() can not hand them out at the same time
+            checking = [(key, entry) for key, idle in self.idle.items() for entry in idle]
+            for idle in self.idle.values():
+                idle.clear()
+
+        alive = []
+        for key, (session, released) in checking:
+            try:
+                session.voidcmd("NOOP")
+                alive.append((key, [session, time.monotonic()]))
+            except (*CONNECTION_ERRORS, ftplib.Error):
+                # e.g. a 421 when the server closes the idle session
+                self.forget(session=session)
+
+        surplus = []
+        with self.lock:
+            self.stats["keepalives"] += len(alive)
+            for key, entry in alive:
+                # As in release(), the pool may have been closed or refilled by release() while the sessions were checked
+                idle = self.idle.setdefault(key, [])
+                if len(idle) < MAX_IDLE_SESSIONS and not self.stopped.is_set():
+                    idle.append(entry)
+                else:
+                    surplus.append(entry[0])
+        for session in surplus:
+            self.discard(session=session)
+
+
+    # User-defined method
+    def close_all(self):
+        """
+        Log out of every idle session and stop the keepalives
+        """
+        self.stopped.set()
+        with self.lock:
+            sessions = [session for idle in self.idle.values() for session, _ in idle]
+            self.idle.clear()
+        for session in sessions:
+            self.discard(session=session)
+
+
+# Pool shared by every CustomFTPClient, so the sessions outlive the client of a single transfer
+SESSION_POOL = FTPSessionPool()
+atexit.register(SESSION_POOL.close_all)
@@ -0,0 +1,860 @@
+"""
+FTP Transfer Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    ftp_transfer.py
+
+Purpose:
+    Batch transfers of many files over several FTP connections at the same time. The files are queued by size,
+    half of the connections take the largest file that is left and the other half the smallest, so the large files
+    are started early without the small files waiting behind them. Every connection is a session from the session pool.
+    A single large file can be downloaded in segments, every connection reads one byte range with REST and RETR
+    and writes it straight into the preallocated file at its offset
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    The files to upload, for an upload
+
+Output file(s):
+    The files that are downloaded, for a download or a segmented download
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/ftplib.html#ftplib.FTP.mlsd
+https://docs.python.org/3/library/glob.html#glob.glob
+https://docs.python.org/3/library/fnmatch.html#fnmatch.fnmatch
+https://en.wikipedia.org/wiki/Longest-processing-time-first_scheduling
+https://datatracker.ietf.org/doc/html/rfc3659#section-5
+https://datatracker.ietf.org/doc/html/draft-bryan-ftpext-hash-02
+https://docs.python.org/3/library/os.html#os.pwrite
+https://docs.python.org/3/library/socket.html#socket.socket.recv_into
+https://docs.python.org/3/library/tempfile.html#tempfile.mkstemp
+https://docs.python.org/3/library/os.html#os.replace
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - collections
+    - fnmatch
+    - ftplib
+    - glob
+    - hashlib
+    - os
+    - tempfile
+    - threading
+    - time
+    - types
+- custom module(s) from python scripts in the same directory
+    - ftp_pool
+
+Known issues:
+    Only the files of one directory are transferred, directories that match a pattern are skipped
+
+    A segmented download is only checked against a SHA-256 of the server if the server supports the HASH command,
+    otherwise it is checked that every byte was written and that the size and modification time of the file on the
+    server did not change while it was downloaded
+
+
+"""
+
+import fnmatch
+import ftplib
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import types
+from collections import deque
+from ftp_pool import CONNECTION_ERRORS, MAX_IDLE_SESSIONS
+
+
+# Bytes of every read and write of a transfer, larger than ftplib's 8 KiB so big files take fewer system calls
+TRANSFER_BLOCK_SIZE = 64 * 1024
+
+# FTP connections of a batch transfer, at most as many as the pool keeps idle so none are logged out afterwards
+DEFAULT_TRANSFER_WORKERS = 4
+MAX_TRANSFER_WORKERS = MAX_IDLE_SESSIONS
+
+# Smallest byte range of a segmented download, a smaller file is downloaded in fewer segments
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+# Times a segment is tried with a new session, from where it stopped, before the download fails
+SEGMENT_ATTEMPTS = 3
+
+
+# User-defined function
+def local_files(patterns: list) -> list:
+    """
+    Find the files of the current directory that match names or glob patterns
+
+    Args:
+        patterns (list): File names or glob patterns, e.g. ["*.txt", "data.json"]
+
+    Returns:
+        list: (name, size) of every file that matched, without duplicates
+    """
+    files = {}
+    for pattern in patterns:
+        for name in sorted(glob.glob(pattern)):
+            if os.path.isfile(name):
+                files[name] = os.path.getsize(name)
+    return list(files.items())
+
+
+# User-defined function
+def remote_files(session: ftplib.FTP, patterns: list) -> list:
+    """
+    Find the files of the session's directory on the FTP server that match names or glob patterns
+
+    Args:
+        session (ftplib.FTP): Logged in FTP session
+        patterns (list): File names or glob patterns, e.g. ["*.txt", "data.json"]
+
+    Returns:
+        list: (name, size) of every file that matched, without duplicates
+    """
+    try:
+        # One MLSD lists the names and sizes together
+        listing = [(name, int(facts.get("size", 0))) for name, facts in session.mlsd(facts=["type", "size"]) if facts.get("type") == "file"]
+    except ftplib.error_perm:
+        # Servers without MLSD, the size of every name is asked for with SIZE, which is only allowed in binary mode
+        session.voidcmd("TYPE I")
+        listing = []
+        for name in session.nlst():
+            try:
+                listing.append((name, session.size(name) or 0))
+            except ftplib.error_perm:
+                # SIZE is refused for directories
+                continue
+
+    files = {}
+    for pattern in patterns:
+        for name, size in listing:
+            if fnmatch.fnmatch(name, pattern):
+                files[name] = size
+    return list(files.items())
+
+
+# User-defined function
+def split_segments(size: int, segments: int) -> list:
+    """
+    Split a file into byte ranges of nearly equal size
+
+    Args:
+        size (int): Bytes of the file
+        segments (int): Number of byte ranges, fewer are returned if a range would be smaller than MIN_SEGMENT_SIZE
+
+    Returns:
+        list: (offset, length) of every byte range
+    """
+    segments = max(1, min(segments, size // MIN_SEGMENT_SIZE))
+    length, extra = divmod(size, segments)
+    ranges = []
+    offset = 0
+    for index in range(segments):
+        segment_length = length + (1 if index < extra else 0)
+        ranges.append((offset, segment_length))
+        offset += segment_length
+    return ranges
+
+
+class BatchTransfer:
+    """
+    A class for transferring many files over several FTP connections at the same time
+
+    Attributes:
+        stats (dict): Files and bytes that were transferred, seconds that it took, and the files that failed
+
+    Methods:
+        __init__(pool, direction, workers, directory, host, port, user, password, transfer_mode):
+            Initialize the batch transfer
+
+            Args:
+                pool (FTPSessionPool): Pool that the sessions are taken from
+                direction (str): "upload" or "download"
+                workers (int): Number of FTP connections that transfer at the same time
+                directory (str): Directory on the FTP server that the files are uploaded to or downloaded from
+                host (str): Address of the FTP server
+                port (int): Port of the FTP server
+                user (str): User to log in as
+                password (str): Password of the user
+                transfer_mode (function | None): Returns "ascii" or "binary" for a file to upload, binary if None
+
+
+        next_file(largest):
+            Take the next file from the queue
+
+            Args:
+                largest (bool): True to take the largest file that is left, False to take the smallest
+
+            Returns:
+                tuple[str, int] | None: (name, size) of the file, None if the queue is empty
+
+
+        upload(session, name):
+            Upload a file of the current directory to the session's directory
+
+            Args:
+                session (ftplib.FTP): Logged in FTP session
+                name (str): Name of the file
+
+            Returns:
+                OSError | None: Error of the local file if it could not be read, None if the file was uploaded
+
+
+        download(session, name):
+            Download a file of the session's directory to a temporary file of the current directory, which replaces
+            the file of the same name once the download is complete, the temporary file is removed if it fails
+
+            Args:
+                session (ftplib.FTP): Logged in FTP session
+                name (str): Name of the file
+
+            Returns:
+                OSError | None: Error of the local file if it could not be written, None if the file was downloaded
+
+
+        finish_aborted(session):
+            Read the reply of a transfer that was stopped because of a local file error, so that the session can be
+            used for the next file
+
+            Args:
+                session (ftplib.FTP): Logged in FTP session
+
+
+        open_session():
+            Take a session from the pool and change to the directory of the transfer
+
+            Returns:
+                ftplib.FTP: The session
+
+
+        worker(largest):
+            Transfer files from the queue until it is empty, with a session of its own
+
+            Args:
+                largest (bool): True to take the largest files first, False to take the smallest first
+
+
+        run(files):
+            Transfer the files and measure the aggregate throughput
+
+            Args:
+                files (list): (name, size) of every file
+
+            Returns:
+                dict: Files and bytes that were transferred, seconds that it took, and the files that failed
+    """
+
+    # Initializer
+    def __init__(self, pool, direction: str, workers: int, directory: str, host: str = "127.0.0.1", port: int = 2121,
+                 user: str = "anonymous", password: str = "", transfer_mode=None) -> None:
+        """
+        Initialize the batch transfer
+
+        Args:
+            pool (FTPSessionPool): Pool that the sessions are taken from
+            direction (str): "upload" or "download"
+            workers (int): Number of FTP connections that transfer at the same time
+            directory (str): Directory on the FTP server that the files are uploaded to or downloaded from
+            host (str): Address of the FTP server
+            port (int): Port of the FTP server
+            user (str): User to log in as
+            password (str): Password of the user
+            transfer_mode (function | None): Returns "ascii" or "binary" for a file to upload, binary if None
+        """
+        self.pool = pool
+        self.transfer = self.upload if direction == "upload" else self.download
+        self.workers = max(1, min(workers, MAX_TRANSFER_WORKERS))
+        self.directory = directory
+        self.login = {"host": host, "port": port, "user": user, "password": password}
+        self.transfer_mode = transfer_mode
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.stats = {"files": 0, "bytes": 0, "seconds": 0.0, "failed": []}
+
+
+    # User-defined method
+    def next_file(self, largest: bool) -> tuple[str, int] | None:
+        """
+        Take the next file from the queue
+
+        Args:
+            largest (bool): True to take the largest file that is left, False to take the smallest
+
+        Returns:
+            tuple[str, int] | None: (name, size) of the file, None if the queue is empty
+        """
+        with self.lock:
+            if len(self.queue) == 0:
+                return None
+            return self.queue.pop() if largest else self.queue.popleft()
+
+
+    # User-defined method
+    def upload(self, session: ftplib.FTP, name: str) -> OSError | None:
+        """
+        Upload a file of the current directory to the session's directory
+
+        Args:
+            session (ftplib.FTP): Logged in FTP session
+            name (str): Name of the file
+
+        Returns:
+            OSError | None: Error of the local file if it could not be read, None if the file was uploaded
+        """
+        try:
+            file = open(name, "rb")
+        except OSError as error:
+            return error
+
+        # Errors of reading the file are told apart from the errors of the connection, which are OSErrors as well
+        read_error = None
+        def read(size: int = -1) -> bytes:
+            nonlocal read_error
+            try:
+                return file.read(size)
+            except OSError as error:
+                read_error = error
+                raise
+        def readline(size: int = -1) -> bytes:
+            nonlocal read_error
+            try:
+                return file.readline(size)
+            except OSError as error:
+                read_error = error
+                raise
+
+        with file:
+            try:
+                if self.transfer_mode is not None and self.transfer_mode(file=name) == "ascii":
+                    session.storlines(f"STOR {name}", types.SimpleNamespace(readline=readline))
+                else:
+                    session.storbinary(f"STOR {name}", types.SimpleNamespace(read=read), blocksize=TRANSFER_BLOCK_SIZE)
+            except OSError:
+                if read_error is None:
+                    raise
+                self.finish_aborted(session=session)
+                return read_error
+        return None
+
+
+    # User-defined method
+    def download(self, session: ftplib.FTP, name: str) -> OSError | None:
+        """
+        Download a file of the session's directory to a temporary file of the current directory, which replaces
+        the file of the same name once the download is complete, the temporary file is removed if it fails
+
+        Args:
+            session (ftplib.FTP): Logged in FTP session
+            name (str): Name of the file
+
+        Returns:
+            OSError | None: Error of the local file if it could not be written, None if the file was downloaded
+        """
+        # A file of the same name is only replaced by a complete download, never removed by one that failed
+        try:
+            descriptor, part_name = tempfile.mkstemp(dir=".", prefix=f".{name}.", suffix=".part")
+        except OSError as error:
+            return error
+        file = os.fdopen(descriptor, "wb")
+
+        # Errors of writing the file are told apart from the errors of the connection, which are OSErrors as well
+        write_error = None
+        def write(data: bytes):
+            nonlocal write_error
+            try:
+                file.write(data)
+            except OSError as error:
+                write_error = error
+                raise
+
+        try:
+            try:
+                session.retrbinary(f"RETR {name}", write, blocksize=TRANSFER_BLOCK_SIZE)
+            except OSError:
+                if write_error is None:
+                    raise
+                self.finish_aborted(session=session)
+                return write_error
+            try:
+                file.close()
+                os.replace(part_name, name)
+            except OSError as error:
+                return error
+            return None
+        finally:
+            file.close()
+            try:
+                if os.path.exists(part_name):
+                    os.remove(part_name)
+            except OSError:
+                pass
+
+
+    # User-defined method
+    def finish_aborted(self, session: ftplib.FTP):
+        """
+        Read the reply of a transfer that was stopped because of a local file error, so that the session can be
+        used for the next file
+
+        Args:
+            session (ftplib.FTP): Logged in FTP session
+        """
+        # ftplib leaves the reply unread when the callback raises, the server replies 426 or 226 to the closed data connection
+        try:
+            session.voidresp()
+        except ftplib.Error:
+            pass
+
+
+    # User-defined method
+    def open_session(self) -> ftplib.FTP:
+        """
+        Take a session from the pool and change to the directory of the transfer
+
+        Returns:
+            ftplib.FTP: The session
+        """
+        session = self.pool.acquire(**self.login)
+        try:
+            session.cwd(self.directory)
+        except:
+            self.pool.discard(session=session)
+            raise
+        return session
+
+
+    # User-defined method
+    def worker(self, largest: bool):
+        """
+        Transfer files from the queue until it is empty, with a session of its own
+
+        Args:
+            largest (bool): True to take the largest files first, False to take the smallest first
+        """
+        session = None
+        while True:
+            entry = self.next_file(largest=largest)
+            if entry is None:
+                break
+            name, size = entry
+
+            # A file is tried again once with a new session if the connection was lost, e.g. the server timed it out
+            for attempt in range(2):
+                try:
+                    if session is None:
+                        session = self.open_session()
+                    local_error = self.transfer(session, name)
+                    with self.lock:
+                        if local_error is None:
+                            self.stats["files"] += 1
+                            self.stats["bytes"] += size
+                        else:
+                            # e.g. EACCES or a full disk, the session is still usable and trying again would not help
+                            self.stats["failed"].append(name)
+                    break
+                except CONNECTION_ERRORS:
+                    if session is not None:
+                        self.pool.forget(session=session)
+                        session = None
+                    if attempt == 1:
+                        with self.lock:
+                            self.stats["failed"].append(name)
+                except ftplib.Error:
+                    # A file that the server refused, the session can still be used for the next file
+                    with self.lock:
+                        self.stats["failed"].append(name)
+                    break
+
+        if session is not None:
+            self.pool.release(session=session)
+
+
+    # User-defined method
+    def run(self, files: list) -> dict:
+        """
+        Transfer the files and measure the aggregate throughput
+
+        Args:
+            files (list): (name, size) of every file
+
+        Returns:
+            dict: Files and bytes that were transferred, seconds that it took, and the files that failed
+        """
+        self.queue = deque(sorted(files, key=lambda entry: entry[1]))
+        workers = min(self.workers, len(files))
+        start = time.perf_counter()
+        # With one connection the small files go first, with more the first half take the largest files
+        threads = [threading.Thread(target=self.worker, kwargs={"largest": index < workers // 2}) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
+
+
+class SegmentedDownload:
+    """
+    A class for downloading a single file over several FTP connections at the same time, one byte range each
+
+    Every connection sends "REST <offset>" and "RETR" and reads its byte range with recv_into() into a buffer of its own,
+    which is written with os.pwrite() straight to the offset in a temporary file, preallocated to the size of the file
+
+    Attributes:
+        stats (dict): Bytes that were downloaded, seconds that it took, number of segments, segments that failed
+            and how the file was verified
+
+    Methods:
+        __init__(pool, name, segments, directory, host, port, user, password):
+            Initialize the segmented download
+
+            Args:
+                pool (FTPSessionPool): Pool that the sessions are taken from
+                name (str): Name of the file on the FTP server, it is downloaded to the current directory
+                segments (int): Number of byte ranges that are downloaded at the same time
+                directory (str): Directory on the FTP server that the file is in
+                host (str): Address of the FTP server
+                port (int): Port of the FTP server
+                user (str): User to log in as
+                password (str): Password of the user
+
+
+        open_session():
+            Take a session from the pool, change to the directory of the file and switch to binary mode
+
+            Returns:
+                ftplib.FTP: The session
+
+
+        remote_state(session):
+            Size and modification time of the file on the FTP server
+
+            Args:
+                session (ftplib.FTP): Session in the directory of the file, in binary mode
+
+            Returns:
+                tuple[int, str]: Size in bytes and the MDTM time, "" if the server does not support MDTM
+
+
+        download_segment(index, offset, length):
+            Download one byte range into the destination file, trying again from where it stopped if the connection is lost,
+            the segment fails without a retry if the destination file can not be written
+
+            Args:
+                index (int): Index of the segment
+                offset (int): Offset of the byte range
+                length (int): Bytes of the byte range
+
+
+        read_segment(session, descriptor, offset, length, progress):
+            Read the rest of a byte range from a RETR that starts where the last write stopped and write it to the destination file
+
+            Args:
+                session (ftplib.FTP): Session in the directory of the file, in binary mode
+                descriptor (int): File descriptor of the destination file
+                offset (int): Offset of the byte range
+                length (int): Bytes of the byte range
+                progress (dict): "done", bytes of the byte range that are written, advanced after every write
+
+            Returns:
+                OSError | None: Error of the destination file if it could not be written, None otherwise,
+                    "done" is less than length if the data connection was closed early
+
+
+        verify(before):
+            Check the downloaded file against the file on the FTP server, with a session of its own
+
+            Args:
+                before (tuple[int, str]): Size and modification time of the file on the server before the download
+
+            Returns:
+                str: How the file was verified, and if its content was not verified, why not
+
+            Raises:
+                ValueError: If the file is not the same as the file on the server
+
+
+        run():
+            Download the file to a temporary file and verify it, the temporary file replaces the file of the same name
+            once it is verified and is removed if it fails
+
+            Returns:
+                dict: Bytes that were downloaded, seconds that it took, number of segments, segments that failed
+                    and how the file was verified
+    """
+
+    # Initializer
+    def __init__(self, pool, name: str, segments: int, directory: str, host: str = "127.0.0.1", port: int = 2121,
+                 user: str = "anonymous", password: str = "") -> None:
+        """
+        Initialize the segmented download
+
+        Args:
+            pool (FTPSessionPool): Pool that the sessions are taken from
+            name (str): Name of the file on the FTP server, it is downloaded to the current directory
+            segments (int): Number of byte ranges that are downloaded at the same time
+            directory (str): Directory on the FTP server that the file is in
+            host (str): Address of the FTP server
+            port (int): Port of the FTP server
+            user (str): User to log in as
+            password (str): Password of the user
+        """
+        self.pool = pool
+        self.name = name
+        self.segments = max(1, min(segments, MAX_TRANSFER_WORKERS))
+        self.directory = directory
+        self.login = {"host": host, "port": port, "user": user, "password": password}
+        self.lock = threading.Lock()
+        self.stats = {"bytes": 0, "seconds": 0.0, "segments": 0, "failed": [], "verified": ""}
+        # Temporary file that the segments are written to, in the same directory so it can be renamed to the name
+        self.part_name = None
+
+
+    # User-defined method
+    def open_session(self) -> ftplib.FTP:
+        """
+        Take a session from the pool, change to the directory of the file and switch to binary mode
+
+        Returns:
+            ftplib.FTP: The session
+        """
+        session = self.pool.acquire(**self.login)
+        try:
+            session.cwd(self.directory)
+            # REST offsets are byte offsets only in binary mode
+            session.voidcmd("TYPE I")
+        except:
+            self.pool.discard(session=session)
+            raise
+        return session
+
+
+    # User-defined method
+    def remote_state(self, session: ftplib.FTP) -> tuple[int, str]:
+        """
+        Size and modification time of the file on the FTP server
+
+        Args:
+            session (ftplib.FTP): Session in the directory of the file, in binary mode
+
+        Returns:
+            tuple[int, str]: Size in bytes and the MDTM time, "" if the server does not support MDTM
+        """
+        size = session.size(self.name)
+        try:
+            modified = session.sendcmd(f"MDTM {self.name}").split()[-1]
+        except ftplib.error_perm:
+            modified = ""
+        return size, modified
+
+
+    # User-defined method
+    def download_segment(self, index: int, offset: int, length: int):
+        """
+        Download one byte range into the destination file, trying again from where it stopped if the connection is lost,
+        the segment fails without a retry if the destination file can not be written
+
+        Args:
+            index (int): Index of the segment
+            offset (int): Offset of the byte range
+            length (int): Bytes of the byte range
+        """
+        # Advanced by read_segment() after every write, so a retry starts after the bytes that were already written
+        progress = {"done": 0}
+        try:
+            # A descriptor of its own, so the segments do not share a file position where os.pwrite() is not available
+            descriptor = os.open(self.part_name, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            descriptor = None
+
+        try:
+            for attempt in range(SEGMENT_ATTEMPTS if descriptor is not None else 0):
+                session = None
+                try:
+                    session = self.open_session()
+                    write_error = self.read_segment(session=session, descriptor=descriptor, offset=offset, length=length, progress=progress)
+                except (*CONNECTION_ERRORS, ftplib.Error):
+                    if session is not None:
+                        self.pool.forget(session=session)
+                    continue
+                # The session is still good after an error of the local file, which another attempt would only run into again
+                self.pool.release(session=session)
+                if write_error is not None or progress["done"] == length:
+                    break
+        finally:
+            if descriptor is not None:
+                os.close(descriptor)
+
+        with self.lock:
+            self.stats["bytes"] += progress["done"]
+            if progress["done"] != length:
+                self.stats["failed"].append(index)
+
+
+    # User-defined method
+    def read_segment(self, session: ftplib.FTP, descriptor: int, offset: int, length: int, progress: dict) -> OSError | None:
+        """
+        Read the rest of a byte range from a RETR that starts where the last write stopped and write it to the destination file
+
+        Args:
+            session (ftplib.FTP): Session in the directory of the file, in binary mode
+            descriptor (int): File descriptor of the destination file
+            offset (int): Offset of the byte range
+            length (int): Bytes of the byte range
+            progress (dict): "done", bytes of the byte range that are written, advanced after every write
+
+        Returns:
+            OSError | None: Error of the destination file if it could not be written, None otherwise,
+                "done" is less than length if the data connection was closed early
+        """
+        buffer = bytearray(TRANSFER_BLOCK_SIZE)
+        view = memoryview(buffer)
+        start = offset + progress["done"]
+        # Errors of writing the file are told apart from the errors of the connection, which are OSErrors as well
+        write_error = None
+
+        with session.transfercmd(f"RETR {self.name}", rest=start) as connection:
+            if not hasattr(os, "pwrite"):
+                try:
+                    os.lseek(descriptor, start, os.SEEK_SET)
+                except OSError as error:
+                    write_error = error
+            while write_error is None and progress["done"] < length:
+                received = connection.recv_into(view[:min(len(buffer), length - progress["done"])])
+                if received == 0:
+                    break
+                written = 0
+                while written < received:
+                    try:
+                        if hasattr(os, "pwrite"):
+                            count = os.pwrite(descriptor, view[written:received], offset + progress["done"])
+                        else:
+                            count = os.write(descriptor, view[written:received])
+                    except OSError as error:
+                        # e.g. ENOSPC, the data connection is closed and the server stops the transfer
+                        write_error = error
+                        break
+                    written += count
+                    progress["done"] += count
+
+        # The server stops the transfer with 426 when a segment closes the data connection before the end of the file
+        try:
+            session.voidresp()
+        except ftplib.error_temp:
+            pass
+        return write_error
+
+
+    # User-defined method
+    def verify(self, before: tuple[int, str]) -> str:
+        """
+        Check the downloaded file against the file on the FTP server, with a session of its own
+
+        Args:
+            before (tuple[int, str]): Size and modification time of the file on the server before the download
+
+        Returns:
+            str: How the file was verified, and if its content was not verified, why not
+
+        Raises:
+            ValueError: If the file is not the same as the file on the server
+        """
+        size = os.path.getsize(self.part_name)
+        if size != before[0]:
+            raise ValueError(f"{self.name} is {size} bytes instead of {before[0]} bytes")
+
+        # A fresh session, as one that was idle for the whole download may have been timed out by the server
+        try:
+            session = self.open_session()
+        except (*CONNECTION_ERRORS, ftplib.Error):
+            return "size checked, the content was not verified as the FTP server could not be reached again"
+        try:
+            if self.remote_state(session=session) != before:
+                raise ValueError(f"{self.name} was changed on the FTP server while it was downloaded")
+
+            # HASH is an extension that only some servers support, it is listed by FEAT if it is
+            features = session.sendcmd("FEAT").splitlines()
+            if not any(feature.strip().upper().startswith("HASH") for feature in features[1:-1]):
+                self.pool.release(session=session)
+                return "size and modification time checked, the content was not verified as the FTP server does not support HASH"
+
+            session.sendcmd("OPTS HASH SHA-256")
+            remote_digest = session.sendcmd(f"HASH {self.name}").split()[3].lower()
+        except CONNECTION_ERRORS:
+            self.pool.forget(session=session)
+            return "size checked, the content was not verified as the connection to the FTP server was lost"
+        except:
+            self.pool.release(session=session)
+            raise
+        self.pool.release(session=session)
+
+        digest = hashlib.sha256()
+        with open(self.part_name, "rb") as file:
+            for block in iter(lambda: file.read(TRANSFER_BLOCK_SIZE), b""):
+                digest.update(block)
+        if digest.hexdigest() != remote_digest:
+            raise ValueError(f"SHA-256 of {self.name} is not the same as on the FTP server")
+        return "verified by SHA-256"
+
+
+    # User-defined method
+    def run(self) -> dict:
+        """
+        Download the file to a temporary file and verify it, the temporary file replaces the file of the same name
+        once it is verified and is removed if it fails
+
+        Returns:
+            dict: Bytes that were downloaded, seconds that it took, number of segments, segments that failed
+                and how the file was verified
+        """
+        # Given back before the segments start, so it is not left idle for the whole download
+        session = self.open_session()
+        try:
+            before = self.remote_state(session=session)
+        finally:
+            self.pool.release(session=session)
+
+        # A file of the same name is only replaced by a complete download, never truncated or removed by one that failed
+        descriptor, self.part_name = tempfile.mkstemp(dir=".", prefix=f".{self.name}.", suffix=".part")
+        try:
+            start = time.perf_counter()
+
+            # The whole file is allocated up front, so every segment writes in place and the file is not grown piece by piece
+            try:
+                if hasattr(os, "posix_fallocate") and before[0] > 0:
+                    os.posix_fallocate(descriptor, 0, before[0])
+                else:
+                    os.ftruncate(descriptor, before[0])
+            finally:
+                os.close(descriptor)
+
+            ranges = split_segments(size=before[0], segments=self.segments)
+            self.stats["segments"] = len(ranges)
+            threads = [threading.Thread(target=self.download_segment, args=(index, offset, length))
+                       for index, (offset, length) in enumerate(ranges) if length > 0]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.stats["seconds"] = time.perf_counter() - start
+
+            if len(self.stats["failed"]) > 0:
+                raise ValueError(f"{len(self.stats['failed'])} segment(s) of {self.name} could not be downloaded")
+            self.stats["verified"] = self.verify(before=before)
+            os.replace(self.part_name, self.name)
+        finally:
+            if os.path.exists(self.part_name):
+                os.remove(self.part_name)
+        return self.stats
@@ -0,0 +1,219 @@
+"""
+Import Benchmark Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    import_benchmark.py
+
+Purpose:
+    Measure the cold start import time of the menu with "python -X importtime" and fail if it regresses
+
+Usage syntax:
+    Run with command line in the directory where this script is located, e.g. python import_benchmark.py --budget-ms 50
+    Exits with status 1 if the menu imports a heavy module or takes longer than the budget/baseline to import
+
+Input file(s):
+    Optional baseline JSON file from an earlier run, e.g. --baseline import_baseline.json
+
+Output file(s):
+    Optional baseline JSON file, e.g. --save-baseline import_baseline.json
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/using/cmdline.html#cmdoption-X
+https://docs.python.org/3/library/subprocess.html#subprocess.run
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - argparse
+    - json
+    - re
+    - subprocess
+    - sys
+
+Known issues:
+    Nil
+
+
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+
+# Modules that must only be imported once their app is chosen from the menu
+HEAVY_MODULES = ("scapy", "nmap", "magic", "rich", "pyftpdlib")
+
+# App modules whose own import time is reported for information
+APP_MODULES = ("nmap_scanner", "ftp_client", "custom_packet")
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_REGEX = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+
+
+class ImportBenchmark:
+    """
+    A class for measuring the cold start import time of a module in fresh interpreters
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(runs):
+            Initialize the benchmark
+
+            Args:
+                runs (int): Number of fresh interpreters per module, the fastest run is kept
+
+
+        measure(module):
+            Import a module in fresh interpreters with "-X importtime"
+
+            Args:
+                module (str): Name of the module to import
+
+            Returns:
+                tuple[float | None, set]: Fastest cumulative import time in ms (None if the import failed)
+                                          and the top level packages that were imported
+
+
+        run(budget_ms, baseline, tolerance):
+            Measure the menu and the app modules, print a report and check for regressions
+
+            Args:
+                budget_ms (float): Largest allowed menu import time in ms
+                baseline (dict | None): Earlier results to compare with
+                tolerance (float): Allowed slowdown over the baseline, e.g. 0.25 for 25%
+
+            Returns:
+                tuple[bool, dict]: True if nothing regressed, and the results of this run
+    """
+
+    # Initializer
+    def __init__(self, runs: int = 5) -> None:
+        """
+        Initialize the benchmark
+
+        Args:
+            runs (int): Number of fresh interpreters per module, the fastest run is kept
+        """
+        self.runs = max(1, runs)
+
+
+    # User-defined method
+    def measure(self, module: str) -> tuple[float | None, set]:
+        """
+        Import a module in fresh interpreters with "-X importtime"
+
+        Args:
+            module (str): Name of the module to import
+
+        Returns:
+            tuple[float | None, set]: Fastest cumulative import time in ms (None if the import failed)
+                                      and the top level packages that were imported
+        """
+        fastest = None
+        imported = set()
+
+        for _ in range(self.runs):
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                return None, imported
+
+            for line in result.stderr.splitlines():
+                importtime_match = IMPORTTIME_REGEX.match(line)
+                if not importtime_match:
+                    continue
+                name = importtime_match.group(4)
+                imported.add(name.split(".")[0])
+                # The module itself is the only line without indentation that has its name
+                if name == module and importtime_match.group(3) == " ":
+                    cumulative_ms = int(importtime_match.group(2)) / 1000
+                    if fastest is None or cumulative_ms < fastest:
+                        fastest = cumulative_ms
+
+        return fastest, imported
+
+
+    # User-defined method
+    def run(self, budget_ms: float, baseline: dict | None = None, tolerance: float = 0.25) -> tuple[bool, dict]:
+        """
+        Measure the menu and the app modules, print a report and check for regressions
+
+        Args:
+            budget_ms (float): Largest allowed menu import time in ms
+            baseline (dict | None): Earlier results to compare with
+            tolerance (float): Allowed slowdown over the baseline, e.g. 0.25 for 25%
+
+        Returns:
+            tuple[bool, dict]: True if nothing regressed, and the results of this run
+        """
+        passed = True
+        results = {}
+
+        menu_ms, imported = self.measure(module="menu")
+        if menu_ms is None:
+            print("FAIL: menu could not be imported")
+            return False, results
+        results["menu"] = menu_ms
+        print(f"{'menu':<16}{menu_ms:>10.1f} ms")
+
+        heavy = sorted(set(HEAVY_MODULES) & imported)
+        if len(heavy) > 0:
+            print(f"FAIL: menu imports heavy module(s) before an app is chosen: {', '.join(heavy)}")
+            passed = False
+
+        if menu_ms > budget_ms:
+            print(f"FAIL: menu import took {menu_ms:.1f} ms, the budget is {budget_ms:.1f} ms")
+            passed = False
+
+        if baseline is not None and "menu" in baseline:
+            allowed = baseline["menu"] * (1 + tolerance)
+            if menu_ms > allowed:
+                print(f"FAIL: menu import took {menu_ms:.1f} ms, baseline {baseline['menu']:.1f} ms + {tolerance:.0%} is {allowed:.1f} ms")
+                passed = False
+
+        for module in APP_MODULES:
+            app_ms, _ = self.measure(module=module)
+            if app_ms is None:
+                print(f"{module:<16}{'not importable (missing dependency)':>36}")
+                continue
+            results[module] = app_ms
+            print(f"{module:<16}{app_ms:>10.1f} ms")
+
+        print("PASS" if passed else "Import time regressed")
+        return passed, results
+
+
+# Main program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cold start import time of the menu")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module, the fastest run is kept")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Largest allowed menu import time in ms")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over the baseline")
+    parser.add_argument("--save-baseline", default=None, help="Write the results of this run to a baseline JSON file")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    passed, results = ImportBenchmark(runs=args.runs).run(budget_ms=args.budget_ms, baseline=baseline, tolerance=args.tolerance)
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+    sys.exit(0 if passed else 1)
@@ -25,12 +25,13 @@ Python version:
     Python 3.10.9
 
 Reference:
-    Nil
+https://docs.python.org/3/library/importlib.html#importlib.import_module
 
 Library/Module:
 - modules used that are installed by default in Python 3.10.9
+    - importlib
     - os
-- custom module(s) from python scripts in the same directory
+- custom module(s) from python scripts in the same directory, imported when their menu option is chosen
     - nmap_scanner
     - ftp_client
     - custom_packet
@@ -41,10 +42,23 @@ Known issues:
 
 """
 
+import importlib
 import os
-import nmap_scanner
-import ftp_client
-import custom_packet
+
+
+# User-defined function
+def load_app(module_name: str):
+    """
+    Import an app's module when its menu option is chosen, so that scapy, python-nmap and libmagic
+    are not imported before the menu is shown
+
+    Args:
+        module_name (str): Name of the app's module, e.g. "nmap_scanner"
+
+    Returns:
+        module: The imported module, modules that are already imported are returned from the cache
+    """
+    return importlib.import_module(module_name)
 
 
 # User-defined function
@@ -66,6 +80,32 @@ def validate_option(user_option: str, first_option: int, last_option: int) -> in
     return False
 
 
+# User-defined function
+def connect_ftp_client(initial_path: str):
+    """
+    Create an FTP client in a home directory that the user specifies and connect it to the FTP server,
+    asking the user whether to try again every time the connection fails
+
+    Args:
+        initial_path (str): Directory that the menu script was executed in, changed back to if the user gives up
+
+    Returns:
+        CustomFTPClient | None: The connected client, None if the user chose not to try again
+    """
+    client = load_app(module_name="ftp_client").CustomFTPClient()
+    client.specify_home_directory()
+    while client.connection() == False:
+        reconnect = input("Connection to FTP server failed, try again? (Y/yes to try again, default is \"no\"): ")
+        if reconnect == "Y" or reconnect == "y" or reconnect == "Yes" or reconnect == "yes":
+            os.system("cls")
+        else:
+            input("Press \"enter\" to return to the Info Security Apps menu....")
+            os.chdir(initial_path)  # Revert working directory to where the menu script was executed
+            os.system("cls")
+            return None
+    return client
+
+
 # User-defined function
 def main_menu():
     """
@@ -91,7 +131,7 @@ def main_menu():
             case 1:
                 os.system("cls")
                 error_msg = ""
-                scanner = nmap_scanner.CustomNmapScanner()
+                scanner = load_app(module_name="nmap_scanner").CustomNmapScanner()
                 os.system("cls")
                 scanner.display_scan_output()
                 print()
@@ -104,52 +144,39 @@ def main_menu():
                 print("** FTP Menu **")
                 print("1) Upload file to FTP Server")
                 print("2) Download file from FTP Server")
-                print("3) Return to main menu\n")
+                print("3) Upload files to FTP Server in a batch")
+                print("4) Download files from FTP Server in a batch")
+                print("5) Download a large file from FTP Server in segments")
+                print("6) Return to main menu\n")
 
                 if error_msg != "":
                     print(error_msg)
 
                 ftp_opt = input("Choose an FTP option: ")
-                ftp_opt_result = validate_option(user_option=ftp_opt, first_option=1, last_option=4)
+                ftp_opt_result = validate_option(user_option=ftp_opt, first_option=1, last_option=6)
 
                 match ftp_opt_result:
                     case 1:
                         error_msg = ""
-                        client = ftp_client.CustomFTPClient()
-                        client.specify_home_directory()
-                        while True:
-                            if client.connection() == False:
-                                reconnect = input("Connection to FTP server failed, try again? (Y/yes to try again, default is \"no\"): ")
-                                if reconnect == "Y" or reconnect == "y" or reconnect == "Yes" or reconnect == "yes":
-                                    os.system("cls")
-                                    continue
-                                else:
-                                    input("Press \"enter\" to return to the Info Security Apps menu....")
-                                    os.chdir(initial_path)  # Revert working directory to where the menu script was executed
-                                    os.system("cls")
-                                    break
-                            else:
-                                client.upload_file()
-                                break
+                        client = connect_ftp_client(initial_path=initial_path)
+                        if client is not None:
+                            client.upload_file()
                     case 2:
                         error_msg = ""
-                        client = ftp_client.CustomFTPClient()
-                        client.specify_home_directory()
-                        while True:
-                            if client.connection() == False:
-                                reconnect = input("Connection to FTP server failed, try again? (Y/yes to try again, default is \"no\"): ")
-                                if reconnect == "Y" or reconnect == "y" or reconnect == "Yes" or reconnect == "yes":
-                                    os.system("cls")
-                                    continue
-                                else:
-                                    input("Press \"enter\" to return to the Info Security Apps menu....")
-                                    os.chdir(initial_path)  # Revert working directory to where the menu script was executed
-                                    os.system("cls")
-                                    break
-                            else:
-                                client.download_file()
-                                break
-                    case 3:
+                        client = connect_ftp_client(initial_path=initial_path)
+                        if client is not None:
+                            client.download_file()
+                    case 3 | 4:
+                        error_msg = ""
+                        client = connect_ftp_client(initial_path=initial_path)
+                        if client is not None:
+                            client.transfer_batch(direction="upload" if ftp_opt_result == 3 else "download")
+                    case 5:
+                        error_msg = ""
+                        client = connect_ftp_client(initial_path=initial_path)
+                        if client is not None:
+                            client.download_segmented()
+                    case 6:
                         os.system("cls")
                         pass
                     case False:
@@ -158,7 +185,7 @@ def main_menu():
             case 3:
                 os.system("cls")
                 error_msg = ""
-                packet_sender = custom_packet.CustomPacketSender()
+                packet_sender = load_app(module_name="custom_packet").CustomPacketSender()
                 packet_sender.custom_packet_menu()
             case 4:
                 break
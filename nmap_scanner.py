@@ -10,7 +10,18 @@ Script name:
     nmap_scanner.py
 
 Purpose:
-    Nmap scanner module script that allows the user to perform a selected port scan option on a network target
+    Nmap scanner module script that allows the user to perform a selected port scan option on a network target.
+    Multiple targets can be split into shards that are scanned by parallel nmap processes within a time budget,
+    with the results of every host added to a live table as soon as the host has been scanned.
+    Scan results are cached per host, so hosts that were scanned recently are not scanned again.
+    A delta scan only runs service and OS detection on the ports that changed since the last scan and lists the changes.
+    A sweep scan finds the open TCP ports with asyncio connects first and only runs service and OS detection on those.
+    Once a scan is done its results are kept in a compact column store instead of python-nmap's nested dicts.
+    A streaming scan parses nmap's XML output while nmap runs and adds every host to the store as soon as it is written.
+    Results can be exported row by row to JSON Lines or CSV, and large results are shown one page at a time.
+    Targets can be CIDR blocks and ranges with exclusions, which are kept as intervals instead of lists of addresses.
+    A full scan can be checkpointed to a journal, so an interrupted scan is resumed instead of started over.
+    An adaptive scan sets its parallelism, shard size and timing template from the round trip times and timeouts it sees
 
 Usage syntax:
     Nil, intended to be used as a custom module
@@ -19,7 +30,9 @@ Input file(s):
     Nil
 
 Output file(s):
-    Nil
+    SQLite database of the cached scan results, nmap_scan_cache.sqlite3
+    JSON Lines (.jsonl) or CSV (.csv) file of the scan results, if one is entered
+    Journal of the host results of a full scan, if one is entered
 
 Python version:
     Python 3.10.9
@@ -32,27 +45,200 @@ https://rich.readthedocs.io/en/stable/appendix/box.html#appendix-box
 https://rich.readthedocs.io/en/stable/live.html
 https://nmap.org/book/man-misc-options.html
 https://pypi.org/project/python-nmap/
+https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+https://docs.python.org/3/library/xml.etree.elementtree.html#pull-api-for-non-blocking-parsing
+https://nmap.org/book/performance-timing-templates.html
 
 Library/Module:
 - modules used that are installed by default in Python 3.10.9
+    - collections
+    - concurrent.futures
     - os
     - re
+    - threading
+    - time
 - required external modules installed using pip: pip install <module name>  # e.g. pip install rich
     - python-nmap
     - rich
+- custom module(s) from python scripts in the same directory
+    - scan_cache
+    - scan_delta
+    - scan_sweep
+    - scan_store
+    - scan_stream
+    - scan_export
+    - scan_targets
+    - scan_journal
+    - scan_control
 
 Known issues:
-    Nil
+    A shard that is still running when the time budget runs out is stopped, and its hosts are reported as not scanned
 
 
 """
 
 import os
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import nmap
 from rich import box
 from rich.table import Table
 from rich.console import Console
+from rich.live import Live
+from scan_cache import ScanCache, DEFAULT_CACHE_TTL, LOOKUP_CHUNK_SIZE
+from scan_delta import changed_ports, port_spec, merge_host_result, diff_host_results
+from scan_sweep import ConnectSweeper, SWEEP_PORTS
+from scan_store import ScanStore
+from scan_stream import NmapStream
+from scan_export import export_rows, PagedViewer, EXPORT_FORMATS, DEFAULT_PAGE_ROWS
+from scan_targets import TargetSet, target_arguments, join_targets
+from scan_journal import ScanJournal
+from scan_control import AdaptiveController, TIMING_TEMPLATES
+
+
+# Aggressive scan option "-A" includes OS and version detection along with script scanning and traceroute
+SCAN_OPTIONS = "-sTU -T5 -A --top-ports 10 --reason -vv -Pn"
+
+# Delta scans check the same ports with a light service fingerprint instead of "-A" first, then run "-A" only on the
+# ports that opened or whose service changed with "-p"
+DELTA_CHECK_OPTIONS = "-sTU -T5 -sV --version-light --top-ports 10 --reason -Pn"
+DELTA_DETAIL_OPTIONS = "-sTU -T5 -A --reason -vv -Pn"
+
+# Sweep scans run "-A" with "-p" on only the TCP ports that the connect sweep found open
+SWEEP_DETAIL_OPTIONS = "-sT -T5 -A --reason -vv -Pn"
+
+# Adaptive scans pick the timing template of every shard instead of always using "-T5"
+ADAPTIVE_OPTIONS = "-sTU -A --top-ports 10 --reason -vv -Pn"
+
+# nmap processes mostly wait on the network, so there can be more of them than CPUs
+MAX_SCAN_WORKERS = 64
+
+# Shards per worker, smaller shards keep every worker busy when some hosts are much slower than others
+SHARDS_PER_WORKER = 4
+
+# Hosts per shard of a live scan, small so that rows show up soon, but not an nmap process per host of a large scan.
+# The shards do not depend on the number of workers, so a journal can be resumed with a different number of workers
+LIVE_SHARD_HOSTS = 4
+
+
+# User-defined function
+def shard_hosts(hosts: list, shard_count: int) -> list:
+    """
+    Split the hosts into contiguous shards of nearly equal size
+
+    Args:
+        hosts (list): Hostnames or IPv4 addresses to split
+        shard_count (int): Number of shards, fewer are returned if there are fewer hosts
+
+    Returns:
+        list: The shards, each a list of hosts
+    """
+    shard_count = max(1, min(shard_count, len(hosts)))
+    shard_size, extra = divmod(len(hosts), shard_count)
+    shards = []
+    start = 0
+    for shard_id in range(shard_count):
+        end = start + shard_size + (1 if shard_id < extra else 0)
+        shards.append(hosts[start:end])
+        start = end
+    return shards
+
+
+# User-defined function
+def run_nmap(hosts: list, options: str, deadline: float | None = None) -> dict:
+    """
+    Scan a shard of hosts with its own nmap process
+
+    Args:
+        hosts (list | TargetSet): Hostnames or IPv4 addresses to scan
+        options (str): nmap options
+        deadline (float | None): time.monotonic() time that the scan is stopped at, None for no limit
+
+    Returns:
+        dict: The python-nmap scan result of the shard
+
+    Raises:
+        nmap.PortScannerTimeout: If the deadline is reached before the scan finishes
+    """
+    timeout = 0
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise nmap.PortScannerTimeout("Time budget used up before the shard was started")
+
+    # A PortScanner is not thread safe, so every shard has its own
+    scanner = nmap.PortScanner()
+    return scanner.scan(hosts=" ".join(target_arguments(hosts=hosts)), arguments=options, timeout=timeout)
+
+
+# User-defined function
+def merge_scan_results(results: list, command_line: str, elapsed: float) -> dict:
+    """
+    Merge the python-nmap scan results of several shards into one scan result
+
+    Args:
+        results (list): Scan results of the shards
+        command_line (str): nmap command line to report for the merged scan
+        elapsed (float): Wall clock seconds of the whole scan
+
+    Returns:
+        dict: The merged scan result, in the same form as a single python-nmap scan result
+    """
+    merged = {
+        "nmap": {
+            "command_line": command_line,
+            "scaninfo": {},
+            "scanstats": {"timestr": time.ctime(), "elapsed": f"{elapsed:.2f}", "uphosts": "0", "downhosts": "0", "totalhosts": "0"},
+        },
+        "scan": {},
+    }
+    scanstats = merged["nmap"]["scanstats"]
+    for result in results:
+        merged["nmap"]["scaninfo"] = merged["nmap"]["scaninfo"] or result["nmap"].get("scaninfo", {})
+        for stat in ("uphosts", "downhosts", "totalhosts"):
+            scanstats[stat] = str(int(scanstats[stat]) + int(result["nmap"].get("scanstats", {}).get(stat, 0)))
+        merged["scan"].update(result["scan"])
+    return merged
+
+
+# User-defined function
+def up_targets(result: dict) -> dict:
+    """
+    Key the hosts that are up in a scan result by their address and by the hostname that they were given as
+
+    Args:
+        result (dict): python-nmap scan result
+
+    Returns:
+        dict: (address, host result) of every address and hostname target that is up, targets that were down are left out
+    """
+    by_target = {}
+    for address, host_result in result["scan"].items():
+        by_target[address] = (address, host_result)
+        # nmap lists a hostname target as a hostname of type "user"
+        for hostname in host_result.get("hostnames", []):
+            if hostname.get("type") == "user":
+                by_target[hostname["name"]] = (address, host_result)
+    return by_target
+
+
+# User-defined function
+def match_targets(targets: list, result: dict) -> dict:
+    """
+    Find the result of every target in a scan result, which is keyed by address instead of the target as it was given
+
+    Args:
+        targets (list): Hostnames or IPv4 addresses as they were given to nmap
+        result (dict): python-nmap scan result
+
+    Returns:
+        dict: (address, host result) of every target, both None if the target was down
+    """
+    by_target = up_targets(result=result)
+    return {target: by_target.get(target, (None, None)) for target in targets}
 
 
 class CustomNmapScanner():
@@ -66,6 +252,10 @@ class CustomNmapScanner():
         __init__():
             Initialize and get all the required variables such as the scan results
 
+
+        reset_results():
+            Initialize the scan results and stats, without asking for a scan, so that a scanner can be reused
+
         
         perform_scan():
             Execute an nmap scan
@@ -73,19 +263,179 @@ class CustomNmapScanner():
             Args:
                 ip (str): IP address(es) or hostnames to scan
 
+
+        perform_parallel_scan(hosts, workers, budget, shard_count, on_shard, options, journal_file):
+            Shard the hosts and scan the shards with parallel nmap processes, merging the results into one scan result
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+                shard_count (int | None): Number of shards, defaults to SHARDS_PER_WORKER per worker
+                options (str): nmap options, SCAN_OPTIONS by default
+                on_shard (Callable | None): Called with (shard, scan result) as soon as a shard is done, the result is None if it was not scanned
+                journal_file (str | None): Journal that every shard result is appended to, the shards in it are not scanned again
+
+
+        perform_live_scan(hosts, workers, budget, journal_file):
+            Scan every host as its own shard and add its rows to a live table as soon as it has been scanned
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+                journal_file (str | None): Journal that every shard result is appended to, the shards in it are not scanned again
+
+
+        perform_cached_scan(hosts, workers, budget, cache_ttl, journal_file):
+            Answer the hosts that have a fresh cached result from the scan cache and only scan the rest
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+                cache_ttl (float): Seconds that a cached result is used for, 0 to force a refresh of every host
+                journal_file (str | None): Journal to checkpoint the scan of the hosts that are not cached to, None for no journal
+
+
+        run_scan_groups(groups, workers, deadline):
+            Scan groups of hosts that each need their own nmap options, with parallel nmap processes
+
+            Args:
+                groups (dict): Hosts to scan with every set of nmap options, e.g. options with a "-p" port list
+                workers (int): Number of nmap processes that run at the same time
+                deadline (float | None): time.monotonic() time that the scans are stopped at, None for no limit
+
+            Returns:
+                tuple[dict, list]: Host result of every host that was scanned, None if it was down,
+                                   and the python-nmap scan result of every group
+
+
+        perform_delta_scan(hosts, workers, budget):
+            Check the ports of every host without "-A" and only run "-A" on the ports that changed since its last scan
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+
+
+        perform_sweep_scan(hosts, workers, budget):
+            Sweep the hosts with asyncio TCP connects and only run "-A" on the hosts and ports that were found open
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the nmap stage may take, None for no limit
+
+
+        perform_stream_scan(hosts, workers, budget):
+            Scan the shards with parallel nmap processes whose XML output is parsed while they run
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Number of nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+
+
+        perform_adaptive_scan(hosts, workers, budget):
+            Scan shards whose number in parallel, size and timing template are adapted to the round trip times and timeouts that are seen
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses to scan
+                workers (int): Most nmap processes that run at the same time
+                budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+
+
+        compact_results():
+            Move the host results of the scan into a compact column store and release python-nmap's nested dicts
+
+
+        validate_workers(number):
+            Check if the number of parallel nmap processes is blank or within 1 and MAX_SCAN_WORKERS
+
+            Args:
+                number (str): The number to validate
+
+            Returns:
+                bool: True if it is a valid number of nmap processes, otherwise False
+
+
+        validate_budget(seconds):
+            Check if the time budget is blank or a positive number of seconds
+
+            Args:
+                seconds (str): The time budget to validate
+
+            Returns:
+                bool: True if it is a valid time budget, otherwise False
+
+
+        validate_cache_ttl(seconds):
+            Check if the cache TTL is blank or a whole number of seconds
+
+            Args:
+                seconds (str): The cache TTL to validate
+
+            Returns:
+                bool: True if it is a valid cache TTL, otherwise False
+
+
+
+        validate_journal_file(filename):
+            Check if the journal file is blank or a file in a folder that exists
+
+            Args:
+                filename (str): The journal file to validate
+
+            Returns:
+                bool: True if it is a valid journal file, otherwise False
+
+
+        validate_export_file(filename):
+            Check if the export file is blank or a .jsonl or .csv file in a folder that exists
+
+            Args:
+                filename (str): The export file to validate
+
+            Returns:
+                bool: True if it is a valid export file, otherwise False
+
         
         validate_host(hosts)
-            Use regex to validate host(s) that is entered
+            Validate the target(s) that are entered, hostnames and IPv4 addresses, CIDR blocks and ranges,
+            and the same prefixed by "!" to exclude them
 
             Args:
-                host (list): list of hostnames or ipv4 addresses to validate
+                host (list): list of targets to validate
+
+            Returns:
+                bool: If a target is invalid or nothing is left to scan return False, else return True
+
+
+        create_table():
+            Create the rich table with a column for every component of the nmap scan result
 
             Returns:
-                bool: If a hostname or ipv4 address is invalid return False, else return True
+                Table: The empty rich table
+
+
+        add_host_rows(table, host, host_result):
+            Add a row to the rich table for every port of a scanned host
+
+            Args:
+                table (Table): The rich table
+                host (str): Address of the host
+                host_result (nmap.PortScannerHostDict): Scan result of the host
+
+
+        display_delta_output():
+            Display what changed since the last scan of every host of a delta scan in a table
 
 
         display_scan_output():
-            Display type of nmap scan, the host(s) scanned, type of scan results, and scan results in a table
+            Display type of nmap scan, the host(s) scanned, type of scan results, and scan results in a table,
+            a page at a time if there are more rows than fit a page
     """
 
     # Initializer
@@ -93,22 +443,107 @@ class CustomNmapScanner():
         """
         Initialize and get all the required variables such as the scan results
         """
-        self.nmScan = nmap.PortScanner()
-        self.hosts = input("Targets to scan (space separated for multiple hosts): ")
-        self.host_ls = self.hosts.split()
-        self.validation_flag = self.validate_host(hosts=self.host_ls)
-
-        while True:
-            if self.validation_flag:
-                print("Scanning.....")
-                self.perform_scan(ip=self.hosts)
-                break
+        self.reset_results()
+        targets_prompt = "Targets to scan (hostnames, IPv4 addresses, CIDR blocks or ranges, !target to exclude, space separated): "
+        self.hosts = input(targets_prompt)
+        self.validation_flag = self.validate_host(hosts=self.hosts.split())
 
+        while self.validation_flag == False:
             os.system("cls")
-            print("Please enter valid hostnames or IPv4 addresses that are separated by a space")
-            self.hosts = self.get_hosts()
-            self.host_ls = self.hosts.split()
-            self.validation_flag = self.validate_host(hosts=self.host_ls)
+            print("Please enter valid hostnames, IPv4 addresses, CIDR blocks (10.0.0.0/24) or ranges (10.0.0.1-50) that are separated by a space")
+            self.hosts = input(targets_prompt)
+            self.validation_flag = self.validate_host(hosts=self.hosts.split())
+
+        # Addresses are kept as intervals and only turned into strings when they are scanned
+        self.host_ls = TargetSet.parse(tokens=self.hosts.split())
+        print(f"{len(self.host_ls)} target(s)")
+
+        # Validate scan_mode, no type casting
+        scan_mode_prompt = ("Scan mode (F) full, (D) delta against the last scan, (S) TCP connect sweep first, "
+                            "(L) low memory streaming, (A) adaptive timing (F/D/S/L/A, optional, full if left blank): ")
+        scan_mode = input(scan_mode_prompt)
+        while scan_mode not in ("", "F", "D", "S", "L", "A"):
+            print("Please enter F for a full scan, D for a delta scan, S for a sweep scan, L for a streaming scan or A for an adaptive scan")
+            scan_mode = input(scan_mode_prompt)
+        self.scan_mode = scan_mode or "F"
+
+        # Validate and cast workers to int type
+        workers_prompt = f"No of parallel nmap processes (1-{MAX_SCAN_WORKERS}, optional, 1 if left blank): "
+        workers = input(workers_prompt)
+        while self.validate_workers(number=workers) == False:
+            print(f"Please enter a number of nmap processes in the range of 1-{MAX_SCAN_WORKERS}")
+            workers = input(workers_prompt)
+        self.workers = int(workers) if workers != "" else 1
+
+        # Validate and cast budget to float type
+        budget_prompt = "Time budget of the scan in seconds (optional, no limit if left blank): "
+        budget = input(budget_prompt)
+        while self.validate_budget(seconds=budget) == False:
+            print("Please enter the time budget as a number of seconds")
+            budget = input(budget_prompt)
+        self.budget = float(budget) if budget != "" else None
+
+        # Validate export_file, no type casting
+        export_prompt = f"Export the results to a file ({'/'.join(EXPORT_FORMATS)}, optional, no export if left blank): "
+        export_file = input(export_prompt)
+        while self.validate_export_file(filename=export_file) == False:
+            print(f"Please enter a {' or '.join(EXPORT_FORMATS)} file in a folder that exists")
+            export_file = input(export_prompt)
+        self.export_file = export_file
+
+        if self.scan_mode == "D":
+            print("Scanning.....")
+            self.perform_delta_scan(hosts=self.host_ls, workers=self.workers, budget=self.budget)
+        elif self.scan_mode == "S":
+            print("Scanning.....")
+            self.perform_sweep_scan(hosts=self.host_ls, workers=self.workers, budget=self.budget)
+        elif self.scan_mode == "L":
+            print("Scanning.....")
+            self.perform_stream_scan(hosts=self.host_ls, workers=self.workers, budget=self.budget)
+        elif self.scan_mode == "A":
+            print("Scanning.....")
+            self.perform_adaptive_scan(hosts=self.host_ls, workers=self.workers, budget=self.budget)
+        else:
+            # Validate and cast cache_ttl to int type
+            cache_ttl_prompt = f"Use cached results up to this many seconds old (optional, {DEFAULT_CACHE_TTL} if left blank, 0 to refresh): "
+            cache_ttl = input(cache_ttl_prompt)
+            while self.validate_cache_ttl(seconds=cache_ttl) == False:
+                print("Please enter the age of cached results as a whole number of seconds")
+                cache_ttl = input(cache_ttl_prompt)
+            self.cache_ttl = int(cache_ttl) if cache_ttl != "" else DEFAULT_CACHE_TTL
+
+            # Validate journal_file, no type casting
+            journal_prompt = "Journal file to checkpoint the scan to, an unfinished scan of the same targets is resumed (optional, no journal if left blank): "
+            journal_file = input(journal_prompt)
+            while self.validate_journal_file(filename=journal_file) == False:
+                print("Please enter a journal file in a folder that exists")
+                journal_file = input(journal_prompt)
+            self.journal_file = journal_file or None
+
+            print("Scanning.....")
+            self.perform_cached_scan(hosts=self.host_ls, workers=self.workers, budget=self.budget, cache_ttl=self.cache_ttl, journal_file=self.journal_file)
+
+        self.compact_results()
+        if self.export_file != "":
+            self.export_count = export_rows(rows=self.store.rows(), filename=self.export_file)
+
+
+    # User-defined method
+    def reset_results(self):
+        """
+        Initialize the scan results and stats, without asking for a scan, so that a scanner can be reused
+        """
+        self.nmScan = nmap.PortScanner()
+        self.unscanned_hosts = set()
+        self.cache_stats = None
+        self.delta = None
+        self.sweep_stats = None
+        self.adaptive_stats = None
+        self.store = None
+        self.export_count = 0
+        self.export_file = ""
+        self.journal_file = None
+        self.resumed_shards = 0
 
 
     # User-defined method
@@ -119,41 +554,529 @@ class CustomNmapScanner():
         Args:
             ip (str): IP address(es) or hostnames to scan
         """
-        # Aggressive scan option "-A" includes OS and version detection along with script scanning and traceroute
-        options = "-sTU -T5 -A --top-ports 10 --reason -vv -Pn"  
-        self.nmScan.scan(hosts=ip, arguments=options)
+        self.nmScan.scan(hosts=ip, arguments=SCAN_OPTIONS)
 
 
     # User-defined method
-    def validate_host(self, hosts: list) -> bool:
+    def perform_parallel_scan(self, hosts: list, workers: int, budget: float | None = None,
+                shard_count: int | None = None, on_shard=None, options: str = SCAN_OPTIONS, journal_file: str | None = None):
+        """
+        Shard the hosts and scan the shards with parallel nmap processes, merging the results into one scan result
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+            shard_count (int | None): Number of shards, defaults to SHARDS_PER_WORKER per worker
+            options (str): nmap options, SCAN_OPTIONS by default
+            on_shard (Callable | None): Called with (shard, scan result) as soon as a shard is done, the result is None if it was not scanned
+            journal_file (str | None): Journal that every shard result is appended to, the shards in it are not scanned again
+        """
+        start = time.monotonic()
+        deadline = None if budget is None else start + budget
+        shards = shard_hosts(hosts=hosts, shard_count=shard_count or workers * SHARDS_PER_WORKER)
+
+        results = {}
+        self.unscanned_hosts = set()
+        journal = None
+        if journal_file is not None:
+            journal = ScanJournal(filename=journal_file, job={"targets": target_arguments(hosts=hosts), "options": options, "shards": len(shards)})
+            self.resumed_shards = journal.resumed
+            for index, result in journal.completed.items():
+                results[index] = result
+                if on_shard is not None:
+                    on_shard(shards[index], result)
+
+        try:
+            # Every nmap process is a subprocess, so threads are enough to run them in parallel
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run_nmap, shard, options, deadline): index for index, shard in enumerate(shards) if index not in results}
+                try:
+                    for future in as_completed(futures):
+                        index = futures[future]
+                        try:
+                            result = future.result()
+                            results[index] = result
+                            if journal is not None:
+                                journal.record(index=index, result=result)
+                        except (nmap.PortScannerError, nmap.PortScannerTimeout):
+                            result = None
+                            self.unscanned_hosts.update(shards[index])
+                        # Called from this thread, so the callback does not need to be thread safe
+                        if on_shard is not None:
+                            on_shard(shards[index], result)
+                except KeyboardInterrupt:
+                    # Ctrl+C also stops the running nmap processes, the shards that have not started are cancelled
+                    # instead of being run one after another, and the journal keeps the shards that are done
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            if journal is not None:
+                journal.close()
+
+        # Merged in shard order, so the result is the same however the shards finished or were resumed
+        command_line = f"nmap -oX - {options} ({len(shards)} shards over {workers} processes)"
+        self.nmScan._scan_result = merge_scan_results(results=[results[index] for index in sorted(results)],
+                                                      command_line=command_line, elapsed=time.monotonic() - start)
+
+
+    # User-defined method
+    def perform_live_scan(self, hosts: list, workers: int, budget: float | None = None, journal_file: str | None = None):
+        """
+        Scan the hosts in small shards and add their rows to a live table as soon as a shard has been scanned.
+        The first rows show up when the fastest shard is done instead of when the whole scan is done
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+            journal_file (str | None): Journal that every shard result is appended to, the shards in it are not scanned again
         """
-        Use regex to validate host(s) that is entered
+        table = self.create_table()
+        table.caption = f"0/{len(hosts)} host(s) scanned"
+        scanned = 0
+
+        def on_shard(shard: list, result: dict | None):
+            nonlocal scanned
+            scanned += len(shard)
+            if result is not None:
+                for host, host_result in result["scan"].items():
+                    self.add_host_rows(table=table, host=host, host_result=host_result)
+            table.caption = f"{scanned}/{len(hosts)} host(s) scanned"
+
+        # Rows that no longer fit the terminal scroll past instead of being cropped
+        with Live(table, console=Console(), refresh_per_second=4, vertical_overflow="visible"):
+            self.perform_parallel_scan(hosts=hosts, workers=workers, budget=budget, shard_count=-(-len(hosts) // LIVE_SHARD_HOSTS),
+                                       on_shard=on_shard, journal_file=journal_file)
+
+
+    # User-defined method
+    def perform_cached_scan(self, hosts: list, workers: int, budget: float | None, cache_ttl: float, journal_file: str | None = None):
+        """
+        Answer the hosts that have a fresh cached result from the scan cache and only scan the rest
 
         Args:
-            host (list): list of hostnames or ipv4 addresses to validate
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+            cache_ttl (float): Seconds that a cached result is used for, 0 to force a refresh of every host
+            journal_file (str | None): Journal to checkpoint the scan of the hosts that are not cached to, None for no journal
+        """
+        start = time.monotonic()
+        with ScanCache(ttl=cache_ttl) as cache:
+            cached = {"nmap": {"scanstats": {"uphosts": 0, "downhosts": 0, "totalhosts": 0}}, "scan": {}}
+            # The hosts are looked up one chunk per query, a chunk without a cached host is kept as the slice it is,
+            # so the missing hosts of a TargetSet stay intervals instead of a list of every address
+            missing_parts = []
+            for chunk_start in range(0, len(hosts), LOOKUP_CHUNK_SIZE):
+                chunk = hosts[chunk_start:chunk_start + LOOKUP_CHUNK_SIZE]
+                entries = cache.get_many(hosts=chunk, arguments=SCAN_OPTIONS) if cache_ttl > 0 else {}
+                if len(entries) == 0:
+                    missing_parts.append(chunk)
+                    continue
+                missing_parts.append([host for host in chunk if host not in entries])
+                for entry in entries.values():
+                    cached["nmap"]["scanstats"]["totalhosts"] += 1
+                    if entry["result"] is None:
+                        cached["nmap"]["scanstats"]["downhosts"] += 1
+                    else:
+                        cached["nmap"]["scanstats"]["uphosts"] += 1
+                        cached["scan"][entry["address"]] = nmap.PortScannerHostDict(entry["result"])
+            missing = join_targets(parts=missing_parts)
+
+            results = [cached]
+            command_line = f"nmap -oX - {SCAN_OPTIONS} (every host from the cache)"
+            if len(missing) > 0:
+                # Also with one worker, so that rows show up as shards finish instead of after one blocking nmap process
+                self.perform_live_scan(hosts=missing, workers=workers, budget=budget, journal_file=journal_file)
+                results.insert(0, self.nmScan._scan_result)
+                command_line = self.nmScan._scan_result["nmap"]["command_line"]
+
+                # Only the hosts that are up are cached, a host that is down or ran out of time budget is not in the cache
+                # and is scanned again next time, so the missing hosts never have to be listed one by one
+                cache.put_many(entries=up_targets(result=self.nmScan._scan_result), arguments=SCAN_OPTIONS)
+            self.cache_stats = cache.stats()
+
+        self.nmScan._scan_result = merge_scan_results(results=results, command_line=command_line, elapsed=time.monotonic() - start)
+
+
+    # User-defined method
+    def run_scan_groups(self, groups: dict, workers: int, deadline: float | None = None) -> tuple[dict, list]:
+        """
+        Scan groups of hosts that each need their own nmap options, with parallel nmap processes
+
+        Args:
+            groups (dict): Hosts to scan with every set of nmap options, e.g. options with a "-p" port list
+            workers (int): Number of nmap processes that run at the same time
+            deadline (float | None): time.monotonic() time that the scans are stopped at, None for no limit
 
         Returns:
-            bool: If a hostname or ipv4 address is invalid return False, else return True
+            tuple[dict, list]: Host result of every host that was scanned, None if it was down,
+                               and the python-nmap scan result of every group
         """
-        numbers_only_pattern = r"^\d+$"
-        hostname_pattern = r"^(([a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9\-]*[a-zA-Z0-9])\.)*([A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9\-]*[A-Za-z0-9])$"
-        ipv4_addr_pattern = r"^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$" 
+        host_results = {}
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_nmap, group, options, deadline): group for options, group in groups.items()}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except (nmap.PortScannerError, nmap.PortScannerTimeout):
+                    continue
+                results.append(result)
+                for host, (address, host_result) in match_targets(targets=futures[future], result=result).items():
+                    host_results[host] = host_result
+        return host_results, results
 
-        if len(hosts) < 1:
-            return False
 
-        for host in hosts:
-            if re.match(pattern=numbers_only_pattern, string=host):
-                return False
-            elif re.match(pattern=hostname_pattern, string=host) == False and re.match(pattern=ipv4_addr_pattern, string=host) == False:
-                return False
-        return True 
+    # User-defined method
+    def perform_delta_scan(self, hosts: list, workers: int, budget: float | None = None):
+        """
+        Check the ports of every host with a light service fingerprint instead of "-A" and only run "-A" on the ports
+        that changed since its last scan.
+        Hosts without a last scan get a full scan. The merged results are cached as the new last scan of every host,
+        except the hosts whose "-A" scan failed
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+        """
+        start = time.monotonic()
+        deadline = None if budget is None else start + budget
+        self.delta = []
+
+        with ScanCache() as cache:
+            # Looked up one chunk per query instead of one query per host
+            previous = {}
+            for chunk_start in range(0, len(hosts), LOOKUP_CHUNK_SIZE):
+                previous.update(cache.last_entries(hosts=hosts[chunk_start:chunk_start + LOOKUP_CHUNK_SIZE], arguments=SCAN_OPTIONS))
+
+            # Stage 1, the cheap port check of every host
+            self.perform_parallel_scan(hosts=hosts, workers=workers, budget=budget,
+                                       shard_count=1 if workers == 1 else None, options=DELTA_CHECK_OPTIONS)
+            checked = [host for host in hosts if host not in self.unscanned_hosts]
+            check = match_targets(targets=checked, result=self.nmScan._scan_result)
+
+            # Stage 2, "-A" on the changed ports, hosts that need the same ports share an nmap process
+            detail_groups = {}
+            for host, (address, check_result) in check.items():
+                if check_result is None:
+                    continue
+                last = previous.get(host)
+                if last is None or last["result"] is None:
+                    detail_groups.setdefault(SCAN_OPTIONS, []).append(host)
+                    continue
+                ports = changed_ports(previous=last["result"], check=check_result)
+                if len(ports) > 0:
+                    detail_groups.setdefault(f"{DELTA_DETAIL_OPTIONS} -p {port_spec(ports=ports)}", []).append(host)
+
+            # The port check is still shown for hosts whose detail scan failed, only the service details are missing
+            detail, _ = self.run_scan_groups(groups=detail_groups, workers=workers, deadline=deadline)
+            # Their merged result is not cached, so that their last full scan stays the baseline of the next delta scan
+            detail_failed = {host for group in detail_groups.values() for host in group if host not in detail}
+
+            scaninfo = self.nmScan._scan_result["nmap"].get("scaninfo", {})
+            merged = {"nmap": {"scaninfo": scaninfo, "scanstats": {"uphosts": 0, "downhosts": 0, "totalhosts": len(check)}}, "scan": {}}
+            entries = {}
+            for host, (address, check_result) in check.items():
+                last = previous.get(host)
+                last_result = None if last is None else last["result"]
+                if check_result is None:
+                    merged["nmap"]["scanstats"]["downhosts"] += 1
+                    entries[host] = (None, None)
+                    current = None
+                else:
+                    merged["nmap"]["scanstats"]["uphosts"] += 1
+                    current = merge_host_result(previous=last_result, check=check_result, detail=detail.get(host))
+                    merged["scan"][address] = nmap.PortScannerHostDict(current)
+                    if host not in detail_failed:
+                        entries[host] = (address, current)
+                self.delta.extend(diff_host_results(host=host, previous=last_result, current=current, known=last is not None))
+            cache.put_many(entries=entries, arguments=SCAN_OPTIONS)
+
+        command_line = f"nmap -oX - {DELTA_CHECK_OPTIONS}, then \"-A\" on the changed ports of {len(detail)} host(s)"
+        self.nmScan._scan_result = merge_scan_results(results=[merged], command_line=command_line, elapsed=time.monotonic() - start)
 
 
     # User-defined method
-    def display_scan_output(self):
+    def perform_sweep_scan(self, hosts: list, workers: int, budget: float | None = None):
+        """
+        Sweep the hosts with asyncio TCP connects and only run "-A" on the hosts and ports that were found open.
+        Hosts that are down or have no open port are never handed to nmap
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the nmap stage may take, None for no limit
+        """
+        start = time.monotonic()
+        sweeper = ConnectSweeper()
+        open_ports, alive = sweeper.run(hosts=hosts, ports=list(SWEEP_PORTS))
+        self.sweep_stats = {"probes": sweeper.probes, "elapsed": sweeper.elapsed, "alive": len(alive), "open": len(open_ports)}
+
+        # Hosts with the same open ports share an nmap process
+        groups = {}
+        for host, ports in open_ports.items():
+            groups.setdefault(f"{SWEEP_DETAIL_OPTIONS} -p T:{','.join(str(port) for port in ports)}", []).append(host)
+        deadline = None if budget is None else time.monotonic() + budget
+        host_results, results = self.run_scan_groups(groups=groups, workers=workers, deadline=deadline)
+        self.unscanned_hosts = {host for host in open_ports if host not in host_results}
+
+        command_line = f"TCP connect sweep of {len(SWEEP_PORTS)} ports, then nmap -oX - {SWEEP_DETAIL_OPTIONS} -p <open ports>"
+        self.nmScan._scan_result = merge_scan_results(results=results, command_line=command_line, elapsed=time.monotonic() - start)
+        # Hosts that refused every connect are up as well, they only have no open port
+        self.nmScan._scan_result["nmap"]["scanstats"].update(uphosts=str(len(alive)), downhosts=str(len(hosts) - len(alive)), totalhosts=str(len(hosts)))
+
+
+    # User-defined method
+    def perform_stream_scan(self, hosts: list, workers: int, budget: float | None = None):
+        """
+        Scan the shards with parallel nmap processes whose XML output is parsed while they run.
+        Every host goes into the column store as soon as nmap has written it and its XML is then released,
+        so the memory of the scan does not grow with python-nmap's nested dicts of every host
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Number of nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+        """
+        start = time.monotonic()
+        deadline = None if budget is None else start + budget
+        shards = shard_hosts(hosts=hosts, shard_count=workers * SHARDS_PER_WORKER)
+        self.store = ScanStore()
+        store_lock = threading.Lock()
+        self.unscanned_hosts = set()
+
+        def scan_shard(shard: list) -> dict:
+            stream = NmapStream(hosts=shard, options=SCAN_OPTIONS, deadline=deadline)
+            done = set()
+            try:
+                for address, host_result in stream:
+                    with store_lock:
+                        self.store.add_host(address=address, host_result=host_result)
+                    done.add(address)
+                    done.update(hostname["name"] for hostname in host_result["hostnames"] if hostname["type"] == "user")
+            except (nmap.PortScannerError, nmap.PortScannerTimeout):
+                with store_lock:
+                    self.unscanned_hosts.update(host for host in shard if host not in done)
+            return {"nmap": {"scaninfo": stream.parser.scaninfo, "scanstats": stream.parser.scanstats}, "scan": {}}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scan_shard, shards))
+
+        command_line = f"nmap -oX - {SCAN_OPTIONS} streamed ({len(shards)} shards over {workers} processes)"
+        self.nmScan._scan_result = merge_scan_results(results=results, command_line=command_line, elapsed=time.monotonic() - start)
+
+
+    # User-defined method
+    def perform_adaptive_scan(self, hosts: list, workers: int, budget: float | None = None):
+        """
+        Scan shards whose number in parallel, size and timing template are adapted to the round trip times and
+        timeouts of the shards that are done, up to workers nmap processes. Hosts that time out are scanned
+        again on their own with the most conservative template, so no result is lost to a template that was too fast
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses to scan
+            workers (int): Most nmap processes that run at the same time
+            budget (float | None): Wall clock seconds that the whole scan may take, None for no limit
+        """
+        start = time.monotonic()
+        deadline = None if budget is None else start + budget
+        controller = AdaptiveController(max_parallel=workers)
+        self.store = ScanStore()
+        self.unscanned_hosts = set()
+        results = []
+        cursor = 0
+        retries = deque()
+
+        def scan_shard(shard, template: str, host_timeout: int | None) -> tuple[list, dict, bool]:
+            # Without a host timeout nmap never gives up on a host, so no host would be reported as timed out
+            options = f"{ADAPTIVE_OPTIONS} -{template}" if host_timeout is None else f"{ADAPTIVE_OPTIONS} -{template} --host-timeout {host_timeout}s"
+            stream = NmapStream(hosts=shard, options=options, deadline=deadline)
+            records = []
+            try:
+                records.extend(stream)
+                failed = False
+            except (nmap.PortScannerError, nmap.PortScannerTimeout):
+                failed = True
+            return records, {"nmap": {"scaninfo": stream.parser.scaninfo, "scanstats": stream.parser.scanstats}, "scan": {}}, failed
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            while cursor < len(hosts) or len(retries) > 0 or len(running) > 0:
+                # Hosts that are not started before the budget is used up are not scanned
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.unscanned_hosts.update(retries)
+                    self.unscanned_hosts.update(hosts[cursor:])
+                    retries.clear()
+                    cursor = len(hosts)
+                    if len(running) == 0:
+                        break
+                # Start shards until the congestion window is full, the retries of timed out hosts first
+                while len(running) < controller.parallelism() and (cursor < len(hosts) or len(retries) > 0):
+                    if len(retries) > 0:
+                        shard, template, retry = [retries.popleft()], TIMING_TEMPLATES[0][0], True
+                    else:
+                        shard, template, retry = hosts[cursor:cursor + controller.batch_size()], controller.template(), False
+                        cursor += len(shard)
+                    future = executor.submit(scan_shard, shard, template, controller.host_timeout(template=template))
+                    running[future] = (shard, template, retry, time.monotonic())
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard, template, retry, shard_start = running.pop(future)
+                    records, result, failed = future.result()
+                    results.append(result)
+
+                    rtts = []
+                    timeouts = 0
+                    found = set()
+                    for address, host_result in records:
+                        found.add(address)
+                        found.update(hostname["name"] for hostname in host_result["hostnames"] if hostname["type"] == "user")
+                        if host_result.get("timedout") and not retry:
+                            timeouts += 1
+                            retries.append(address)
+                            continue
+                        if host_result.get("times", {}).get("srtt"):
+                            rtts.append(float(host_result["times"]["srtt"]))
+                        self.store.add_host(address=address, host_result=host_result)
+                    if failed:
+                        self.unscanned_hosts.update(host for host in shard if host not in found)
+                    controller.on_shard(hosts=len(shard), elapsed=time.monotonic() - shard_start, rtts=rtts,
+                                        timeouts=timeouts, failed=failed, template=template)
+
+        self.adaptive_stats = dict(controller.stats, parallelism=controller.parallelism(), batch=controller.batch_size())
+        command_line = f"nmap -oX - {ADAPTIVE_OPTIONS} -T<adaptive> ({controller.stats['shards']} shards, up to {workers} processes)"
+        self.nmScan._scan_result = merge_scan_results(results=results, command_line=command_line, elapsed=time.monotonic() - start)
+
+
+    # User-defined method
+    def compact_results(self):
+        """
+        Move the host results of the scan into a compact column store and release python-nmap's nested dicts
+        """
+        # A streamed scan has filled in the store already
+        if self.store is not None:
+            return
+        self.store = ScanStore.from_scan_result(scan_result=self.nmScan._scan_result)
+        # The nmap command line, scan info and stats are kept, only the per host dicts are large
+        self.nmScan._scan_result["scan"] = {}
+
+
+    # User-defined method
+    def validate_workers(self, number: str) -> bool:
+        """
+        Check if the number of parallel nmap processes is blank or within 1 and MAX_SCAN_WORKERS
+
+        Args:
+            number (str): The number to validate
+
+        Returns:
+            bool: True if it is a valid number of nmap processes, otherwise False
+        """
+        if number == "":
+            return True
+        if number.isnumeric():
+            if int(number) >= 1 and int(number) <= MAX_SCAN_WORKERS:
+                return True
+        return False
+
+
+    # User-defined method
+    def validate_budget(self, seconds: str) -> bool:
+        """
+        Check if the time budget is blank or a positive number of seconds
+
+        Args:
+            seconds (str): The time budget to validate
+
+        Returns:
+            bool: True if it is a valid time budget, otherwise False
+        """
+        if seconds == "":
+            return True
+        if re.match(pattern=r"^\d+(\.\d+)?$", string=seconds):
+            return float(seconds) > 0
+        return False
+
+
+    # User-defined method
+    def validate_cache_ttl(self, seconds: str) -> bool:
+        """
+        Check if the cache TTL is blank or a whole number of seconds
+
+        Args:
+            seconds (str): The cache TTL to validate
+
+        Returns:
+            bool: True if it is a valid cache TTL, otherwise False
+        """
+        if seconds == "":
+            return True
+        return seconds.isnumeric()
+
+
+    # User-defined method
+    def validate_journal_file(self, filename: str) -> bool:
+        """
+        Check if the journal file is blank or a file in a folder that exists
+
+        Args:
+            filename (str): The journal file to validate
+
+        Returns:
+            bool: True if it is a valid journal file, otherwise False
+        """
+        if filename == "":
+            return True
+        return not os.path.isdir(filename) and os.path.isdir(os.path.dirname(filename) or ".")
+
+
+    # User-defined method
+    def validate_export_file(self, filename: str) -> bool:
+        """
+        Check if the export file is blank or a .jsonl or .csv file in a folder that exists
+
+        Args:
+            filename (str): The export file to validate
+
+        Returns:
+            bool: True if it is a valid export file, otherwise False
+        """
+        if filename == "":
+            return True
+        folder = os.path.dirname(filename) or "."
+        return os.path.splitext(filename)[1].lower() in EXPORT_FORMATS and os.path.isdir(folder)
+
+
+    # User-defined method
+    def validate_host(self, hosts: list) -> bool:
+        """
+        Validate the target(s) that are entered, hostnames and IPv4 addresses, CIDR blocks and ranges,
+        and the same prefixed by "!" to exclude them
+
+        Args:
+            host (list): list of targets to validate
+
+        Returns:
+            bool: If a target is invalid or nothing is left to scan return False, else return True
+        """
+        try:
+            TargetSet.parse(tokens=hosts)
+        except ValueError:
+            return False
+        return True
+
+
+    # User-defined method
+    def create_table(self) -> Table:
         """
-        Display type of nmap scan, the host(s) scanned, type of scan results, and scan results in a table
+        Create the rich table with a column for every component of the nmap scan result
+
+        Returns:
+            Table: The empty rich table
         """
         # Initialize rich table
         table = Table(box=box.SQUARE, show_lines=True)
@@ -168,27 +1091,98 @@ class CustomNmapScanner():
         table.add_column(header="Extrainfo", no_wrap=True)
         table.add_column(header="Reason", no_wrap=True)
         table.add_column(header="CPE", no_wrap=True)
+        return table
 
-        # Extract information for the table
-        for host in self.nmScan.all_hosts():
-            for protocol in self.nmScan[host].all_protocols():
-                for port in self.nmScan[host][protocol]:
-                    hostname = self.nmScan[host].hostname()
-                    state = self.nmScan[host][protocol][port]["state"]
-                    product = self.nmScan[host][protocol][port]["product"]
-                    extrainfo = self.nmScan[host][protocol][port]["extrainfo"]
-                    reason = self.nmScan[host][protocol][port]["reason"]
-                    cpe = self.nmScan[host][protocol][port]["cpe"]
-
-                    # Unable to use named arguments for the "add_row" function as it uses the unpacking operator "*" 
-                    # Add table rows with each component of the nmap scan result to the respective columns, i.e. hostname to the Hostname column
-                    table.add_row(host, hostname, protocol, str(port), state, product, extrainfo, reason, cpe)
-        
+
+    # User-defined method
+    def add_host_rows(self, table: Table, host: str, host_result):
+        """
+        Add a row to the rich table for every port of a scanned host
+
+        Args:
+            table (Table): The rich table
+            host (str): Address of the host
+            host_result (nmap.PortScannerHostDict): Scan result of the host
+        """
+        hostname = host_result.hostname()
+        for protocol in host_result.all_protocols():
+            for port in host_result[protocol]:
+                state = host_result[protocol][port]["state"]
+                product = host_result[protocol][port]["product"]
+                extrainfo = host_result[protocol][port]["extrainfo"]
+                reason = host_result[protocol][port]["reason"]
+                cpe = host_result[protocol][port]["cpe"]
+
+                # Unable to use named arguments for the "add_row" function as it uses the unpacking operator "*"
+                # Add table rows with each component of the nmap scan result to the respective columns, i.e. hostname to the Hostname column
+                table.add_row(host, hostname, protocol, str(port), state, product, extrainfo, reason, cpe)
+
+
+    # User-defined method
+    def display_delta_output(self):
+        """
+        Display what changed since the last scan of every host of a delta scan in a table
+        """
+        table = Table(box=box.SQUARE, show_lines=True, title="Changes since the last scan")
+        table.add_column(header="Host", no_wrap=True)
+        table.add_column(header="Protocol", no_wrap=True)
+        table.add_column(header="Port ID", no_wrap=True)
+        table.add_column(header="Change", no_wrap=True)
+        table.add_column(header="Before", no_wrap=True)
+        table.add_column(header="After", no_wrap=True)
+
+        for host, protocol, port, change, before, after in self.delta:
+            table.add_row(host, protocol, str(port), change, before, after)
+
+        console = Console()
+        if len(self.delta) == 0:
+            console.print("No changes since the last scan")
+        else:
+            console.print(table)
+
+
+    # User-defined method
+    def display_scan_output(self):
+        """
+        Display type of nmap scan, the host(s) scanned, type of scan results, and scan results in a table.
+        Results with more rows than fit a page are shown one page at a time
+        """
         # Display nmap scan details
         print(f"Type of nmScan: {type(self.nmScan)}")
         print(f"Scanning Ports: {self.hosts}")
-        print(f"Type of results: {type(self.nmScan._scan_result)}")
+        print(f"Type of results: {type(self.store)}")
+        port_states = ", ".join(f"{count} {state}" for state, count in self.store.count_by(column="state").items())
+        print(f"Scanned {self.store.host_count()} host(s), port states: {port_states or 'none'}")
+        if len(self.unscanned_hosts) > 0:
+            print(f"Not scanned within the time budget: {' '.join(sorted(self.unscanned_hosts))}")
+        if self.sweep_stats is not None:
+            print(f"Connect sweep: {self.sweep_stats['probes']} connect(s) in {self.sweep_stats['elapsed']:.2f}s, "
+                  f"{self.sweep_stats['alive']} host(s) up, {self.sweep_stats['open']} with open ports")
+        if self.adaptive_stats is not None:
+            templates = ", ".join(f"{self.adaptive_stats.get(template, 0)} {template}" for template, _ in TIMING_TEMPLATES)
+            print(f"Adaptive scan: {self.adaptive_stats['shards']} shard(s) ({templates}), {self.adaptive_stats['timeouts']} host timeout(s) "
+                  f"scanned again, ended at {self.adaptive_stats['parallelism']} process(es) of {self.adaptive_stats['batch']} host(s)")
+        if self.cache_stats is not None:
+            print(f"Scan cache: {self.cache_stats['hits']} hit(s), {self.cache_stats['misses']} miss(es) this scan, "
+                  f"{self.cache_stats['total_hits']} hit(s), {self.cache_stats['total_misses']} miss(es) in total, "
+                  f"{self.cache_stats['entries']} cached host(s)")
+        if self.journal_file is not None:
+            print(f"Scan journal: {self.resumed_shards} shard(s) resumed from {self.journal_file}")
+        if self.export_file != "":
+            print(f"Exported {self.export_count} row(s) to {self.export_file}")
 
-        # Display nmap scan results using the rich table
-        console = Console()
-        console.print(table)
+        # Display nmap scan results using the rich table, only a page at a time is rendered for large results
+        if len(self.store.row_host) > DEFAULT_PAGE_ROWS:
+            PagedViewer(rows=self.store.rows(), page_rows=DEFAULT_PAGE_ROWS).run()
+        else:
+            table = self.create_table()
+
+            # Extract information for the table
+            for host, hostname, protocol, port, state, product, extrainfo, reason, cpe in self.store.rows():
+                table.add_row(host, hostname, protocol, str(port), state, product, extrainfo, reason, cpe)
+
+            console = Console()
+            console.print(table)
+
+        if self.delta is not None:
+            self.display_delta_output()
@@ -0,0 +1,237 @@
+"""
+Packet Benchmark Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    packet_benchmark.py
+
+Purpose:
+    Benchmark the sending modes of the custom packet sender and compare their packets per second
+
+Usage syntax:
+    Run with command line in the directory where this script is located, e.g. python packet_benchmark.py --count 5000
+    Must be run as administrator/root as raw sockets are used
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/argparse.html
+https://docs.python.org/3/library/time.html#time.perf_counter
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - argparse
+    - os
+    - tempfile
+    - time
+- custom module(s) from python scripts in the same directory
+    - custom_packet
+
+Known issues:
+    Nil
+
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from custom_packet import CustomPacketSender
+
+
+class PacketBenchmark:
+    """
+    A class for benchmarking the sending modes of the custom packet sender
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(dest_addr, pkt_type, pkt_count, workers):
+            Initialize the benchmark with the packet that every mode sends
+
+            Args:
+                dest_addr (str): Destination address of the packets
+                pkt_type (str): Type of packet (T)TCP, (U)UDP, (I)ICMP echo request
+                pkt_count (int): Number of packets that each mode sends
+                workers (int): Number of worker processes of the parallel mode
+
+
+        bench_loop():
+            Send packets with one "send_packet" call per packet, as the custom packet menu used to
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        bench_burst():
+            Send packets with "send_burst", which reuses one socket and one prebuilt packet
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        bench_template():
+            Send packets with "send_template_burst", which patches the IP ID, source port and payload counter per packet
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        bench_parallel():
+            Send packets with "send_parallel", which shards the packets across worker processes
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        bench_pcap():
+            Write templated packets to a temporary pcap file with "send_template_burst", no network access is needed
+
+            Returns:
+                tuple[int, int]: Number of packets written and number of packets that failed
+
+
+        run():
+            Run every benchmark mode and print the packets per second of each mode
+    """
+
+    # Initializer
+    def __init__(self, dest_addr: str, pkt_type: str, pkt_count: int, workers: int) -> None:
+        """
+        Initialize the benchmark with the packet that every mode sends
+
+        Args:
+            dest_addr (str): Destination address of the packets
+            pkt_type (str): Type of packet (T)TCP, (U)UDP, (I)ICMP echo request
+            pkt_count (int): Number of packets that each mode sends
+            workers (int): Number of worker processes of the parallel mode
+        """
+        self.sender = CustomPacketSender()
+        self.src_addr = "127.0.0.1"
+        self.src_port = 40000
+        self.dest_addr = dest_addr
+        self.dest_port = 9
+        self.pkt_type = pkt_type
+        self.pkt_data = "DISM-DISM-DISM-DISM"
+        self.pkt_count = pkt_count
+        self.workers = workers
+
+
+    # User-defined method
+    def bench_loop(self) -> tuple[int, int]:
+        """
+        Send packets with one "send_packet" call per packet, as the custom packet menu used to
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        sent = 0
+        for _ in range(self.pkt_count):
+            if self.sender.send_packet(self.src_addr, self.src_port, self.dest_addr, self.dest_port, self.pkt_type, self.pkt_data):
+                sent += 1
+        return sent, self.pkt_count - sent
+
+
+    # User-defined method
+    def bench_burst(self) -> tuple[int, int]:
+        """
+        Send packets with "send_burst", which reuses one socket and one prebuilt packet
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        return self.sender.send_burst(self.src_addr, self.src_port, self.dest_addr, self.dest_port,
+                                      self.pkt_type, self.pkt_data, self.pkt_count)
+
+
+    # User-defined method
+    def bench_template(self) -> tuple[int, int]:
+        """
+        Send packets with "send_template_burst", which patches the IP ID, source port and payload counter per packet
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        return self.sender.send_template_burst(self.src_addr, self.src_port, self.dest_addr, self.dest_port,
+                                               self.pkt_type, self.pkt_data, self.pkt_count, ["ip_id", "src_port", "counter"])
+
+
+    # User-defined method
+    def bench_parallel(self) -> tuple[int, int]:
+        """
+        Send packets with "send_parallel", which shards the packets across worker processes
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        return self.sender.send_parallel(self.src_addr, self.src_port, self.dest_addr, self.dest_port,
+                                         self.pkt_type, self.pkt_data, self.pkt_count, [], self.workers, False)
+
+
+    # User-defined method
+    def bench_pcap(self) -> tuple[int, int]:
+        """
+        Write templated packets to a temporary pcap file with "send_template_burst", no network access is needed
+
+        Returns:
+            tuple[int, int]: Number of packets written and number of packets that failed
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            return self.sender.send_template_burst(self.src_addr, self.src_port, self.dest_addr, self.dest_port,
+                                                   self.pkt_type, self.pkt_data, self.pkt_count, ["ip_id", "src_port", "counter"],
+                                                   os.path.join(directory, "benchmark.pcap"))
+
+
+    # User-defined method
+    def run(self):
+        """
+        Run every benchmark mode and print the packets per second of each mode
+        """
+        modes = [
+            ("loop", self.bench_loop),
+            ("burst", self.bench_burst),
+            ("template", self.bench_template),
+            ("parallel", self.bench_parallel),
+            ("pcap", self.bench_pcap),
+        ]
+
+        print(f"Sending {self.pkt_count} packet(s) of type {self.pkt_type} to {self.dest_addr} per mode\n")
+        print(f"{'Mode':<10}{'Sent':>10}{'Failed':>10}{'Seconds':>12}{'Packets/s':>14}")
+
+        baseline = None
+        for name, bench in modes:
+            start = time.perf_counter()
+            sent, failed = bench()
+            elapsed = time.perf_counter() - start
+            pps = sent / elapsed if elapsed > 0 else 0.0
+
+            if baseline is None:
+                baseline = pps
+            speedup = f"  x{pps / baseline:.1f}" if baseline else ""
+            print(f"{name:<10}{sent:>10}{failed:>10}{elapsed:>12.3f}{pps:>14.0f}{speedup}")
+
+
+# Main program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the custom packet sender")
+    parser.add_argument("--dest", default="127.0.0.1", help="Destination address, defaults to the loopback address")
+    parser.add_argument("--type", default="U", choices=["T", "U", "I"], help="Packet type (T)TCP, (U)UDP, (I)ICMP")
+    parser.add_argument("--count", type=int, default=2000, help="Number of packets per mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes of the parallel mode")
+    args = parser.parse_args()
+
+    benchmark = PacketBenchmark(dest_addr=args.dest, pkt_type=args.type, pkt_count=args.count, workers=args.workers)
+    benchmark.run()
@@ -0,0 +1,1194 @@
+"""
+Packet Engine Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    packet_engine.py
+
+Purpose:
+    Low level sending engine for the custom packet sender, packets are sent as prebuilt bytes through one socket.
+    Packet templates patch changing fields in a preallocated buffer and update the checksums incrementally.
+    The parallel sender shards the packets across worker processes that each own a socket.
+    The paced sender uses asyncio and a token bucket to hold a target packet or bit rate.
+    The replay engine sends the packets of a capture file at their original timing, optionally rewritten
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/socket.html#socket.socket.sendto
+https://man7.org/linux/man-pages/man7/raw.7.html
+https://scapy.readthedocs.io/en/latest/api/scapy.supersocket.html
+https://www.rfc-editor.org/rfc/rfc1624
+https://docs.python.org/3/library/struct.html#struct.pack_into
+https://docs.python.org/3/library/multiprocessing.html#sharing-state-between-processes
+https://docs.python.org/3/library/os.html#os.sched_setaffinity
+https://en.wikipedia.org/wiki/Token_bucket
+https://en.wikipedia.org/wiki/Generic_cell_rate_algorithm
+https://docs.python.org/3/library/asyncio-task.html#asyncio.sleep
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - asyncio
+    - itertools
+    - math
+    - multiprocessing
+    - os
+    - queue
+    - socket
+    - struct
+    - time
+- required external modules installed using pip: pip install <module name>  # e.g. pip install scapy
+    - scapy
+- custom module(s) from python scripts in the same directory
+    - pcap_io
+
+Known issues:
+    Raw IPv4 sockets need administrator/root privileges.
+    On Windows the scapy layer 3 socket is used instead as Windows does not allow TCP over native raw sockets.
+
+
+"""
+
+import asyncio
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import time
+from pcap_io import PcapReader
+
+
+# IP protocol numbers of the packet types that templates support
+PROTO_ICMP = 1
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+# Fields that a packet template is able to vary per packet
+TEMPLATE_FIELDS = ("ip_id", "src_port", "seq", "counter")
+
+# Packets a parallel worker sends between updates of its shared counters
+WORKER_CHUNK_SIZE = 2048
+
+# Job lists that may wait in the queue of a streaming worker, bounds the memory of a long stream
+STREAM_QUEUE_SIZE = 2
+
+# asyncio.sleep() is only accurate to about a millisecond, waits shorter than this are spun out instead
+SLEEP_GRANULARITY = 0.002
+
+# A replayed packet that is sent later than this after its original timing is counted as late
+REPLAY_LATE_THRESHOLD = 0.001
+
+
+# User-defined function
+def ones_complement_sum(data: bytes | bytearray, start: int, end: int) -> int:
+    """
+    Add up the 16 bit words of a byte range using one's complement addition
+
+    Args:
+        data (bytes | bytearray): Bytes to add up
+        start (int): Offset of the first byte, must be even
+        end (int): Offset after the last byte, an odd length is padded with a zero byte
+
+    Returns:
+        int: The folded 16 bit one's complement sum
+    """
+    words = data[start:end]
+    if len(words) % 2:
+        words = bytes(words) + b"\x00"
+    total = sum(struct.unpack(f"!{len(words) // 2}H", words))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return total
+
+
+# User-defined function
+def update_checksum(checksum: int, old_sum: int, new_sum: int) -> int:
+    """
+    Update an internet checksum after some of the words it covers have changed, RFC 1624 eqn. 3
+    HC' = ~(~HC + ~m + m')
+
+    Args:
+        checksum (int): The current checksum, HC
+        old_sum (int): One's complement sum of the words before they changed, m
+        new_sum (int): One's complement sum of the words after they changed, m'
+
+    Returns:
+        int: The updated checksum, HC'
+    """
+    total = (~checksum & 0xFFFF) + (~old_sum & 0xFFFF) + new_sum
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+# User-defined function
+def patch_packet(buffer: bytearray, offset: int, value: bytes, checksum_offsets: tuple,
+                udp_checksum_offset: int | None = None):
+    """
+    Write new bytes into a packet and update the checksums that cover them incrementally
+
+    Args:
+        buffer (bytearray): IPv4 packet that starts at the IP header
+        offset (int): Offset of the bytes from the start of the packet
+        value (bytes): The new bytes
+        checksum_offsets (tuple): Offsets of the checksums that cover the bytes, e.g. (10,) for the IP header checksum
+        udp_checksum_offset (int | None): Offset of a UDP checksum in checksum_offsets, a result of zero is sent as all ones
+    """
+    end = offset + len(value)
+
+    # Checksums are over 16 bit words and both the IP header and the L4 segment start at an even offset
+    start = offset & ~1
+    stop = end + (end & 1)
+    old_sum = ones_complement_sum(buffer, start, stop)
+    buffer[offset:end] = value
+    new_sum = ones_complement_sum(buffer, start, stop)
+
+    for checksum_offset in checksum_offsets:
+        (checksum,) = struct.unpack_from("!H", buffer, checksum_offset)
+        checksum = update_checksum(checksum, old_sum, new_sum)
+        if checksum == 0 and checksum_offset == udp_checksum_offset:
+            checksum = 0xFFFF
+        struct.pack_into("!H", buffer, checksum_offset, checksum)
+
+
+# User-defined function
+def rewrite_packet(buffer: bytearray, src_addr: bytes | None = None, dest_addr: bytes | None = None,
+                src_port: int | None = None, dest_port: int | None = None):
+    """
+    Rewrite the addresses and ports of an IPv4 packet in place, fixing the IP and TCP/UDP checksums incrementally.
+    The addresses are part of the TCP/UDP pseudo header so both checksums change for them
+
+    Args:
+        buffer (bytearray): IPv4 packet that starts at the IP header
+        src_addr (bytes | None): New 4 byte source address, None to keep it
+        dest_addr (bytes | None): New 4 byte destination address, None to keep it
+        src_port (int | None): New TCP/UDP source port, None to keep it
+        dest_port (int | None): New TCP/UDP destination port, None to keep it
+    """
+    ihl = (buffer[0] & 0x0F) * 4
+    proto = buffer[9]
+    first_fragment = (struct.unpack_from("!H", buffer, 6)[0] & 0x1FFF) == 0
+
+    # The L4 checksum is only in the first fragment, and a UDP checksum of zero is not used
+    l4_checksum = None
+    udp_checksum = None
+    if first_fragment and proto == PROTO_TCP and len(buffer) >= ihl + 18:
+        l4_checksum = ihl + 16
+    elif first_fragment and proto == PROTO_UDP and len(buffer) >= ihl + 8 and buffer[ihl + 6:ihl + 8] != b"\x00\x00":
+        l4_checksum = udp_checksum = ihl + 6
+
+    address_checksums = (10,) if l4_checksum is None else (10, l4_checksum)
+    if src_addr is not None:
+        patch_packet(buffer, 12, src_addr, address_checksums, udp_checksum)
+    if dest_addr is not None:
+        patch_packet(buffer, 16, dest_addr, address_checksums, udp_checksum)
+
+    if first_fragment and proto in (PROTO_TCP, PROTO_UDP) and len(buffer) >= ihl + 4:
+        port_checksums = () if l4_checksum is None else (l4_checksum,)
+        if src_port is not None:
+            patch_packet(buffer, ihl, src_port.to_bytes(2, "big"), port_checksums, udp_checksum)
+        if dest_port is not None:
+            patch_packet(buffer, ihl + 2, dest_port.to_bytes(2, "big"), port_checksums, udp_checksum)
+
+
+# User-defined function
+def sleep_until(deadline: float):
+    """
+    Sleep until the deadline, the last stretch is spun out as time.sleep() is not precise enough
+
+    Args:
+        deadline (float): time.perf_counter() value to wait for
+    """
+    clock = time.perf_counter
+    remaining = deadline - clock()
+    if remaining > SLEEP_GRANULARITY:
+        time.sleep(remaining - SLEEP_GRANULARITY)
+    while clock() < deadline:
+        pass
+
+
+class RawPacketSocket:
+    """
+    A class for a layer 3 socket that sends prebuilt IPv4 packets
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__():
+            Open the layer 3 socket once so that it can be reused for every packet
+
+
+        send(data, dest_addr):
+            Send one prebuilt IPv4 packet
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                dest_addr (str): Destination IPv4 address of the packet
+
+            Returns:
+                bool: True if the packet is sent successfully, False otherwise
+
+
+        send_async(data, dest_addr):
+            Send one prebuilt IPv4 packet without blocking the event loop, waiting for the socket to be writable
+            if its send buffer is full
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                dest_addr (str): Destination IPv4 address of the packet
+
+            Returns:
+                bool: True if the packet is sent successfully, False otherwise
+
+
+        send_burst(data, dest_addr, pkt_count):
+            Send the same prebuilt IPv4 packet a number of times through the open socket
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                dest_addr (str): Destination IPv4 address of the packet
+                pkt_count (int): Number of times to send the packet
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        send_many(packets, dest_addr):
+            Send every packet of an iterable through the open socket
+
+            Args:
+                packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+                dest_addr (str): Destination IPv4 address of the packets
+
+            Returns:
+                tuple[int, int]: Number of packets sent and number of packets that failed
+
+
+        close():
+            Close the layer 3 socket
+    """
+
+    # Initializer
+    def __init__(self) -> None:
+        """
+        Open the layer 3 socket once so that it can be reused for every packet
+        """
+        if os.name == "nt":
+            # Imported here so that POSIX systems do not pay for the scapy import
+            from scapy.config import conf
+            from scapy.layers.inet import IP
+
+            self.scapy_ip = IP
+            self.sock = conf.L3socket()
+        else:
+            self.scapy_ip = None
+            # IPPROTO_RAW implies IP_HDRINCL, the IP header is taken from the packet bytes
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
+
+
+    # User-defined method
+    def send(self, data: bytes, dest_addr: str) -> bool:
+        """
+        Send one prebuilt IPv4 packet
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            dest_addr (str): Destination IPv4 address of the packet
+
+        Returns:
+            bool: True if the packet is sent successfully, False otherwise
+        """
+        try:
+            if self.scapy_ip is not None:
+                self.sock.send(self.scapy_ip(bytes(data)))
+            else:
+                self.sock.sendto(data, (dest_addr, 0))
+            return True
+        except OSError:
+            return False
+
+
+    # User-defined method
+    async def send_async(self, data: bytes, dest_addr: str) -> bool:
+        """
+        Send one prebuilt IPv4 packet without blocking the event loop, waiting for the socket to be writable
+        if its send buffer is full
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            dest_addr (str): Destination IPv4 address of the packet
+
+        Returns:
+            bool: True if the packet is sent successfully, False otherwise
+        """
+        # scapy's layer 3 socket has no non-blocking send
+        if self.scapy_ip is not None:
+            return self.send(data, dest_addr)
+
+        # loop.sock_sendto() is only in Python 3.11, so the send is made non-blocking with MSG_DONTWAIT instead,
+        # which leaves the socket blocking for send() and send_burst()
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                self.sock.sendto(data, socket.MSG_DONTWAIT, (dest_addr, 0))
+                return True
+            except (BlockingIOError, InterruptedError):
+                writable = loop.create_future()
+                loop.add_writer(self.sock.fileno(), writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    loop.remove_writer(self.sock.fileno())
+            except OSError:
+                return False
+
+
+    # User-defined method
+    def send_burst(self, data: bytes, dest_addr: str, pkt_count: int) -> tuple[int, int]:
+        """
+        Send the same prebuilt IPv4 packet a number of times through the open socket
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            dest_addr (str): Destination IPv4 address of the packet
+            pkt_count (int): Number of times to send the packet
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        sent = 0
+
+        if self.scapy_ip is not None:
+            # Dissect once, the dissected packet caches its raw bytes so scapy does not rebuild it
+            pkt = self.scapy_ip(data)
+            send = self.sock.send
+            for _ in range(pkt_count):
+                try:
+                    send(pkt)
+                    sent += 1
+                except OSError:
+                    pass
+        else:
+            address = (dest_addr, 0)
+            sendto = self.sock.sendto
+            for _ in range(pkt_count):
+                try:
+                    sendto(data, address)
+                    sent += 1
+                except OSError:
+                    pass
+
+        return sent, pkt_count - sent
+
+
+    # User-defined method
+    def send_many(self, packets, dest_addr: str) -> tuple[int, int]:
+        """
+        Send every packet of an iterable through the open socket
+
+        Args:
+            packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+            dest_addr (str): Destination IPv4 address of the packets
+
+        Returns:
+            tuple[int, int]: Number of packets sent and number of packets that failed
+        """
+        sent = 0
+        failed = 0
+
+        if self.scapy_ip is not None:
+            for data in packets:
+                if self.send(bytes(data), dest_addr):
+                    sent += 1
+                else:
+                    failed += 1
+        else:
+            address = (dest_addr, 0)
+            sendto = self.sock.sendto
+            for data in packets:
+                try:
+                    sendto(data, address)
+                    sent += 1
+                except OSError:
+                    failed += 1
+
+        return sent, failed
+
+
+    # User-defined method
+    def close(self):
+        """
+        Close the layer 3 socket
+        """
+        self.sock.close()
+
+
+    def __enter__(self) -> "RawPacketSocket":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class PacketTemplate:
+    """
+    A class for a precompiled IPv4 TCP, UDP or ICMP packet whose fields are patched in place
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(data, counter_offset):
+            Copy the serialized packet into a preallocated buffer and locate the fields and checksums
+
+            Args:
+                data (bytes): Serialized IPv4 packet with valid checksums, e.g. raw() of a scapy packet
+                counter_offset (int): Offset of the 4 byte payload counter from the start of the payload
+
+
+        patch(offset, value):
+            Write new bytes into the buffer and update the checksums that cover them
+
+            Args:
+                offset (int): Offset of the bytes from the start of the packet
+                value (bytes): The new bytes
+
+
+        set_field(field, value):
+            Set one of the template fields, e.g. ip_id, src_port, dest_port, seq, ttl, tcp_flags or counter
+
+            Args:
+                field (str): Name of the field
+                value (int): New value of the field, wrapped to the size of the field
+
+
+        generate(pkt_count, vary, start):
+            Lazily generate packets where every field in vary is incremented per packet
+
+            Args:
+                pkt_count (int): Number of packets to generate
+                vary (list): Names of the fields to increment
+                start (int): Index of the first packet, the fields are incremented by this much first
+
+            Returns:
+                Iterator[bytearray]: The template buffer after each mutation, it is reused so copy it to keep it
+    """
+
+    # Initializer
+    def __init__(self, data: bytes, counter_offset: int = 0) -> None:
+        """
+        Copy the serialized packet into a preallocated buffer and locate the fields and checksums
+
+        Args:
+            data (bytes): Serialized IPv4 packet with valid checksums, e.g. raw() of a scapy packet
+            counter_offset (int): Offset of the 4 byte payload counter from the start of the payload
+        """
+        self.buffer = bytearray(data)
+        self.ihl = (self.buffer[0] & 0x0F) * 4
+        self.proto = self.buffer[9]
+        self.dest_addr = socket.inet_ntoa(self.buffer[16:20])
+
+        if self.proto == PROTO_TCP:
+            self.l4_checksum_offset = self.ihl + 16
+            payload_offset = self.ihl + (self.buffer[self.ihl + 12] >> 4) * 4
+            self.field_offsets = {"src_port": (self.ihl, 2), "dest_port": (self.ihl + 2, 2), "seq": (self.ihl + 4, 4),
+                                  "tcp_flags": (self.ihl + 13, 1)}
+        elif self.proto == PROTO_UDP:
+            self.l4_checksum_offset = self.ihl + 6
+            payload_offset = self.ihl + 8
+            self.field_offsets = {"src_port": (self.ihl, 2), "dest_port": (self.ihl + 2, 2)}
+        elif self.proto == PROTO_ICMP:
+            self.l4_checksum_offset = self.ihl + 2
+            payload_offset = self.ihl + 8
+            # ICMP has no ports, the echo identifier and sequence number take their place
+            self.field_offsets = {"src_port": (self.ihl + 4, 2), "seq": (self.ihl + 6, 2)}
+        else:
+            raise ValueError(f"Unsupported IP protocol {self.proto} for a packet template")
+
+        self.field_offsets["ip_id"] = (4, 2)
+        self.field_offsets["ttl"] = (8, 1)
+        if len(self.buffer) - payload_offset - counter_offset >= 4:
+            self.field_offsets["counter"] = (payload_offset + counter_offset, 4)
+
+        # A UDP checksum of zero means that the checksum is not used
+        self.l4_checksum_used = not (self.proto == PROTO_UDP and self.buffer[self.l4_checksum_offset:self.l4_checksum_offset + 2] == b"\x00\x00")
+
+
+    # User-defined method
+    def patch(self, offset: int, value: bytes):
+        """
+        Write new bytes into the buffer and update the checksums that cover them
+
+        Args:
+            offset (int): Offset of the bytes from the start of the packet
+            value (bytes): The new bytes
+        """
+        if offset < self.ihl:
+            patch_packet(self.buffer, offset, value, checksum_offsets=(10,))
+        elif self.l4_checksum_used:
+            patch_packet(self.buffer, offset, value, checksum_offsets=(self.l4_checksum_offset,),
+                         udp_checksum_offset=self.l4_checksum_offset if self.proto == PROTO_UDP else None)
+        else:
+            self.buffer[offset:offset + len(value)] = value
+
+
+    # User-defined method
+    def set_field(self, field: str, value: int):
+        """
+        Set one of the template fields, e.g. ip_id, src_port, dest_port, seq, ttl, tcp_flags or counter
+
+        Args:
+            field (str): Name of the field
+            value (int): New value of the field, wrapped to the size of the field
+        """
+        if field not in self.field_offsets:
+            raise ValueError(f"Field \"{field}\" can not be varied for this packet")
+        offset, size = self.field_offsets[field]
+        self.patch(offset, (value % (1 << (size * 8))).to_bytes(size, "big"))
+
+
+    # User-defined method
+    def generate(self, pkt_count: int, vary: list, start: int = 0):
+        """
+        Lazily generate packets where every field in vary is incremented per packet
+
+        Args:
+            pkt_count (int): Number of packets to generate
+            vary (list): Names of the fields to increment
+            start (int): Index of the first packet, the fields are incremented by this much first
+
+        Returns:
+            Iterator[bytearray]: The template buffer after each mutation, it is reused so copy it to keep it
+        """
+        start_values = {}
+        for field in vary:
+            if field not in self.field_offsets:
+                raise ValueError(f"Field \"{field}\" can not be varied for this packet")
+            offset, size = self.field_offsets[field]
+            start_values[field] = int.from_bytes(self.buffer[offset:offset + size], "big")
+
+        for i in range(start, start + pkt_count):
+            for field, start_value in start_values.items():
+                value = start_value + i
+                if field == "src_port":
+                    value = (start_value - 1 + i) % 65535 + 1   # Port 0 is skipped
+                self.set_field(field, value)
+            yield self.buffer
+
+
+# User-defined function
+def send_jobs(sock, jobs: list, vary: list, worker_id: int, counters):
+    """
+    Send the packets of a list of jobs through a worker's socket and add them to the worker's counters
+
+    Args:
+        sock (RawPacketSocket): Socket of the worker
+        jobs (list): (packet bytes, packet count, start index) of every flow to send
+        vary (list): Fields that are incremented per packet, empty to send identical packets
+        worker_id (int): Index of the worker, its counters are at 2 * worker_id (sent) and 2 * worker_id + 1 (failed)
+        counters (multiprocessing.Array): Shared sent and failed counters of every worker
+    """
+    for data, pkt_count, start in jobs:
+        dest_addr = socket.inet_ntoa(data[16:20])
+        if len(vary) > 0:
+            packets = PacketTemplate(data=data).generate(pkt_count=pkt_count, vary=vary, start=start)
+        else:
+            packets = None
+
+        remaining = pkt_count
+        while remaining > 0:
+            chunk = min(remaining, WORKER_CHUNK_SIZE)
+            if packets is None:
+                sent, failed = sock.send_burst(data=data, dest_addr=dest_addr, pkt_count=chunk)
+            else:
+                sent, failed = sock.send_many(packets=itertools.islice(packets, chunk), dest_addr=dest_addr)
+            # Only this worker writes its own counters so no lock is needed
+            counters[2 * worker_id] += sent
+            counters[2 * worker_id + 1] += failed
+            remaining -= chunk
+
+
+# User-defined function
+def pin_worker(cpu: int | None):
+    """
+    Pin the calling worker process to a CPU, ignored where it is not supported
+
+    Args:
+        cpu (int | None): CPU to pin the worker to, None to leave it unpinned
+    """
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError:
+            pass
+
+
+# User-defined function
+def parallel_worker(worker_id: int, jobs: list, vary: list, counters, cpu: int | None):
+    """
+    Send a share of the packets from a worker process through the worker's own socket
+
+    Args:
+        worker_id (int): Index of the worker, its counters are at 2 * worker_id (sent) and 2 * worker_id + 1 (failed)
+        jobs (list): (packet bytes, packet count, start index) of every flow the worker sends
+        vary (list): Fields that are incremented per packet, empty to send identical packets
+        counters (multiprocessing.Array): Shared sent and failed counters of every worker
+        cpu (int | None): CPU that the worker is pinned to, None to leave it unpinned
+    """
+    pin_worker(cpu=cpu)
+    try:
+        sock = RawPacketSocket()
+    except OSError:
+        # Without a socket every packet of the share has failed
+        counters[2 * worker_id + 1] += sum(job[1] for job in jobs)
+        return
+
+    with sock:
+        send_jobs(sock=sock, jobs=jobs, vary=vary, worker_id=worker_id, counters=counters)
+
+
+# User-defined function
+def stream_worker(worker_id: int, queue, vary: list, counters, cpu: int | None):
+    """
+    Send the job lists that arrive on a queue from a worker process until None is received
+
+    Args:
+        worker_id (int): Index of the worker, its counters are at 2 * worker_id (sent) and 2 * worker_id + 1 (failed)
+        queue (multiprocessing.Queue): Lists of (packet bytes, packet count, start index) jobs, None at the end
+        vary (list): Fields that are incremented per packet, empty to send identical packets
+        counters (multiprocessing.Array): Shared sent and failed counters of every worker
+        cpu (int | None): CPU that the worker is pinned to, None to leave it unpinned
+    """
+    pin_worker(cpu=cpu)
+    try:
+        sock = RawPacketSocket()
+    except OSError:
+        sock = None
+
+    try:
+        for jobs in iter(queue.get, None):
+            if sock is None:
+                # Without a socket every packet of the stream has failed, the queue is still drained
+                counters[2 * worker_id + 1] += sum(job[1] for job in jobs)
+            else:
+                send_jobs(sock=sock, jobs=jobs, vary=vary, worker_id=worker_id, counters=counters)
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+class ParallelSender:
+    """
+    A class for sending packets from a pool of worker processes, each with its own socket and pinned share of the work
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(workers):
+            Initialize the sender with the number of worker processes
+
+            Args:
+                workers (int | None): Number of worker processes, defaults to the number of CPUs
+
+
+        split_count(data, pkt_count):
+            Split the packets of one flow evenly across the workers
+
+            Args:
+                data (bytes): Serialized IPv4 packet of the flow
+                pkt_count (int): Number of packets to send
+
+            Returns:
+                list: The jobs of every worker
+
+
+        split_flows(flows):
+            Deal a list of flows to the workers round robin
+
+            Args:
+                flows (list): (packet bytes, packet count) of every flow
+
+            Returns:
+                list: The jobs of every worker
+
+
+        send(worker_jobs, vary, progress, interval):
+            Start the workers, collect their live counters and wait for them to finish
+
+            Args:
+                worker_jobs (list): The jobs of every worker from split_count or split_flows
+                vary (list): Fields that are incremented per packet, empty to send identical packets
+                progress (Callable | None): Called with a list of (sent, failed) per worker while they run
+                interval (float): Seconds between progress updates
+
+            Returns:
+                tuple[int, int]: Total number of packets sent and number of packets that failed
+
+
+        send_batches(batches, vary, interval):
+            Start the workers once and stream batches of flows to them round robin
+
+            Args:
+                batches (Iterable[list]): Lists of (packet bytes, packet count) flows
+                vary (list): Fields that are incremented per packet, empty to send identical packets
+                interval (float): Seconds between checks that a worker with a full queue is still alive
+
+            Returns:
+                tuple[int, int]: Total number of packets sent and number of packets that failed
+    """
+
+    # Initializer
+    def __init__(self, workers: int | None = None) -> None:
+        """
+        Initialize the sender with the number of worker processes
+
+        Args:
+            workers (int | None): Number of worker processes, defaults to the number of CPUs
+        """
+        self.cpus = os.cpu_count() or 1
+        self.workers = max(1, workers if workers is not None else self.cpus)
+
+
+    # User-defined method
+    def split_count(self, data: bytes, pkt_count: int) -> list:
+        """
+        Split the packets of one flow evenly across the workers
+
+        Args:
+            data (bytes): Serialized IPv4 packet of the flow
+            pkt_count (int): Number of packets to send
+
+        Returns:
+            list: The jobs of every worker
+        """
+        share, extra = divmod(pkt_count, self.workers)
+        worker_jobs = []
+        start = 0
+        for worker_id in range(self.workers):
+            count = share + (1 if worker_id < extra else 0)
+            # The start index keeps varied fields unique across the workers
+            worker_jobs.append([(data, count, start)] if count > 0 else [])
+            start += count
+        return worker_jobs
+
+
+    # User-defined method
+    def split_flows(self, flows: list) -> list:
+        """
+        Deal a list of flows to the workers round robin
+
+        Args:
+            flows (list): (packet bytes, packet count) of every flow
+
+        Returns:
+            list: The jobs of every worker
+        """
+        worker_jobs = [[] for _ in range(self.workers)]
+        for index, (data, pkt_count) in enumerate(flows):
+            worker_jobs[index % self.workers].append((data, pkt_count, 0))
+        return worker_jobs
+
+
+    # User-defined method
+    def send(self, worker_jobs: list, vary: list | None = None, progress=None, interval: float = 0.5) -> tuple[int, int]:
+        """
+        Start the workers, collect their live counters and wait for them to finish
+
+        Args:
+            worker_jobs (list): The jobs of every worker from split_count or split_flows
+            vary (list): Fields that are incremented per packet, empty to send identical packets
+            progress (Callable | None): Called with a list of (sent, failed) per worker while they run
+            interval (float): Seconds between progress updates
+
+        Returns:
+            tuple[int, int]: Total number of packets sent and number of packets that failed
+        """
+        vary = vary or []
+        counters = multiprocessing.Array("q", 2 * len(worker_jobs), lock=False)
+
+        processes = []
+        for worker_id, jobs in enumerate(worker_jobs):
+            if len(jobs) == 0:
+                continue
+            process = multiprocessing.Process(target=parallel_worker,
+                                              args=(worker_id, jobs, vary, counters, worker_id % self.cpus),
+                                              daemon=True)
+            process.start()
+            processes.append(process)
+
+        def snapshot() -> list:
+            return [(counters[2 * i], counters[2 * i + 1]) for i in range(len(worker_jobs))]
+
+        # Joining with a timeout wakes up on every interval for progress, or as soon as the worker exits
+        for process in processes:
+            while process.is_alive():
+                if progress is not None:
+                    progress(snapshot())
+                process.join(timeout=interval)
+
+        totals = snapshot()
+        if progress is not None:
+            progress(totals)
+
+        # Packets of a worker that died are counted as failed as well
+        expected = sum(job[1] for jobs in worker_jobs for job in jobs)
+        sent = sum(worker_sent for worker_sent, _ in totals)
+        return sent, expected - sent
+
+
+    # User-defined method
+    def send_batches(self, batches, vary: list | None = None, interval: float = 0.5) -> tuple[int, int]:
+        """
+        Start the workers once and stream batches of flows to them round robin
+
+        Args:
+            batches (Iterable[list]): Lists of (packet bytes, packet count) flows
+            vary (list): Fields that are incremented per packet, empty to send identical packets
+            interval (float): Seconds between checks that a worker with a full queue is still alive
+
+        Returns:
+            tuple[int, int]: Total number of packets sent and number of packets that failed
+        """
+        vary = vary or []
+        counters = multiprocessing.Array("q", 2 * self.workers, lock=False)
+        job_queues = [multiprocessing.Queue(maxsize=STREAM_QUEUE_SIZE) for _ in range(self.workers)]
+        processes = []
+        for worker_id in range(self.workers):
+            process = multiprocessing.Process(target=stream_worker,
+                                              args=(worker_id, job_queues[worker_id], vary, counters, worker_id % self.cpus),
+                                              daemon=True)
+            process.start()
+            processes.append(process)
+
+        def put(worker_id: int, jobs: list | None) -> None:
+            # A worker that died does not drain its queue, its jobs are dropped and counted as failed
+            while processes[worker_id].is_alive():
+                try:
+                    job_queues[worker_id].put(jobs, timeout=interval)
+                    return
+                except queue.Full:
+                    continue
+
+        expected = 0
+        try:
+            for batch in batches:
+                for worker_id, jobs in enumerate(self.split_flows(flows=batch)):
+                    if len(jobs) > 0:
+                        expected += sum(job[1] for job in jobs)
+                        put(worker_id=worker_id, jobs=jobs)
+        finally:
+            for worker_id in range(self.workers):
+                put(worker_id=worker_id, jobs=None)
+            for process in processes:
+                process.join()
+
+        sent = sum(counters[2 * i] for i in range(self.workers))
+        return sent, expected - sent
+
+
+class PacedSender:
+    """
+    A class for sending packets with asyncio at a target rate, paced by a token bucket
+
+    The bucket holds up to burst tokens and refills at rate tokens per second, a token is one packet (pps)
+    or one bit (bps). Send times are taken from one absolute schedule, start + (tokens used - burst) / rate,
+    so a late packet does not push back the packets after it and the error does not accumulate (drift correction).
+    Packets are sent with the sink's send_async() so that a full socket buffer does not block the event loop,
+    a sink without it (a PcapWriter, or scapy's socket on Windows) is written to with its blocking send()
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(rate, unit, burst):
+            Initialize the token bucket
+
+            Args:
+                rate (float): Target rate, packets or bits per second
+                unit (str): "pps" for packets per second or "bps" for bits per second
+                burst (int): Bucket size in packets, packets that may be sent back to back after an idle period
+
+
+        wait_until(deadline):
+            Sleep until the deadline, the last stretch is spun out as asyncio.sleep() is not precise enough
+
+            Args:
+                deadline (float): time.perf_counter() value to wait for
+
+
+        run(packets, sink, dest_addr):
+            Send every packet through the sink at the target rate
+
+            Args:
+                packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+                sink (RawPacketSocket | PcapWriter): Where the packets are sent
+                dest_addr (str): Destination IPv4 address of the packets
+
+            Returns:
+                dict: sent, failed, elapsed (s), rate_pps, rate_bps, jitter (s) and missed deadlines of the run
+    """
+
+    # Initializer
+    def __init__(self, rate: float, unit: str = "pps", burst: int = 1) -> None:
+        """
+        Initialize the token bucket
+
+        Args:
+            rate (float): Target rate, packets or bits per second
+            unit (str): "pps" for packets per second or "bps" for bits per second
+            burst (int): Bucket size in packets, packets that may be sent back to back after an idle period
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be larger than 0")
+        if unit not in ("pps", "bps"):
+            raise ValueError(f"Unknown rate unit \"{unit}\"")
+        self.rate = rate
+        self.unit = unit
+        self.burst = max(1, burst)
+
+
+    # User-defined method
+    async def wait_until(self, deadline: float):
+        """
+        Sleep until the deadline, the last stretch is spun out as asyncio.sleep() is not precise enough
+
+        Args:
+            deadline (float): time.perf_counter() value to wait for
+        """
+        clock = time.perf_counter
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return
+            if remaining > SLEEP_GRANULARITY:
+                await asyncio.sleep(remaining - SLEEP_GRANULARITY)
+            else:
+                # Yield so that other tasks still run while spinning
+                await asyncio.sleep(0)
+
+
+    # User-defined method
+    async def run(self, packets, sink, dest_addr: str) -> dict:
+        """
+        Send every packet through the sink at the target rate
+
+        Args:
+            packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+            sink (RawPacketSocket | PcapWriter): Where the packets are sent
+            dest_addr (str): Destination IPv4 address of the packets
+
+        Returns:
+            dict: sent, failed, elapsed (s), rate_pps, rate_bps, jitter (s) and missed deadlines of the run
+        """
+        clock = time.perf_counter
+        per_bit = self.unit == "bps"
+        send_async = getattr(sink, "send_async", None)
+
+        sent = 0
+        failed = 0
+        bits = 0
+        missed = 0
+        tokens_used = 0.0
+        bucket = None
+        first_sent = last_sent = 0.0
+        first_bits = 0
+
+        # Running mean and variance of the lateness (Welford), so memory use does not grow with the run
+        lateness_count = 0
+        lateness_mean = 0.0
+        lateness_m2 = 0.0
+
+        start = clock()
+        for data in packets:
+            cost = len(data) * 8 if per_bit else 1
+            if bucket is None:
+                # The bucket starts full, burst packets of the first packet's size
+                bucket = self.burst * cost
+
+            tokens_used += cost
+            deadline = start + (tokens_used - bucket) / self.rate
+            await self.wait_until(deadline)
+
+            if send_async is not None:
+                delivered = await send_async(data, dest_addr)
+            else:
+                delivered = sink.send(data, dest_addr)
+            if delivered:
+                sent += 1
+                if sent == 1:
+                    first_sent = clock()
+                    first_bits = len(data) * 8
+                else:
+                    last_sent = clock()
+                    bits += len(data) * 8
+            else:
+                failed += 1
+
+            # A packet is late once it takes the send slot of the packet after it
+            lateness = max(0.0, clock() - deadline)
+            if lateness > cost / self.rate:
+                missed += 1
+            lateness_count += 1
+            delta = lateness - lateness_mean
+            lateness_mean += delta / lateness_count
+            lateness_m2 += delta * (lateness - lateness_mean)
+
+        elapsed = clock() - start
+
+        # The achieved rate is measured between the first and the last packet sent
+        rate_pps = 0.0
+        rate_bps = 0.0
+        if sent > 1 and last_sent > first_sent:
+            rate_pps = (sent - 1) / (last_sent - first_sent)
+            rate_bps = bits / (last_sent - first_sent)
+        elif sent == 1:
+            rate_bps = first_bits / elapsed if elapsed > 0 else 0.0
+
+        return {
+            "sent": sent,
+            "failed": failed,
+            "elapsed": elapsed,
+            "rate_pps": rate_pps,
+            "rate_bps": rate_bps,
+            "jitter": math.sqrt(lateness_m2 / lateness_count) if lateness_count > 1 else 0.0,
+            "missed": missed,
+        }
+
+
+class ReplayEngine:
+    """
+    A class for replaying the IPv4 packets of a pcap or pcapng file through a packet sink.
+    pcapng simple packet blocks have no timestamp, they are sent right after the packet before them
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(speed, src_addr, dest_addr, src_port, dest_port):
+            Initialize the replay timing and the rewrites
+
+            Args:
+                speed (float): Multiple of the original timing, e.g. 2.0 is twice as fast, 0 sends at top speed
+                src_addr (str | None): Rewrite the source address to this IPv4 address, None to keep it
+                dest_addr (str | None): Rewrite the destination address to this IPv4 address, None to keep it
+                src_port (int | None): Rewrite the TCP/UDP source port, None to keep it
+                dest_port (int | None): Rewrite the TCP/UDP destination port, None to keep it
+
+
+        run(filename, sink):
+            Stream the capture file through the sink, records are only copied when they are rewritten
+
+            Args:
+                filename (str): pcap or pcapng file to replay
+                sink (RawPacketSocket | PcapWriter): Where the packets are sent
+
+            Returns:
+                dict: sent, failed, skipped (not IPv4), late and elapsed (s) of the replay
+    """
+
+    # Initializer
+    def __init__(self, speed: float = 1.0, src_addr: str | None = None, dest_addr: str | None = None,
+                src_port: int | None = None, dest_port: int | None = None) -> None:
+        """
+        Initialize the replay timing and the rewrites
+
+        Args:
+            speed (float): Multiple of the original timing, e.g. 2.0 is twice as fast, 0 sends at top speed
+            src_addr (str | None): Rewrite the source address to this IPv4 address, None to keep it
+            dest_addr (str | None): Rewrite the destination address to this IPv4 address, None to keep it
+            src_port (int | None): Rewrite the TCP/UDP source port, None to keep it
+            dest_port (int | None): Rewrite the TCP/UDP destination port, None to keep it
+        """
+        if speed < 0:
+            raise ValueError("Speed must not be negative")
+        self.speed = speed
+        self.rewrites = {
+            "src_addr": socket.inet_aton(src_addr) if src_addr is not None else None,
+            "dest_addr": socket.inet_aton(dest_addr) if dest_addr is not None else None,
+            "src_port": src_port,
+            "dest_port": dest_port,
+        }
+        self.rewrite = any(value is not None for value in self.rewrites.values())
+
+
+    # User-defined method
+    def run(self, filename: str, sink) -> dict:
+        """
+        Stream the capture file through the sink, records are only copied when they are rewritten
+
+        Args:
+            filename (str): pcap or pcapng file to replay
+            sink (RawPacketSocket | PcapWriter): Where the packets are sent
+
+        Returns:
+            dict: sent, failed, skipped (not IPv4), late and elapsed (s) of the replay
+        """
+        clock = time.perf_counter
+        sent = 0
+        failed = 0
+        skipped = 0
+        late = 0
+        first_ts = None
+        start = clock()
+        # Destination addresses repeat a lot in captures, so their text form is cached
+        dest_names = {}
+
+        with PcapReader(filename=filename) as reader:
+            packets = reader.ipv4_packets()
+            try:
+                for timestamp, packet in packets:
+                    if packet is None:
+                        skipped += 1
+                        continue
+
+                    # A pcapng simple packet block before any timestamped packet has no timing, it is sent straight away
+                    if self.speed > 0 and timestamp is not None:
+                        if first_ts is None:
+                            first_ts = timestamp
+                            start = clock()
+                        # Deadlines come from the original timestamps, so waiting errors do not add up
+                        deadline = start + (timestamp - first_ts) / self.speed
+                        sleep_until(deadline)
+                        if clock() - deadline > REPLAY_LATE_THRESHOLD:
+                            late += 1
+
+                    if self.rewrite:
+                        packet = bytearray(packet)
+                        rewrite_packet(packet, **self.rewrites)
+
+                    dest_raw = bytes(packet[16:20])
+                    dest_addr = dest_names.get(dest_raw)
+                    if dest_addr is None:
+                        dest_addr = dest_names[dest_raw] = socket.inet_ntoa(dest_raw)
+
+                    if sink.send(packet, dest_addr):
+                        sent += 1
+                    else:
+                        failed += 1
+            finally:
+                # The memory map can only be closed once no slices of it are left, the generator holds the current record
+                packet = None
+                packets.close()
+
+        return {"sent": sent, "failed": failed, "skipped": skipped, "late": late, "elapsed": clock() - start}
@@ -0,0 +1,502 @@
+"""
+Packet Fuzzer Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    packet_fuzzer.py
+
+Purpose:
+    Lazily generate every combination, or a random sample, of packet field values such as port ranges,
+    TCP flag combinations, TTLs and payload corpora. Cases are decoded from a cursor position on demand,
+    so nothing is built up front and a run can be stopped and resumed from its cursor
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Optional payload corpus file with one payload per line
+
+Output file(s):
+    Optional cursor file that records how far a run has got
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://en.wikipedia.org/wiki/Mixed_radix
+https://en.wikipedia.org/wiki/Feistel_cipher
+https://en.wikipedia.org/wiki/Format-preserving_encryption#FPE_from_a_prefix_cipher
+https://prng.di.unimi.it/splitmix64.c
+https://www.rfc-editor.org/rfc/rfc793#section-3.1
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - bisect
+    - json
+    - math
+    - os
+    - random
+    - struct
+- custom module(s) from python scripts in the same directory
+    - packet_engine
+
+Known issues:
+    Random mode visits the cases in a keyed pseudo-random order without repeats, it is not cryptographically random.
+
+
+"""
+
+import bisect
+import json
+import math
+import os
+import random
+import struct
+from packet_engine import PacketTemplate, ones_complement_sum, PROTO_ICMP, PROTO_TCP, PROTO_UDP
+
+
+# Fields that can be fuzzed and the largest value of each, the payload is handled separately
+FUZZ_FIELD_LIMITS = {
+    "src_port": 0xFFFF,
+    "dest_port": 0xFFFF,
+    "ip_id": 0xFFFF,
+    "seq": 0xFFFFFFFF,
+    "ttl": 0xFF,
+    "tcp_flags": 0xFF,
+}
+
+# TCP flag letters as in scapy, e.g. "SA" is SYN+ACK
+TCP_FLAG_BITS = {"F": 0x01, "S": 0x02, "R": 0x04, "P": 0x08, "A": 0x10, "U": 0x20, "E": 0x40, "C": 0x80}
+
+FUZZ_MODES = ("product", "random")
+
+# Rounds of the Feistel network that shuffles the case order in random mode
+FEISTEL_ROUNDS = 4
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+# User-defined function
+def mix64(value: int) -> int:
+    """
+    Scramble a 64 bit integer with the splitmix64 finalizer
+
+    Args:
+        value (int): Integer to scramble
+
+    Returns:
+        int: The scrambled 64 bit integer
+    """
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+# User-defined function
+def replace_payload(data: bytes | bytearray, payload: bytes) -> bytearray:
+    """
+    Swap the payload of a serialized IPv4 TCP, UDP or ICMP packet, fixing the lengths and recomputing the checksums
+
+    Args:
+        data (bytes | bytearray): IPv4 packet with valid checksums that starts at the IP header
+        payload (bytes): The new payload
+
+    Returns:
+        bytearray: The packet with the new payload
+    """
+    ihl = (data[0] & 0x0F) * 4
+    proto = data[9]
+    if proto == PROTO_TCP:
+        l4_header = (data[ihl + 12] >> 4) * 4
+        checksum_offset = ihl + 16
+    elif proto == PROTO_UDP:
+        l4_header = 8
+        checksum_offset = ihl + 6
+    elif proto == PROTO_ICMP:
+        l4_header = 8
+        checksum_offset = ihl + 2
+    else:
+        raise ValueError(f"Unsupported IP protocol {proto} for a payload")
+
+    buffer = bytearray(data[:ihl + l4_header])
+    buffer += payload
+    l4_length = len(buffer) - ihl
+
+    struct.pack_into("!HH", buffer, 2, len(buffer), 0)   # Total length, and a fresh packet is never a fragment
+    struct.pack_into("!H", buffer, 10, 0)
+    struct.pack_into("!H", buffer, 10, ~ones_complement_sum(buffer, 0, ihl) & 0xFFFF)
+
+    # A UDP checksum of zero means that the checksum is not used, keep it that way
+    checksum_used = not (proto == PROTO_UDP and data[checksum_offset:checksum_offset + 2] == b"\x00\x00")
+    if proto == PROTO_UDP:
+        struct.pack_into("!H", buffer, ihl + 4, l4_length)
+    if not checksum_used:
+        return buffer
+
+    struct.pack_into("!H", buffer, checksum_offset, 0)
+    total = ones_complement_sum(buffer, ihl, len(buffer))
+    if proto != PROTO_ICMP:
+        # TCP and UDP checksums also cover a pseudo header of the addresses, protocol and L4 length
+        total += ones_complement_sum(bytes(buffer[12:20]) + struct.pack("!HH", proto, l4_length), 0, 12)
+        total = (total & 0xFFFF) + (total >> 16)
+    checksum = ~total & 0xFFFF
+    if checksum == 0 and proto == PROTO_UDP:
+        checksum = 0xFFFF
+    struct.pack_into("!H", buffer, checksum_offset, checksum)
+    return buffer
+
+
+class FieldValues:
+    """
+    A class for the values of one fuzzed field, a concatenation of ranges and lists that is indexed without expanding it
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(segments):
+            Initialize the values from ranges and lists
+
+            Args:
+                segments (list): range objects and lists of values, in order
+
+
+        __len__():
+            Number of values
+
+            Returns:
+                int: Number of values over every segment
+
+
+        __getitem__(index):
+            Value at an index, found with a binary search over the segment starts
+
+            Args:
+                index (int): Index of the value
+
+            Returns:
+                int | bytes: The value
+    """
+
+    # Initializer
+    def __init__(self, segments: list) -> None:
+        """
+        Initialize the values from ranges and lists
+
+        Args:
+            segments (list): range objects and lists of values, in order
+        """
+        self.segments = [segment for segment in segments if len(segment) > 0]
+        self.starts = []
+        self.length = 0
+        for segment in self.segments:
+            self.starts.append(self.length)
+            self.length += len(segment)
+
+
+    def __len__(self) -> int:
+        return self.length
+
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self.length:
+            raise IndexError("field value index out of range")
+        segment = bisect.bisect_right(self.starts, index) - 1
+        return self.segments[segment][index - self.starts[segment]]
+
+
+# User-defined function
+def parse_field_values(field: str, spec) -> FieldValues:
+    """
+    Parse the values of one field from a fuzz spec
+
+    Numbers are given as an integer, a "low-high" range or a list of both, e.g. "1024-65535" or [22, 80, "8000-8100"].
+    TCP flags may also be given as flag letters, e.g. ["S", "SA", "FPU"].
+    Payloads are a list of strings or {"corpus": "file.txt"} to read one payload per line of a file
+
+    Args:
+        field (str): Name of the field
+        spec (int | str | list | dict): Values of the field
+
+    Returns:
+        FieldValues: The values of the field
+
+    Raises:
+        ValueError: If the field or any of its values is invalid
+    """
+    if field == "payload":
+        if isinstance(spec, dict) and "corpus" in spec:
+            with open(spec["corpus"], "rb") as file:
+                payloads = [line.rstrip(b"\r\n") for line in file]
+        elif isinstance(spec, list) and all(isinstance(payload, str) for payload in spec):
+            payloads = [payload.encode("utf-8") for payload in spec]
+        else:
+            raise ValueError("payload must be a list of strings or {\"corpus\": file}")
+        if len(payloads) == 0:
+            raise ValueError("payload has no values")
+        return FieldValues(segments=[payloads])
+
+    if field not in FUZZ_FIELD_LIMITS:
+        raise ValueError(f"Field \"{field}\" can not be fuzzed")
+    limit = FUZZ_FIELD_LIMITS[field]
+
+    segments = []
+    for item in spec if isinstance(spec, list) else [spec]:
+        if isinstance(item, bool):
+            raise ValueError(f"Invalid value {item!r} for {field}")
+        if isinstance(item, str) and field == "tcp_flags" and item.isalpha():
+            if any(letter not in TCP_FLAG_BITS for letter in item.upper()):
+                raise ValueError(f"Invalid TCP flags {item!r}")
+            item = sum(TCP_FLAG_BITS[letter] for letter in set(item.upper()))
+        if isinstance(item, int):
+            low, high = item, item
+        elif isinstance(item, str) and item.replace("-", "", 1).isdigit():
+            low, _, high = item.partition("-")
+            low, high = int(low), int(high or low)
+        else:
+            raise ValueError(f"Invalid value {item!r} for {field}")
+        if not 0 <= low <= high <= limit:
+            raise ValueError(f"Value {item!r} for {field} is not within 0-{limit}")
+
+        # Single values are merged into one list, ranges stay lazy
+        if low == high:
+            if len(segments) == 0 or not isinstance(segments[-1], list):
+                segments.append([])
+            segments[-1].append(low)
+        else:
+            segments.append(range(low, high + 1))
+
+    values = FieldValues(segments=segments)
+    if len(values) == 0:
+        raise ValueError(f"{field} has no values")
+    return values
+
+
+class PacketFuzzer:
+    """
+    A class for lazily generating fuzzed variations of a packet, every case is decoded from its cursor position
+
+    Cases are numbered in mixed radix with one digit per field and the payload as the most significant digit,
+    so consecutive cases in product mode mostly change only the last field and only that field is patched.
+    Random mode visits the same cases in a pseudo-random order without repeats, by passing the cursor through a
+    keyed Feistel network over the next power of 4, cycle walking until the result is a valid case
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(data, fields, mode, seed):
+            Initialize the fuzzer with the packet to vary and the values of every fuzzed field
+
+            Args:
+                data (bytes): Serialized IPv4 packet with valid checksums, e.g. raw() of a scapy packet
+                fields (dict): FieldValues of every fuzzed field by field name
+                mode (str): "product" for every combination in order, "random" for a shuffled order
+                seed (int): Seed of the shuffled order of random mode
+
+
+        position(cursor):
+            Index of the case that is visited at a cursor position
+
+            Args:
+                cursor (int): Cursor position, 0 to total - 1
+
+            Returns:
+                int: Index of the case
+
+
+        case(cursor):
+            Field values of the case at a cursor position
+
+            Args:
+                cursor (int): Cursor position, 0 to total - 1
+
+            Returns:
+                dict: Value of every fuzzed field by field name
+
+
+        generate(start, count):
+            Lazily generate the packets of the cases from a cursor position
+
+            Args:
+                start (int): Cursor position of the first case
+                count (int | None): Number of cases, None for every case to the end
+
+            Returns:
+                Iterator[bytearray]: The template buffer of each case, it is reused so copy it to keep it
+
+
+        load_cursor(filename):
+            Read the cursor position of an earlier run of the same fuzz from a cursor file
+
+            Args:
+                filename (str): Cursor file, a missing file starts from 0
+
+            Returns:
+                int: Cursor position to resume from
+
+
+        save_cursor(filename, cursor):
+            Atomically write the cursor position to a cursor file
+
+            Args:
+                filename (str): Cursor file
+                cursor (int): Cursor position of the next case to send
+    """
+
+    # Initializer
+    def __init__(self, data: bytes, fields: dict, mode: str = "product", seed: int = 0) -> None:
+        """
+        Initialize the fuzzer with the packet to vary and the values of every fuzzed field
+
+        Args:
+            data (bytes): Serialized IPv4 packet with valid checksums, e.g. raw() of a scapy packet
+            fields (dict): FieldValues of every fuzzed field by field name
+            mode (str): "product" for every combination in order, "random" for a shuffled order
+            seed (int): Seed of the shuffled order of random mode
+        """
+        if mode not in FUZZ_MODES:
+            raise ValueError(f"Fuzz mode must be one of {', '.join(FUZZ_MODES)}")
+        if len(fields) == 0:
+            raise ValueError("No fields to fuzz")
+
+        self.data = bytes(data)
+        self.mode = mode
+        self.seed = seed
+        self.names = sorted(fields, key=lambda name: name != "payload")
+        self.values = [fields[name] for name in self.names]
+        self.total = math.prod(len(values) for values in self.values)
+
+        template = PacketTemplate(data=self.data)
+        for name in self.names:
+            if name != "payload" and name not in template.field_offsets:
+                raise ValueError(f"Field \"{name}\" can not be fuzzed for this packet type")
+
+        # Feistel network over 2 * half_bits bits, the smallest even width that holds every case
+        self.half_bits = ((self.total - 1).bit_length() + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        keys = random.Random(seed)
+        self.round_keys = [keys.getrandbits(64) for _ in range(FEISTEL_ROUNDS)]
+
+
+    # User-defined method
+    def position(self, cursor: int) -> int:
+        """
+        Index of the case that is visited at a cursor position
+
+        Args:
+            cursor (int): Cursor position, 0 to total - 1
+
+        Returns:
+            int: Index of the case
+        """
+        if self.mode == "product":
+            return cursor
+
+        # A permutation of 0 to 4^half_bits - 1, applied again until the index is a case, which stays a permutation
+        index = cursor
+        while True:
+            left = index >> self.half_bits
+            right = index & self.half_mask
+            for key in self.round_keys:
+                left, right = right, left ^ (mix64(right ^ key) & self.half_mask)
+            index = (left << self.half_bits) | right
+            if index < self.total:
+                return index
+
+
+    # User-defined method
+    def case(self, cursor: int) -> dict:
+        """
+        Field values of the case at a cursor position
+
+        Args:
+            cursor (int): Cursor position, 0 to total - 1
+
+        Returns:
+            dict: Value of every fuzzed field by field name
+        """
+        index = self.position(cursor)
+        case = {}
+        for name, values in zip(reversed(self.names), reversed(self.values)):
+            index, digit = divmod(index, len(values))
+            case[name] = values[digit]
+        return case
+
+
+    # User-defined method
+    def generate(self, start: int = 0, count: int | None = None):
+        """
+        Lazily generate the packets of the cases from a cursor position
+
+        Args:
+            start (int): Cursor position of the first case
+            count (int | None): Number of cases, None for every case to the end
+
+        Returns:
+            Iterator[bytearray]: The template buffer of each case, it is reused so copy it to keep it
+        """
+        end = self.total if count is None else min(self.total, start + count)
+        radices = [len(values) for values in self.values]
+        fields = len(self.names)
+        has_payload = self.names[0] == "payload"
+        first_field = 1 if has_payload else 0
+
+        template = PacketTemplate(data=self.data)
+        current = [None] * fields
+        digits = [0] * fields
+
+        for cursor in range(start, end):
+            index = self.position(cursor)
+            for k in range(fields - 1, -1, -1):
+                index, digits[k] = divmod(index, radices[k])
+
+            # A new payload changes the packet length, so the template is rebuilt and every field is set again
+            if has_payload and digits[0] != current[0]:
+                template = PacketTemplate(data=replace_payload(self.data, self.values[0][digits[0]]))
+                current = [None] * fields
+                current[0] = digits[0]
+
+            for k in range(first_field, fields):
+                if digits[k] != current[k]:
+                    template.set_field(self.names[k], self.values[k][digits[k]])
+                    current[k] = digits[k]
+            yield template.buffer
+
+
+    # User-defined method
+    def load_cursor(self, filename: str) -> int:
+        """
+        Read the cursor position of an earlier run of the same fuzz from a cursor file
+
+        Args:
+            filename (str): Cursor file, a missing file starts from 0
+
+        Returns:
+            int: Cursor position to resume from
+        """
+        if not os.path.exists(filename):
+            return 0
+        with open(filename, "r", encoding="utf-8") as file:
+            state = json.load(file)
+        if (state.get("total"), state.get("mode"), state.get("seed")) != (self.total, self.mode, self.seed):
+            raise ValueError(f"Cursor file {filename} belongs to a different fuzz run")
+        return min(int(state["cursor"]), self.total)
+
+
+    # User-defined method
+    def save_cursor(self, filename: str, cursor: int):
+        """
+        Atomically write the cursor position to a cursor file
+
+        Args:
+            filename (str): Cursor file
+            cursor (int): Cursor position of the next case to send
+        """
+        temp_filename = f"{filename}.tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            json.dump({"cursor": cursor, "total": self.total, "mode": self.mode, "seed": self.seed}, file)
+        os.replace(temp_filename, filename)
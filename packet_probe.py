@@ -0,0 +1,399 @@
+"""
+Packet Probe Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    packet_probe.py
+
+Purpose:
+    Send probes and match the replies to them through a hash index, to measure the RTT of every probe and the loss
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://www.kernel.org/doc/html/latest/networking/filter.html
+https://man7.org/linux/man-pages/man7/raw.7.html
+https://www.rfc-editor.org/rfc/rfc792
+https://docs.python.org/3/library/selectors.html
+https://docs.python.org/3/library/socket.html#socket.socket.recv_into
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - array
+    - ctypes
+    - math
+    - selectors
+    - socket
+    - struct
+    - sys
+    - threading
+    - time
+- custom module(s) from python scripts in the same directory
+    - packet_engine
+
+Known issues:
+    Replies are captured with Linux raw sockets and a classic BPF socket filter, other platforms are not supported.
+    UDP probes are told apart by their source port only, so at most 65535 UDP probes can be outstanding.
+    An ICMP error that quotes only the first 8 bytes of a TCP probe can not be matched, as the probe's flags are cut off.
+    A probe to its own source address whose source port is the target port is only matched by an ICMP error, a TCP or UDP
+    reply to it has the same addresses and ports as the probe itself.
+
+
+"""
+
+import array
+import ctypes
+import math
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+from packet_engine import RawPacketSocket, PacketTemplate, PROTO_ICMP, PROTO_TCP, PROTO_UDP
+
+
+# setsockopt() option to attach a classic BPF program to a socket, from <asm-generic/socket.h>
+SO_ATTACH_FILTER = 26
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+# ICMP errors carry the IP header and first 8 bytes of the packet that caused them
+ICMP_ERROR_TYPES = (3, 4, 5, 11, 12)
+
+RECEIVE_BUFFER_BYTES = 16 * 1024 * 1024
+NAN = float("nan")
+
+
+# User-defined function
+def probe_key(data: bytes | bytearray | memoryview, ihl: int) -> tuple | None:
+    """
+    Key of a probe from the packet that was sent, the 5-tuple (and the TCP sequence number that a reply acknowledges)
+    or the ICMP ID and sequence number. The addresses are left out as every probe of a run goes to the same target
+
+    Args:
+        data (bytes | bytearray | memoryview): IPv4 packet that starts at the IP header
+        ihl (int): Length of the IP header in bytes
+
+    Returns:
+        tuple | None: Key of the probe, None if it is not a TCP, UDP or ICMP echo packet, or a TCP header that is
+                      cut off before its flags (an ICMP error that quotes only 8 bytes of it)
+    """
+    proto = data[9]
+    if proto == PROTO_TCP:
+        if len(data) < ihl + 14:
+            return None
+        sport, dport, seq, _, offset_flags = struct.unpack_from("!HHIIH", data, ihl)
+        (tot_len,) = struct.unpack_from("!H", data, 2)
+        # A SYN-ACK or RST acknowledges seq + the segment length, the payload plus 1 for each of SYN and FIN (RFC 793)
+        seg_len = tot_len - ihl - (offset_flags >> 12) * 4 + ((offset_flags >> 1) & 1) + (offset_flags & 1)
+        return (PROTO_TCP, sport, dport, (seq + seg_len) & 0xFFFFFFFF)
+    elif proto == PROTO_UDP:
+        sport, dport = struct.unpack_from("!HH", data, ihl)
+        return (PROTO_UDP, sport, dport)
+    elif proto == PROTO_ICMP and data[ihl] == ICMP_ECHO_REQUEST:
+        ident, seq = struct.unpack_from("!HH", data, ihl + 4)
+        return (PROTO_ICMP, ident, seq)
+    return None
+
+
+# User-defined function
+def reply_key(data: bytes | bytearray | memoryview, length: int, target_port: int, source: bytes) -> tuple | None:
+    """
+    Key of the probe that a received packet replies to, so that the reply is matched with one hash lookup.
+    The probes themselves are captured as well when the target is a local address, a TCP or UDP packet is only
+    a reply if it comes from the target port and is not sent from the probes' source address to the target port
+
+    Args:
+        data (bytes | bytearray | memoryview): Received IPv4 packet that starts at the IP header
+        length (int): Number of bytes received
+        target_port (int): Destination port of the TCP or UDP probes, ignored for ICMP
+        source (bytes): Source IPv4 address of the probes, 4 bytes
+
+    Returns:
+        tuple | None: Key of the probe that the packet replies to, None if the packet is not a reply
+    """
+    if length < 20:
+        return None
+    ihl = (data[0] & 0x0F) * 4
+    proto = data[9]
+
+    if proto == PROTO_TCP and length >= ihl + 12:
+        # The acknowledgment number is the sequence number that probe_key() expects the probe to be acknowledged with
+        sport, dport, _, ack = struct.unpack_from("!HHII", data, ihl)
+        if sport == target_port and not (dport == target_port and data[12:16] == source):
+            return (PROTO_TCP, dport, sport, ack)
+    elif proto == PROTO_UDP and length >= ihl + 4:
+        sport, dport = struct.unpack_from("!HH", data, ihl)
+        if sport == target_port and not (dport == target_port and data[12:16] == source):
+            return (PROTO_UDP, dport, sport)
+    elif proto == PROTO_ICMP and length >= ihl + 8:
+        icmp_type = data[ihl]
+        if icmp_type == ICMP_ECHO_REPLY:
+            ident, seq = struct.unpack_from("!HH", data, ihl + 4)
+            return (PROTO_ICMP, ident, seq)
+        elif icmp_type in ICMP_ERROR_TYPES and length >= ihl + 8 + 28:
+            # e.g. port unreachable, the key is taken from the embedded probe
+            inner = ihl + 8
+            inner_ihl = (data[inner] & 0x0F) * 4
+            if length >= inner + inner_ihl + 8:
+                return probe_key(memoryview(data)[inner:length], inner_ihl)
+    return None
+
+
+# User-defined function
+def source_filter(src_addr: str) -> bytes:
+    """
+    Assemble a classic BPF program that accepts packets from src_addr, and ICMP packets from anywhere (errors from routers).
+    Equivalent to the filter expression "src host <src_addr> or icmp"
+
+    Args:
+        src_addr (str): IPv4 address of the probe target
+
+    Returns:
+        bytes: Array of struct sock_filter {u16 code; u8 jt; u8 jf; u32 k}
+    """
+    (target,) = struct.unpack("!I", socket.inet_aton(src_addr))
+    program = [
+        (0x20, 0, 0, 12),        # ld [12]           IP source address
+        (0x15, 2, 0, target),    # jeq #target       accept
+        (0x30, 0, 0, 9),         # ldb [9]           IP protocol
+        (0x15, 0, 1, PROTO_ICMP),  # jeq #1          accept, else drop
+        (0x06, 0, 0, 0xFFFF),    # ret #65535        accept
+        (0x06, 0, 0, 0),         # ret #0            drop
+    ]
+    return b"".join(struct.pack("HBBI", *instruction) for instruction in program)
+
+
+class ReplyListener:
+    """
+    A class for capturing replies on raw sockets in a background thread and handing their keys to a callback
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(target, target_port, source, protos, on_reply):
+            Open one raw socket per protocol, attach the BPF filter and start the capture thread
+
+            Args:
+                target (str): IPv4 address of the probe target
+                target_port (int): Destination port of the TCP or UDP probes, 0 for ICMP probes
+                source (str): Source IPv4 address of the probes
+                protos (set): IP protocols to capture, ICMP is always captured for errors
+                on_reply (Callable): Called with the reply key and the receive time of every reply
+
+
+        capture():
+            Read packets until stopped, a preallocated buffer is reused so that no bytes are copied per packet
+
+
+        stop():
+            Stop the capture thread and close the sockets
+    """
+
+    # Initializer
+    def __init__(self, target: str, target_port: int, source: str, protos: set, on_reply) -> None:
+        """
+        Open one raw socket per protocol, attach the BPF filter and start the capture thread
+
+        Args:
+            target (str): IPv4 address of the probe target
+            target_port (int): Destination port of the TCP or UDP probes, 0 for ICMP probes
+            source (str): Source IPv4 address of the probes
+            protos (set): IP protocols to capture, ICMP is always captured for errors
+            on_reply (Callable): Called with the reply key and the receive time of every reply
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("Capturing replies needs Linux raw sockets")
+
+        self.on_reply = on_reply
+        self.target_port = target_port
+        self.source = socket.inet_aton(source)
+        self.running = True
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+
+        program = source_filter(src_addr=target)
+        # The program must stay in memory while setsockopt() copies it
+        filter_buffer = ctypes.create_string_buffer(program)
+        fprog = struct.pack("HL", len(program) // 8, ctypes.addressof(filter_buffer))
+
+        for proto in sorted(protos | {PROTO_ICMP}):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, proto)
+            sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_BYTES)
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ)
+            self.sockets.append(sock)
+
+        self.thread = threading.Thread(target=self.capture, daemon=True)
+        self.thread.start()
+
+
+    # User-defined method
+    def capture(self):
+        """
+        Read packets until stopped, a preallocated buffer is reused so that no bytes are copied per packet
+        """
+        buffer = bytearray(65535)
+        clock = time.perf_counter
+        on_reply = self.on_reply
+        target_port = self.target_port
+        source = self.source
+
+        while self.running:
+            for key, _ in self.selector.select(timeout=0.05):
+                sock = key.fileobj
+                while True:
+                    try:
+                        length = sock.recv_into(buffer)
+                    except (BlockingIOError, OSError):
+                        break
+                    received = clock()
+                    reply = reply_key(buffer, length, target_port, source)
+                    if reply is not None:
+                        on_reply(reply, received)
+
+
+    # User-defined method
+    def stop(self):
+        """
+        Stop the capture thread and close the sockets
+        """
+        self.running = False
+        self.thread.join()
+        self.selector.close()
+        for sock in self.sockets:
+            sock.close()
+
+
+class ProbeEngine:
+    """
+    A class for sending probes and matching their replies in O(1) through a hash index of the outstanding probes
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(timeout):
+            Initialize the engine
+
+            Args:
+                timeout (float): Seconds to wait for replies after the last probe is sent
+
+
+        run(data, pkt_count):
+            Send pkt_count probes that are varied from one packet and match the replies to them
+
+            Args:
+                data (bytes): Serialized IPv4 TCP, UDP or ICMP echo packet with valid checksums
+                pkt_count (int): Number of probes to send
+
+            Returns:
+                dict: sent, received, lost, loss (%), duplicates, rtt_min, rtt_avg, rtt_max, rtt_stddev (s),
+                      and rtts, the RTT in seconds of every probe in send order, NaN if it was lost
+    """
+
+    # Initializer
+    def __init__(self, timeout: float = 2.0) -> None:
+        """
+        Initialize the engine
+
+        Args:
+            timeout (float): Seconds to wait for replies after the last probe is sent
+        """
+        self.timeout = timeout
+
+
+    # User-defined method
+    def run(self, data: bytes, pkt_count: int) -> dict:
+        """
+        Send pkt_count probes that are varied from one packet and match the replies to them
+
+        Args:
+            data (bytes): Serialized IPv4 TCP, UDP or ICMP echo packet with valid checksums
+            pkt_count (int): Number of probes to send
+
+        Returns:
+            dict: sent, received, lost, loss (%), duplicates, rtt_min, rtt_avg, rtt_max, rtt_stddev (s),
+                  and rtts, the RTT in seconds of every probe in send order, NaN if it was lost
+        """
+        template = PacketTemplate(data=data)
+        if template.proto == PROTO_UDP:
+            if pkt_count > 65535:
+                raise ValueError("At most 65535 UDP probes can be told apart by their source port")
+            vary = ["src_port"]
+        else:
+            # TCP probes are keyed on the sequence number too, ICMP probes on the echo ID and sequence number
+            vary = ["src_port", "seq"]
+
+        # Hash index of the outstanding probes, key -> probe number
+        index = {}
+        send_times = array.array("d", [NAN]) * pkt_count
+        rtts = array.array("d", [NAN]) * pkt_count
+        counters = {"received": 0, "duplicates": 0}
+        all_received = threading.Event()
+
+        def on_reply(key: tuple, received: float):
+            probe = index.get(key)
+            if probe is None:
+                return
+            if rtts[probe] == rtts[probe]:   # Not NaN, already matched
+                counters["duplicates"] += 1
+                return
+            rtts[probe] = received - send_times[probe]
+            counters["received"] += 1
+            if counters["received"] == pkt_count:
+                all_received.set()
+
+        if template.proto == PROTO_ICMP:
+            target_port = 0
+        else:
+            (target_port,) = struct.unpack_from("!H", template.buffer, template.ihl + 2)
+        listener = ReplyListener(target=template.dest_addr, target_port=target_port, source=socket.inet_ntoa(template.buffer[12:16]),
+                                 protos={template.proto}, on_reply=on_reply)
+        sent = 0
+        try:
+            clock = time.perf_counter
+            ihl = template.ihl
+            with RawPacketSocket() as sock:
+                for probe, packet in enumerate(template.generate(pkt_count=pkt_count, vary=vary)):
+                    # Indexed before sending, a loopback reply can arrive before sendto() returns
+                    index[probe_key(packet, ihl)] = probe
+                    send_times[probe] = clock()
+                    if sock.send(packet, template.dest_addr):
+                        sent += 1
+            all_received.wait(timeout=self.timeout)
+        finally:
+            listener.stop()
+
+        matched = [rtt for rtt in rtts if rtt == rtt]
+        received = len(matched)
+        rtt_avg = sum(matched) / received if received > 0 else NAN
+        return {
+            "sent": sent,
+            "received": received,
+            "lost": sent - received,
+            "loss": 100.0 * (sent - received) / sent if sent > 0 else 0.0,
+            "duplicates": counters["duplicates"],
+            "rtt_min": min(matched) if received > 0 else NAN,
+            "rtt_avg": rtt_avg,
+            "rtt_max": max(matched) if received > 0 else NAN,
+            "rtt_stddev": math.sqrt(sum((rtt - rtt_avg) ** 2 for rtt in matched) / received) if received > 0 else NAN,
+            "rtts": rtts,
+        }
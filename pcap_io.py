@@ -0,0 +1,585 @@
+"""
+PCAP Input/Output Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    pcap_io.py
+
+Purpose:
+    Stream crafted packets to pcap or pcapng capture files in large buffered batches, and read
+    capture files through a memory-mapped, zero-copy record iterator
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Capture file (.pcap or .pcapng) that is specified by the user
+
+Output file(s):
+    Capture file (.pcap or .pcapng) that is specified by the user
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://wiki.wireshark.org/Development/LibpcapFileFormat
+https://www.ietf.org/archive/id/draft-ietf-opsawg-pcapng-01.html
+https://www.tcpdump.org/linktypes.html
+https://docs.python.org/3/library/struct.html#struct.Struct
+https://docs.python.org/3/library/mmap.html
+https://docs.python.org/3/library/stdtypes.html#memoryview
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - mmap
+    - struct
+    - time
+
+Known issues:
+    Nil
+
+
+"""
+
+import mmap
+import struct
+import time
+
+
+# Packets are IPv4 packets without a link layer header
+LINKTYPE_RAW = 101
+SNAPLEN = 65535
+
+# Link layer types the reader can strip down to the IPv4 packet
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = 0x8100
+
+# Bytes that are buffered in memory before they are written to the capture file
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+
+PCAP_GLOBAL_HEADER = struct.Struct("<IHHiIII")
+PCAP_RECORD_HEADER = struct.Struct("<IIII")
+PCAPNG_BLOCK_HEADER = struct.Struct("<II")
+PCAPNG_EPB_HEADER = struct.Struct("<IIIIIII")
+
+
+class PcapWriter:
+    """
+    A class for writing packets to a pcap or pcapng file in buffered batches, instead of one wrpcap() per packet
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(filename, batch_bytes, pcapng):
+            Open the capture file and write the file header
+
+            Args:
+                filename (str): Name of the capture file, a ".pcapng" extension selects the pcapng format
+                batch_bytes (int): Bytes that are buffered before they are written to the file
+                pcapng (bool | None): True for pcapng, False for pcap, None to choose by the file extension
+
+
+        write(data, timestamp):
+            Add one packet record to the buffer, the buffer is flushed once it is larger than batch_bytes
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                timestamp (float | None): Capture time of the packet in seconds, defaults to the current time
+
+
+        send(data, dest_addr):
+            Write one packet, so that the writer can be used in place of a RawPacketSocket
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                dest_addr (str): Unused, the destination address is in the packet
+
+            Returns:
+                bool: True if the packet is written successfully, False otherwise
+
+
+        send_burst(data, dest_addr, pkt_count):
+            Write the same packet a number of times
+
+            Args:
+                data (bytes): Raw IPv4 packet including the IP header
+                dest_addr (str): Unused, the destination address is in the packet
+                pkt_count (int): Number of times to write the packet
+
+            Returns:
+                tuple[int, int]: Number of packets written and number of packets that failed
+
+
+        send_many(packets, dest_addr):
+            Write every packet of an iterable
+
+            Args:
+                packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+                dest_addr (str): Unused, the destination address is in the packet
+
+            Returns:
+                tuple[int, int]: Number of packets written and number of packets that failed
+
+
+        flush():
+            Write the buffered records to the capture file, the records are dropped if the write fails
+
+            Raises:
+                OSError: If the capture file can not be written, e.g. when the disk is full
+
+
+        close():
+            Flush the buffered records and close the capture file
+    """
+
+    # Initializer
+    def __init__(self, filename: str, batch_bytes: int = DEFAULT_BATCH_BYTES, pcapng: bool | None = None) -> None:
+        """
+        Open the capture file and write the file header
+
+        Args:
+            filename (str): Name of the capture file, a ".pcapng" extension selects the pcapng format
+            batch_bytes (int): Bytes that are buffered before they are written to the file
+            pcapng (bool | None): True for pcapng, False for pcap, None to choose by the file extension
+        """
+        self.filename = filename
+        self.batch_bytes = batch_bytes
+        self.pcapng = filename.lower().endswith(".pcapng") if pcapng is None else pcapng
+        self.buffer = bytearray()
+        self.packets = 0
+        # Records in self.buffer, and records that were dropped by the last flush() that failed
+        self.buffered_packets = 0
+        self.dropped_packets = 0
+
+        # Unbuffered as records are already batched in self.buffer
+        self.file = open(filename, "wb", buffering=0)
+
+        if self.pcapng:
+            # Section header block, byte order magic, version 1.0 and an unspecified section length
+            shb_body = struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1)
+            self.buffer += self.pcapng_block(0x0A0D0D0A, shb_body)
+            # Interface description block, microsecond timestamps are the default
+            idb_body = struct.pack("<HHI", LINKTYPE_RAW, 0, SNAPLEN)
+            self.buffer += self.pcapng_block(0x00000001, idb_body)
+        else:
+            self.buffer += PCAP_GLOBAL_HEADER.pack(0xA1B2C3D4, 2, 4, 0, 0, SNAPLEN, LINKTYPE_RAW)
+
+
+    # User-defined method
+    def pcapng_block(self, block_type: int, body: bytes) -> bytes:
+        """
+        Wrap a block body with the pcapng block type and the leading and trailing block lengths
+
+        Args:
+            block_type (int): pcapng block type
+            body (bytes): Block body, padded to 32 bits
+
+        Returns:
+            bytes: The complete block
+        """
+        length = 12 + len(body)
+        return PCAPNG_BLOCK_HEADER.pack(block_type, length) + body + struct.pack("<I", length)
+
+
+    # User-defined method
+    def write(self, data: bytes, timestamp: float | None = None):
+        """
+        Add one packet record to the buffer, the buffer is flushed once it is larger than batch_bytes
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            timestamp (float | None): Capture time of the packet in seconds, defaults to the current time
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        length = len(data)
+
+        if self.pcapng:
+            micros = int(timestamp * 1_000_000)
+            padding = -length % 4
+            block_length = 32 + length + padding
+            self.buffer += PCAPNG_EPB_HEADER.pack(0x00000006, block_length, 0, micros >> 32, micros & 0xFFFFFFFF, length, length)
+            self.buffer += data
+            self.buffer += b"\x00" * padding + block_length.to_bytes(4, "little")
+        else:
+            seconds = int(timestamp)
+            self.buffer += PCAP_RECORD_HEADER.pack(seconds, int((timestamp - seconds) * 1_000_000), length, length)
+            self.buffer += data
+
+        self.packets += 1
+        self.buffered_packets += 1
+        if len(self.buffer) >= self.batch_bytes:
+            self.flush()
+
+
+    # User-defined method
+    def send(self, data: bytes, dest_addr: str) -> bool:
+        """
+        Write one packet, so that the writer can be used in place of a RawPacketSocket
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            dest_addr (str): Unused, the destination address is in the packet
+
+        Returns:
+            bool: True if the packet is written successfully, False otherwise
+        """
+        try:
+            self.write(data)
+            return True
+        except OSError:
+            return False
+
+
+    # User-defined method
+    def send_burst(self, data: bytes, dest_addr: str, pkt_count: int) -> tuple[int, int]:
+        """
+        Write the same packet a number of times
+
+        Args:
+            data (bytes): Raw IPv4 packet including the IP header
+            dest_addr (str): Unused, the destination address is in the packet
+            pkt_count (int): Number of times to write the packet
+
+        Returns:
+            tuple[int, int]: Number of packets written and number of packets that failed
+        """
+        return self.send_many(packets=(data for _ in range(pkt_count)), dest_addr=dest_addr)
+
+
+    # User-defined method
+    def send_many(self, packets, dest_addr: str) -> tuple[int, int]:
+        """
+        Write every packet of an iterable
+
+        Args:
+            packets (Iterable[bytes]): Raw IPv4 packets including the IP header
+            dest_addr (str): Unused, the destination address is in the packet
+
+        Returns:
+            tuple[int, int]: Number of packets written and number of packets that failed
+        """
+        written = 0
+        write = self.write
+        packets = iter(packets)
+        try:
+            # One timestamp per call keeps time.time() out of the per packet loop
+            timestamp = time.time()
+            for data in packets:
+                write(data, timestamp)
+                written += 1
+        except OSError:
+            # The failed flush dropped this packet and the ones of this call that were still buffered, the records of
+            # earlier calls that it dropped were already reported by them. The rest of the packets are not written either
+            dropped = min(written + 1, self.dropped_packets)
+            self.dropped_packets = 0
+            return written - (dropped - 1), dropped + sum(1 for _ in packets)
+        return written, 0
+
+
+    # User-defined method
+    def flush(self):
+        """
+        Write the buffered records to the capture file, the records are dropped if the write fails
+
+        Raises:
+            OSError: If the capture file can not be written, e.g. when the disk is full
+        """
+        if len(self.buffer) == 0:
+            return
+        view = memoryview(self.buffer)
+        offset = 0
+        try:
+            # A raw file write may write only part of the buffer, e.g. when it is interrupted by a signal
+            while offset < len(view):
+                offset += self.file.write(view[offset:])
+        except OSError:
+            self.dropped_packets = self.buffered_packets
+            raise
+        finally:
+            view.release()
+            self.buffer = bytearray()
+            self.buffered_packets = 0
+
+
+    # User-defined method
+    def close(self):
+        """
+        Flush the buffered records and close the capture file
+        """
+        try:
+            self.flush()
+        finally:
+            self.file.close()
+
+
+    def __enter__(self) -> "PcapWriter":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class PcapReader:
+    """
+    A class for reading a pcap or pcapng file through a memory-mapped, zero-copy record iterator.
+    Unlike scapy's rdpcap() the capture is never loaded into memory as a whole, pages are read in by the OS as they are used
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(filename):
+            Memory-map the capture file and read the file header
+
+            Args:
+                filename (str): Name of the pcap or pcapng file
+
+
+        records():
+            Lazily iterate over the packet records of the capture file
+
+            Returns:
+                Iterator[tuple[float | None, int, memoryview]]: Timestamp in seconds, link layer type and the record bytes,
+                    the timestamp is None for a pcapng simple packet block before any timestamped packet
+
+
+        pcapng_records():
+            Lazily iterate over the enhanced and simple packet blocks of a pcapng file, a simple packet block has no
+            timestamp of its own and takes the timestamp of the packet before it
+
+            Returns:
+                Iterator[tuple[float | None, int, memoryview]]: Timestamp in seconds, link layer type and the record bytes,
+                    the timestamp is None for a simple packet block before any timestamped packet
+
+
+        tsresol(view, start, end, endian):
+            Read the if_tsresol option of an interface description block
+
+            Args:
+                view (memoryview): The capture file
+                start (int): Offset of the first option
+                end (int): Offset after the last option
+                endian (str): "<" or ">", byte order of the section
+
+            Returns:
+                int: Timestamp units per second, microseconds if the option is missing
+
+
+        ipv4_packets():
+            Lazily iterate over the IPv4 packets of the capture file, link layer headers are sliced off without copying
+
+            Returns:
+                Iterator[tuple[float | None, memoryview | None]]: Timestamp and the IPv4 packet, None for records that are not IPv4
+                    or whose total length is shorter than the IP header
+
+
+        close():
+            Release the memory map and close the capture file, the map stays until slices of it that are still referenced are freed
+    """
+
+    # Initializer
+    def __init__(self, filename: str) -> None:
+        """
+        Memory-map the capture file and read the file header
+
+        Args:
+            filename (str): Name of the pcap or pcapng file
+        """
+        self.file = open(filename, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can not be mapped
+            self.file.close()
+            raise ValueError(f"\"{filename}\" is not a capture file")
+        self.view = memoryview(self.map)
+
+        magic = bytes(self.view[:4])
+        if magic == b"\x0a\x0d\x0d\x0a":
+            self.pcapng = True
+        elif magic in (b"\xd4\xc3\xb2\xa1", b"\x4d\x3c\xb2\xa1"):
+            self.pcapng = False
+            self.endian = "<"
+        elif magic in (b"\xa1\xb2\xc3\xd4", b"\xa1\xb2\x3c\x4d"):
+            self.pcapng = False
+            self.endian = ">"
+        else:
+            self.close()
+            raise ValueError(f"\"{filename}\" is not a capture file")
+
+        if not self.pcapng:
+            # The 0xa1b23c4d magic number has nanosecond timestamps
+            self.ts_divisor = 1_000_000_000 if magic in (b"\x4d\x3c\xb2\xa1", b"\xa1\xb2\x3c\x4d") else 1_000_000
+            (self.linktype,) = struct.unpack_from(f"{self.endian}I", self.view, 20)
+
+
+    # User-defined method
+    def records(self):
+        """
+        Lazily iterate over the packet records of the capture file
+
+        Returns:
+            Iterator[tuple[float | None, int, memoryview]]: Timestamp in seconds, link layer type and the record bytes,
+                the timestamp is None for a pcapng simple packet block before any timestamped packet
+        """
+        if self.pcapng:
+            yield from self.pcapng_records()
+            return
+
+        view = self.view
+        size = len(view)
+        record_header = struct.Struct(f"{self.endian}IIII")
+        linktype = self.linktype
+        ts_divisor = self.ts_divisor
+        offset = 24
+
+        while offset + 16 <= size:
+            seconds, fraction, incl_len, _ = record_header.unpack_from(view, offset)
+            offset += 16
+            if offset + incl_len > size:
+                break   # Truncated last record
+            yield seconds + fraction / ts_divisor, linktype, view[offset:offset + incl_len]
+            offset += incl_len
+
+
+    # User-defined method
+    def pcapng_records(self):
+        """
+        Lazily iterate over the enhanced and simple packet blocks of a pcapng file, a simple packet block has no
+        timestamp of its own and takes the timestamp of the packet before it
+
+        Returns:
+            Iterator[tuple[float | None, int, memoryview]]: Timestamp in seconds, link layer type and the record bytes,
+                the timestamp is None for a simple packet block before any timestamped packet
+        """
+        view = self.view
+        size = len(view)
+        endian = "<"
+        # Link layer type and timestamp units per second of every interface in the current section
+        interfaces = []
+        timestamp = None
+        offset = 0
+
+        while offset + 12 <= size:
+            if bytes(view[offset:offset + 4]) == b"\x0a\x0d\x0d\x0a":
+                # A section header block sets the byte order of its section
+                endian = "<" if bytes(view[offset + 8:offset + 12]) == b"\x4d\x3c\x2b\x1a" else ">"
+                interfaces = []
+            block_type, block_length = struct.unpack_from(f"{endian}II", view, offset)
+            if block_length < 12 or offset + block_length > size:
+                break   # Truncated or corrupt block
+
+            if block_type == 0x00000001:
+                linktype, _, _ = struct.unpack_from(f"{endian}HHI", view, offset + 8)
+                interfaces.append([linktype, self.tsresol(view, offset + 16, offset + block_length - 4, endian)])
+            elif block_type == 0x00000006 and len(interfaces) > 0:
+                interface_id, ts_high, ts_low, captured, _ = struct.unpack_from(f"{endian}IIIII", view, offset + 8)
+                if interface_id < len(interfaces):
+                    linktype, units = interfaces[interface_id]
+                    timestamp = ((ts_high << 32) | ts_low) / units
+                    yield timestamp, linktype, view[offset + 28:offset + 28 + captured]
+            elif block_type == 0x00000003 and len(interfaces) > 0:
+                # Simple packet blocks have no timestamp, so they follow the packet before them back to back
+                (original,) = struct.unpack_from(f"{endian}I", view, offset + 8)
+                captured = min(original, block_length - 16)
+                yield timestamp, interfaces[0][0], view[offset + 12:offset + 12 + captured]
+
+            offset += block_length
+
+
+    # User-defined method
+    def tsresol(self, view: memoryview, start: int, end: int, endian: str) -> int:
+        """
+        Read the if_tsresol option of an interface description block
+
+        Args:
+            view (memoryview): The capture file
+            start (int): Offset of the first option
+            end (int): Offset after the last option
+            endian (str): "<" or ">", byte order of the section
+
+        Returns:
+            int: Timestamp units per second, microseconds if the option is missing
+        """
+        offset = start
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(f"{endian}HH", view, offset)
+            if code == 0:
+                break
+            if code == 9 and length == 1:
+                resolution = view[offset + 4]
+                # The most significant bit selects a power of 2 instead of a power of 10
+                return 2 ** (resolution & 0x7F) if resolution & 0x80 else 10 ** resolution
+            offset += 4 + length + (-length % 4)
+        return 1_000_000
+
+
+    # User-defined method
+    def ipv4_packets(self):
+        """
+        Lazily iterate over the IPv4 packets of the capture file, link layer headers are sliced off without copying
+
+        Returns:
+            Iterator[tuple[float | None, memoryview | None]]: Timestamp and the IPv4 packet, None for records that are not IPv4
+                or whose total length is shorter than the IP header
+        """
+        for timestamp, linktype, record in self.records():
+            if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+                start = 0
+            elif linktype == LINKTYPE_ETHERNET and len(record) >= 14:
+                ethertype = (record[12] << 8) | record[13]
+                start = 14
+                if ethertype == ETHERTYPE_VLAN and len(record) >= 18:
+                    ethertype = (record[16] << 8) | record[17]
+                    start = 18
+                if ethertype != ETHERTYPE_IPV4:
+                    start = None
+            elif linktype == LINKTYPE_LINUX_SLL and len(record) >= 16:
+                start = 16 if ((record[14] << 8) | record[15]) == ETHERTYPE_IPV4 else None
+            elif linktype == LINKTYPE_NULL and len(record) >= 4:
+                start = 4
+            else:
+                start = None
+
+            if start is None or len(record) < start + 20 or record[start] >> 4 != 4:
+                yield timestamp, None
+                continue
+            # Sliced to the IP total length, so that Ethernet trailer padding of short packets is not sent as well
+            tot_len = (record[start + 2] << 8) | record[start + 3]
+            if tot_len < (record[start] & 0x0F) * 4:
+                yield timestamp, None
+            else:
+                yield timestamp, record[start:start + tot_len]
+
+
+    # User-defined method
+    def close(self):
+        """
+        Release the memory map and close the capture file, the map stays until slices of it that are still referenced are freed
+        """
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            # e.g. a packet that the traceback of an exception still refers to, this must not replace that exception
+            pass
+        self.file.close()
+
+
+    def __enter__(self) -> "PcapReader":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,778 @@
+"""
+Scan Benchmark Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_benchmark.py
+
+Purpose:
+    Benchmarks of the nmap scanner, no external network is needed
+    - the scan modes against TCP and UDP listeners on loopback addresses, recording hosts/s, ports/s, wall time
+      and peak memory to a JSON report that later runs can be compared against
+    - the asyncio TCP connect sweep against loopback listeners
+    - the memory and query time of the compact scan store against python-nmap's nested dicts
+    - the peak memory of the streaming XML parser against parsing the whole output at once like python-nmap does
+
+Usage syntax:
+    Run with command line in the directory where this script is located, e.g. python scan_benchmark.py --hosts 64 --ports 100
+    or python scan_benchmark.py --store-hosts 50000 for the scan store benchmark
+    or python scan_benchmark.py --stream-hosts 1000 10000 100000 for the streaming parser benchmark
+    or python scan_benchmark.py --scanner --hosts 16 --compare old_report.json for the scanner benchmark,
+    which needs nmap and administrator/root privileges
+    Linux routes the whole of 127.0.0.0/8 to the loopback interface, other platforms may only have 127.0.0.1
+
+Input file(s):
+    JSON report of an earlier scanner benchmark to compare against, if one is given
+
+Output file(s):
+    JSON report of the scanner benchmark, scan_benchmark_report.json by default
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/selectors.html
+https://docs.python.org/3/library/threading.html
+https://docs.python.org/3/library/time.html#time.perf_counter
+https://docs.python.org/3/library/tracemalloc.html
+https://docs.python.org/3/library/resource.html#resource.getrusage
+https://nmap.org/book/scan-methods-udp-scan.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - argparse
+    - json
+    - os
+    - platform
+    - resource
+    - selectors
+    - socket
+    - subprocess
+    - sys
+    - tempfile
+    - threading
+    - time
+    - tracemalloc
+    - xml.etree.ElementTree
+- required external modules installed using pip: pip install <module name>  # e.g. pip install rich
+    - python-nmap
+    - rich
+- custom module(s) from python scripts in the same directory
+    - nmap_scanner
+    - scan_targets
+    - scan_store
+    - scan_stream
+    - scan_sweep
+
+Known issues:
+    Peak memory is not recorded on Windows, which has no resource module
+
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from nmap_scanner import CustomNmapScanner
+from scan_store import ScanStore
+from scan_targets import TargetSet
+from scan_stream import NmapXMLParser, parse_host
+from scan_sweep import ConnectSweeper, DEFAULT_SWEEP_TIMEOUT, SWEEP_PORTS
+
+# Peak memory of a process is only available on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# First port of the ports that are swept, high enough to not need administrator/root privileges
+BASE_PORT = 20000
+
+# nmap's 10 most common UDP ports, the UDP half of "--top-ports 10"
+UDP_TOP_PORTS = (631, 161, 137, 123, 138, 1434, 445, 135, 67, 53)
+
+# Scan modes of the scanner benchmark, in the order they are run. "cached" fills the scan cache that "delta" compares against
+SCANNER_MODES = ("scan", "parallel", "cached", "delta", "stream", "sweep", "adaptive")
+
+# Ports that every mode probes on every host, the sweep only connects to the TCP ports
+PORTS_PER_HOST = {mode: len(SWEEP_PORTS) + len(UDP_TOP_PORTS) for mode in SCANNER_MODES}
+PORTS_PER_HOST["sweep"] = len(SWEEP_PORTS)
+
+# Report of the scanner benchmark
+BENCHMARK_REPORT = "scan_benchmark_report.json"
+
+# Services that the synthetic scan results of the scan store benchmark cycle through
+SYNTHETIC_SERVICES = (
+    ("ssh", "OpenSSH", "8.9p1 Ubuntu 3ubuntu0.1", "Ubuntu Linux; protocol 2.0", "cpe:/a:openbsd:openssh:8.9p1"),
+    ("http", "nginx", "1.18.0", "Ubuntu", "cpe:/a:igor_sysoev:nginx:1.18.0"),
+    ("microsoft-ds", "Samba smbd", "4.6.2", "workgroup: WORKGROUP", "cpe:/a:samba:samba"),
+)
+
+
+# User-defined function
+def synthetic_scan_result(host_count: int) -> dict:
+    """
+    Create a python-nmap scan result of many hosts, each with the TCP ports of the sweep and a few UDP ports
+
+    Args:
+        host_count (int): Number of hosts, from 10.0.0.1 on
+
+    Returns:
+        dict: The python-nmap scan result
+    """
+    scan = {}
+    for i in range(host_count):
+        address = socket.inet_ntoa((0x0A000001 + i).to_bytes(4, "big"))
+        host_result = {"hostnames": [{"name": f"host{i}.example.com", "type": "PTR"}],
+                       "addresses": {"ipv4": address}, "vendor": {}, "status": {"state": "up", "reason": "user-set"},
+                       "tcp": {}, "udp": {}}
+        for port in SWEEP_PORTS:
+            if (i + port) % 3 == 0:
+                name, product, version, extrainfo, cpe = SYNTHETIC_SERVICES[(i + port) % len(SYNTHETIC_SERVICES)]
+                host_result["tcp"][port] = {"state": "open", "reason": "syn-ack", "name": name, "product": product,
+                                            "version": version, "extrainfo": extrainfo, "conf": "10", "cpe": cpe}
+            else:
+                host_result["tcp"][port] = {"state": "closed", "reason": "conn-refused", "name": "", "product": "",
+                                            "version": "", "extrainfo": "", "conf": "", "cpe": ""}
+        for port in (53, 123, 161):
+            host_result["udp"][port] = {"state": "open|filtered", "reason": "no-response", "name": "", "product": "",
+                                        "version": "", "extrainfo": "", "conf": "", "cpe": ""}
+        scan[address] = host_result
+    return {"nmap": {"command_line": "", "scaninfo": {}, "scanstats": {}}, "scan": scan}
+
+
+class LoopbackListeners:
+    """
+    A class for TCP and UDP listeners on loopback addresses, served from a background thread.
+    TCP connections are accepted and closed, UDP datagrams are echoed back so that the port is seen as open
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(addresses, ports, udp_ports):
+            Bind a listening socket to every port of every address
+
+            Args:
+                addresses (list): Loopback IPv4 addresses, e.g. 127.0.0.2
+                ports (list): TCP ports to listen on
+                udp_ports (list): UDP ports to listen on
+
+
+        serve():
+            Accept and close connections and echo datagrams until the listeners are closed
+
+
+        close():
+            Stop the background thread and close every listening socket
+    """
+
+    # Initializer
+    def __init__(self, addresses: list, ports: list, udp_ports: list = ()) -> None:
+        """
+        Bind a listening socket to every port of every address
+
+        Args:
+            addresses (list): Loopback IPv4 addresses, e.g. 127.0.0.2
+            ports (list): TCP ports to listen on
+            udp_ports (list): UDP ports to listen on
+        """
+        self.selector = selectors.DefaultSelector()
+        self.listeners = []
+        for address in addresses:
+            for port in ports:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind((address, port))
+                listener.listen(1024)
+                listener.setblocking(False)
+                self.selector.register(listener, selectors.EVENT_READ, "tcp")
+                self.listeners.append(listener)
+            for port in udp_ports:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                listener.bind((address, port))
+                listener.setblocking(False)
+                self.selector.register(listener, selectors.EVENT_READ, "udp")
+                self.listeners.append(listener)
+
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+
+    # User-defined method
+    def serve(self):
+        """
+        Accept and close connections and echo datagrams until the listeners are closed
+        """
+        while self.running:
+            for key, _ in self.selector.select(timeout=0.1):
+                try:
+                    if key.data == "udp":
+                        data, peer = key.fileobj.recvfrom(65535)
+                        # An empty probe still needs a reply for the port to be seen as open
+                        key.fileobj.sendto(data or b"\0", peer)
+                        continue
+                    connection, _ = key.fileobj.accept()
+                    connection.close()
+                except OSError:
+                    pass
+
+
+    # User-defined method
+    def close(self):
+        """
+        Stop the background thread and close every listening socket
+        """
+        self.running = False
+        self.thread.join()
+        for listener in self.listeners:
+            self.selector.unregister(listener)
+            listener.close()
+        self.selector.close()
+
+
+    def __enter__(self) -> "LoopbackListeners":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ScanBenchmark:
+    """
+    A class for benchmarking the TCP connect sweep against loopback listeners
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(host_count, port_count, open_every):
+            Initialize the benchmark with the hosts and ports to sweep
+
+            Args:
+                host_count (int): Number of loopback hosts, from 127.0.0.2 on
+                port_count (int): Number of ports to sweep on every host, from BASE_PORT on
+                open_every (int): Every open_every-th port has a listener, the rest are closed
+
+
+        bench_sweep(concurrency):
+            Sweep every host and port with a number of connects in flight and check the open ports that were found
+
+            Args:
+                concurrency (int): Connects that are in flight at the same time
+
+            Returns:
+                dict: concurrency, probes, wall time (s), hosts/s, ports/s and whether the open ports were all found
+
+
+        run(concurrencies):
+            Run the sweep benchmark at every concurrency and print the results
+
+            Args:
+                concurrencies (list): Connects in flight of every run
+    """
+
+    # Initializer
+    def __init__(self, host_count: int, port_count: int, open_every: int) -> None:
+        """
+        Initialize the benchmark with the hosts and ports to sweep
+
+        Args:
+            host_count (int): Number of loopback hosts, from 127.0.0.2 on
+            port_count (int): Number of ports to sweep on every host, from BASE_PORT on
+            open_every (int): Every open_every-th port has a listener, the rest are closed
+        """
+        self.hosts = [socket.inet_ntoa((0x7F000002 + i).to_bytes(4, "big")) for i in range(host_count)]
+        self.ports = list(range(BASE_PORT, BASE_PORT + port_count))
+        self.open_ports = self.ports[::open_every]
+
+
+    # User-defined method
+    def bench_sweep(self, concurrency: int) -> dict:
+        """
+        Sweep every host and port with a number of connects in flight and check the open ports that were found
+
+        Args:
+            concurrency (int): Connects that are in flight at the same time
+
+        Returns:
+            dict: concurrency, probes, wall time (s), hosts/s, ports/s and whether the open ports were all found
+        """
+        sweeper = ConnectSweeper(concurrency=concurrency, timeout=DEFAULT_SWEEP_TIMEOUT)
+        open_ports, alive = sweeper.run(hosts=self.hosts, ports=self.ports)
+        correct = len(alive) == len(self.hosts) and all(open_ports.get(host) == self.open_ports for host in self.hosts)
+        return {
+            "concurrency": concurrency,
+            "probes": sweeper.probes,
+            "wall_time": sweeper.elapsed,
+            "hosts_per_second": len(self.hosts) / sweeper.elapsed,
+            "ports_per_second": sweeper.probes / sweeper.elapsed,
+            "correct": correct,
+        }
+
+
+    # User-defined method
+    def run(self, concurrencies: list):
+        """
+        Run the sweep benchmark at every concurrency and print the results
+
+        Args:
+            concurrencies (list): Connects in flight of every run
+        """
+        print(f"Sweeping {len(self.ports)} port(s) of {len(self.hosts)} loopback host(s), {len(self.open_ports)} open port(s) per host\n")
+        print(f"{'Concurrency':<13}{'Probes':>10}{'Seconds':>10}{'Hosts/s':>12}{'Ports/s':>12}  Correct")
+
+        with LoopbackListeners(addresses=self.hosts, ports=self.open_ports):
+            for concurrency in concurrencies:
+                result = self.bench_sweep(concurrency=concurrency)
+                print(f"{result['concurrency']:<13}{result['probes']:>10}{result['wall_time']:>10.3f}"
+                      f"{result['hosts_per_second']:>12.1f}{result['ports_per_second']:>12.0f}  {result['correct']}")
+
+
+# User-defined function
+def peak_rss_kib() -> tuple[int | None, int | None]:
+    """
+    Peak resident set size of this process and of its largest child process, e.g. an nmap process
+
+    Returns:
+        tuple[int | None, int | None]: Peak RSS in KiB of this process and of the largest child, None if it is not known
+    """
+    if resource is None:
+        return None, None
+    scale = 1024 if sys.platform == "darwin" else 1
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale)
+
+
+# User-defined function
+def run_scanner_mode(mode: str, targets: str, workers: int) -> dict:
+    """
+    Run one scan mode of the scanner and count the open ports that it found, in a process of its own
+    so that the peak memory is of this mode only
+
+    Args:
+        mode (str): One of SCANNER_MODES
+        targets (str): Target specification of the hosts to scan
+        workers (int): Number of nmap processes that run at the same time
+
+    Returns:
+        dict: mode, wall time (s), hosts found, hosts with every open TCP and UDP port, and peak RSS (KiB)
+    """
+    scanner = CustomNmapScanner.__new__(CustomNmapScanner)
+    scanner.reset_results()
+    hosts = TargetSet.parse(tokens=targets.split())
+
+    start = time.perf_counter()
+    if mode == "scan":
+        scanner.perform_scan(ip=" ".join(hosts.nmap_targets()))
+    elif mode == "parallel":
+        scanner.perform_parallel_scan(hosts=hosts, workers=workers)
+    elif mode == "cached":
+        scanner.perform_cached_scan(hosts=hosts, workers=workers, budget=None, cache_ttl=0)
+    elif mode == "delta":
+        scanner.perform_delta_scan(hosts=hosts, workers=workers)
+    elif mode == "stream":
+        scanner.perform_stream_scan(hosts=hosts, workers=workers)
+    elif mode == "sweep":
+        scanner.perform_sweep_scan(hosts=hosts, workers=workers)
+    elif mode == "adaptive":
+        scanner.perform_adaptive_scan(hosts=hosts, workers=workers)
+    scanner.compact_results()
+    wall_time = time.perf_counter() - start
+
+    store = scanner.store
+    peak_rss, peak_child_rss = peak_rss_kib()
+    return {
+        "mode": mode,
+        "wall_time": wall_time,
+        "hosts_found": store.host_count(),
+        "open_tcp": {port: len(store.hosts_with(port=port, protocol="tcp", state="open")) for port in SWEEP_PORTS},
+        "open_udp": {port: len(store.hosts_with(port=port, protocol="udp", state="open")) for port in UDP_TOP_PORTS},
+        "peak_rss_kib": peak_rss,
+        "peak_nmap_rss_kib": peak_child_rss,
+    }
+
+
+class ScannerBenchmark:
+    """
+    A class for benchmarking the scan modes of the nmap scanner against TCP and UDP listeners on loopback addresses
+
+    Every mode is run in a new Python process, so that the peak memory of a mode is not that of an earlier one.
+    nmap has to be installed and the benchmark has to be run as administrator/root, as nmap's UDP scan and the
+    listeners on the top ports below 1024 need it
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(host_count, tcp_listeners, udp_listeners, workers):
+            Initialize the benchmark with the hosts and listeners
+
+            Args:
+                host_count (int): Number of loopback hosts, from 127.0.0.2 on
+                tcp_listeners (int): Number of the top 10 TCP ports that have a listener on every host
+                udp_listeners (int): Number of the top 10 UDP ports that have a listener on every host
+                workers (int): Number of nmap processes that run at the same time
+
+
+        bench_mode(mode, cache_folder):
+            Run a scan mode in a new process and work out its throughput and whether it found every listener
+
+            Args:
+                mode (str): One of SCANNER_MODES
+                cache_folder (str): Folder of the scan cache that the modes share
+
+            Returns:
+                dict: The results of run_scanner_mode, with hosts/s, ports/s and whether every listener was found
+
+
+        run(modes, report_file, compare_file):
+            Run every mode, print the results, write them to a JSON report and compare them to an earlier report
+
+            Args:
+                modes (list): Scan modes to run, in the order of SCANNER_MODES
+                report_file (str): JSON report to write
+                compare_file (str | None): JSON report of an earlier run to compare against, None to not compare
+
+            Returns:
+                dict: The report
+    """
+
+    # Initializer
+    def __init__(self, host_count: int, tcp_listeners: int, udp_listeners: int, workers: int) -> None:
+        """
+        Initialize the benchmark with the hosts and listeners
+
+        Args:
+            host_count (int): Number of loopback hosts, from 127.0.0.2 on
+            tcp_listeners (int): Number of the top 10 TCP ports that have a listener on every host
+            udp_listeners (int): Number of the top 10 UDP ports that have a listener on every host
+            workers (int): Number of nmap processes that run at the same time
+        """
+        self.hosts = [socket.inet_ntoa((0x7F000002 + i).to_bytes(4, "big")) for i in range(host_count)]
+        self.targets = f"{self.hosts[0]}-{self.hosts[-1]}"
+        self.tcp_ports = list(SWEEP_PORTS[:tcp_listeners])
+        self.udp_ports = list(UDP_TOP_PORTS[:udp_listeners])
+        self.workers = workers
+
+
+    # User-defined method
+    def bench_mode(self, mode: str, cache_folder: str) -> dict:
+        """
+        Run a scan mode in a new process and work out its throughput and whether it found every listener
+
+        Args:
+            mode (str): One of SCANNER_MODES
+            cache_folder (str): Folder of the scan cache that the modes share
+
+        Returns:
+            dict: The results of run_scanner_mode, with hosts/s, ports/s and whether every listener was found
+        """
+        # The scanner prints its progress to the output, so the results are written to a file
+        result_file = os.path.join(cache_folder, f"{mode}.json")
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-mode", mode, "--targets", self.targets,
+                                    "--workers", str(self.workers), "--report", result_file], cwd=cache_folder, capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {"mode": mode, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+
+        with open(result_file, "r", encoding="utf-8") as file:
+            result = json.load(file)
+        result["hosts_per_second"] = len(self.hosts) / result["wall_time"]
+        result["ports_per_second"] = len(self.hosts) * PORTS_PER_HOST[mode] / result["wall_time"]
+        # The sweep only runs service detection on TCP ports
+        expected_udp = [] if mode == "sweep" else self.udp_ports
+        result["correct"] = (all(result["open_tcp"][str(port)] == len(self.hosts) for port in self.tcp_ports)
+                             and all(result["open_udp"][str(port)] == len(self.hosts) for port in expected_udp))
+        return result
+
+
+    # User-defined method
+    def run(self, modes: list, report_file: str, compare_file: str | None = None) -> dict:
+        """
+        Run every mode, print the results, write them to a JSON report and compare them to an earlier report
+
+        Args:
+            modes (list): Scan modes to run, in the order of SCANNER_MODES
+            report_file (str): JSON report to write
+            compare_file (str | None): JSON report of an earlier run to compare against, None to not compare
+
+        Returns:
+            dict: The report
+        """
+        try:
+            commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except OSError:
+            commit = ""
+        try:
+            nmap_version = subprocess.run(["nmap", "-V"], capture_output=True, text=True).stdout.strip().splitlines()[0]
+        except (OSError, IndexError):
+            nmap_version = ""
+
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nmap": nmap_version,
+            "config": {"hosts": len(self.hosts), "tcp_ports": self.tcp_ports, "udp_ports": self.udp_ports, "workers": self.workers},
+            "results": [],
+        }
+
+        print(f"Scanning {len(self.hosts)} loopback host(s) with {len(self.tcp_ports)} TCP and {len(self.udp_ports)} UDP listener(s) each\n")
+        print(f"{'Mode':<10}{'Seconds':>10}{'Hosts/s':>10}{'Ports/s':>10}{'RSS MiB':>10}{'nmap MiB':>10}  Correct")
+        with LoopbackListeners(addresses=self.hosts, ports=self.tcp_ports, udp_ports=self.udp_ports):
+            with tempfile.TemporaryDirectory() as cache_folder:
+                for mode in [mode for mode in SCANNER_MODES if mode in modes]:
+                    result = self.bench_mode(mode=mode, cache_folder=cache_folder)
+                    report["results"].append(result)
+                    if "error" in result:
+                        print(f"{mode:<10}{result['error']}")
+                        continue
+                    rss = f"{result['peak_rss_kib'] / 1024:.1f}" if result["peak_rss_kib"] is not None else "-"
+                    nmap_rss = f"{result['peak_nmap_rss_kib'] / 1024:.1f}" if result["peak_nmap_rss_kib"] is not None else "-"
+                    print(f"{mode:<10}{result['wall_time']:>10.2f}{result['hosts_per_second']:>10.1f}"
+                          f"{result['ports_per_second']:>10.0f}{rss:>10}{nmap_rss:>10}  {result['correct']}")
+
+        with open(report_file, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nReport written to {report_file}")
+
+        if compare_file is not None:
+            with open(compare_file, "r", encoding="utf-8") as file:
+                previous = {result["mode"]: result for result in json.load(file)["results"] if "error" not in result}
+            print(f"\nChange in wall time against {compare_file}, negative is faster")
+            for result in report["results"]:
+                if "error" not in result and result["mode"] in previous:
+                    change = result["wall_time"] / previous[result["mode"]]["wall_time"] - 1
+                    print(f"{result['mode']:<10}{change:>+10.1%}")
+        return report
+
+
+# User-defined function
+def synthetic_nmap_xml(host_count: int):
+    """
+    Generate nmap XML output of many hosts one <host> element at a time, each with the TCP ports of the sweep
+
+    Args:
+        host_count (int): Number of hosts, from 10.0.0.1 on
+
+    Returns:
+        Iterator[bytes]: The XML output in chunks
+    """
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<nmaprun scanner="nmap" args="nmap -oX -">\n'
+    yield b'<scaninfo type="connect" protocol="tcp" numservices="10" services="21-23,25,80,110,139,443,445,3389"/>\n'
+    for i in range(host_count):
+        address = socket.inet_ntoa((0x0A000001 + i).to_bytes(4, "big"))
+        ports = "".join(f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack" reason_ttl="0"/>'
+                        f'<service name="ssh" product="OpenSSH" version="8.9p1" method="probed" conf="10"><cpe>cpe:/a:openbsd:openssh:8.9p1</cpe></service></port>'
+                        for port in SWEEP_PORTS)
+        yield (f'<host><status state="up" reason="user-set"/><address addr="{address}" addrtype="ipv4"/>'
+               f'<hostnames><hostname name="host{i}.example.com" type="PTR"/></hostnames><ports>{ports}</ports></host>\n').encode()
+    yield (f'<runstats><finished time="0" timestr="" elapsed="0"/><hosts up="{host_count}" down="0" total="{host_count}"/></runstats>\n'
+           f'</nmaprun>\n').encode()
+
+
+# User-defined function
+def parse_stream(host_count: int) -> int:
+    """
+    Parse nmap XML output of a number of hosts chunk by chunk with the streaming parser
+
+    Args:
+        host_count (int): Number of hosts
+
+    Returns:
+        int: Number of host records that were parsed
+    """
+    parser = NmapXMLParser()
+    records = 0
+    for chunk in synthetic_nmap_xml(host_count=host_count):
+        records += len(parser.feed(data=chunk))
+    return records + len(parser.close())
+
+
+# User-defined function
+def parse_whole(host_count: int) -> int:
+    """
+    Parse nmap XML output of a number of hosts as one document, the way python-nmap does once nmap has exited
+
+    Args:
+        host_count (int): Number of hosts
+
+    Returns:
+        int: Number of host records that were parsed
+    """
+    root = ET.fromstring(b"".join(synthetic_nmap_xml(host_count=host_count)))
+    records = [parse_host(element=element) for element in root.iterfind("host")]
+    return len(records)
+
+
+# User-defined function
+def bench_stream(host_counts: list) -> list:
+    """
+    Measure the peak memory and time of parsing nmap XML output of a number of hosts, streamed and as one document
+
+    Args:
+        host_counts (list): Number of hosts of every run
+
+    Returns:
+        list: hosts, peak bytes and seconds of both ways of parsing of every run
+    """
+    results = []
+    print(f"{'Hosts':<10}{'Stream MiB':>12}{'Stream s':>10}{'Document MiB':>14}{'Document s':>12}")
+    for host_count in host_counts:
+        result = {"hosts": host_count}
+        for name, parse in (("stream", parse_stream), ("document", parse_whole)):
+            # Timed without tracemalloc, which slows every allocation down
+            start = time.perf_counter()
+            parse(host_count=host_count)
+            result[f"{name}_seconds"] = time.perf_counter() - start
+            tracemalloc.start()
+            parse(host_count=host_count)
+            result[f"{name}_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        results.append(result)
+        print(f"{host_count:<10}{result['stream_peak_bytes'] / 2 ** 20:>12.2f}{result['stream_seconds']:>10.2f}"
+              f"{result['document_peak_bytes'] / 2 ** 20:>14.2f}{result['document_seconds']:>12.2f}")
+    return results
+
+
+class StoreBenchmark:
+    """
+    A class for benchmarking the memory and query time of the compact scan store against python-nmap's nested dicts
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(host_count):
+            Initialize the benchmark with the number of synthetic hosts
+
+            Args:
+                host_count (int): Number of hosts in the scan result
+
+
+        run():
+            Build both forms of the scan result, query both for every host with 22/tcp open and print the results
+
+            Returns:
+                dict: bytes of both forms, seconds of every query and whether both forms answered the same
+    """
+
+    # Initializer
+    def __init__(self, host_count: int) -> None:
+        """
+        Initialize the benchmark with the number of synthetic hosts
+
+        Args:
+            host_count (int): Number of hosts in the scan result
+        """
+        self.host_count = host_count
+
+
+    # User-defined method
+    def run(self) -> dict:
+        """
+        Build both forms of the scan result, query both for every host with 22/tcp open and print the results
+
+        Returns:
+            dict: bytes of both forms, seconds of every query and whether both forms answered the same
+        """
+        tracemalloc.start()
+        scan_result = synthetic_scan_result(host_count=self.host_count)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        store = ScanStore.from_scan_result(scan_result=scan_result)
+        store_bytes = tracemalloc.get_traced_memory()[0] - dict_bytes
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        dict_hosts = [host for host, host_result in scan_result["scan"].items()
+                      if host_result.get("tcp", {}).get(22, {}).get("state") == "open"]
+        dict_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        filter_hosts = [store.host_address[store.row_host[row]] for row in store.filter_rows(protocol="tcp", port=22, state="open")]
+        filter_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store_hosts = store.hosts_with(port=22, protocol="tcp", state="open")
+        index_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.hosts_with(port=80, protocol="tcp", state="open")
+        indexed_seconds = time.perf_counter() - start
+
+        result = {
+            "hosts": self.host_count,
+            "rows": len(store.row_host),
+            "dict_bytes": dict_bytes,
+            "store_bytes": store_bytes,
+            "dict_query_seconds": dict_seconds,
+            "filter_query_seconds": filter_seconds,
+            "index_build_seconds": index_seconds,
+            "indexed_query_seconds": indexed_seconds,
+            "correct": dict_hosts == store_hosts and len(filter_hosts) == len(dict_hosts),
+        }
+
+        print(f"{result['hosts']} host(s), {result['rows']} port row(s)\n")
+        print(f"{'Form':<28}{'MiB':>10}{'Query ms':>12}")
+        print(f"{'Nested dicts':<28}{dict_bytes / 2 ** 20:>10.2f}{dict_seconds * 1000:>12.2f}")
+        print(f"{'Scan store, filter_rows':<28}{store_bytes / 2 ** 20:>10.2f}{filter_seconds * 1000:>12.2f}")
+        print(f"{'Scan store, first index':<28}{'':>10}{index_seconds * 1000:>12.2f}")
+        print(f"{'Scan store, indexed':<28}{'':>10}{indexed_seconds * 1000:>12.2f}")
+        print(f"\nMemory saved: {1 - store_bytes / dict_bytes:.0%}, correct: {result['correct']}")
+        return result
+
+
+# Main program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scan modes or the TCP connect sweep of the nmap scanner against loopback listeners, the scan store or the XML parser")
+    parser.add_argument("--hosts", type=int, default=32, help="Number of loopback hosts, from 127.0.0.2 on")
+    parser.add_argument("--ports", type=int, default=100, help="Number of ports to sweep on every host")
+    parser.add_argument("--open-every", type=int, default=10, help="Every n-th port has a listener")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256], help="Connects in flight of every run")
+    parser.add_argument("--store-hosts", type=int, help="Benchmark the scan store with this many synthetic hosts instead of the sweep")
+    parser.add_argument("--stream-hosts", type=int, nargs="+", help="Benchmark the streaming XML parser with these numbers of hosts instead of the sweep")
+    parser.add_argument("--scanner", nargs="*", choices=SCANNER_MODES, help="Benchmark these scan modes of the scanner, every mode if none are given")
+    parser.add_argument("--tcp-listeners", type=int, default=3, help="Number of the top 10 TCP ports with a listener, for --scanner")
+    parser.add_argument("--udp-listeners", type=int, default=2, help="Number of the top 10 UDP ports with a listener, for --scanner")
+    parser.add_argument("--workers", type=int, default=4, help="Number of nmap processes that run at the same time, for --scanner")
+    parser.add_argument("--report", default=BENCHMARK_REPORT, help="JSON report of the scanner benchmark")
+    parser.add_argument("--compare", help="JSON report of an earlier scanner benchmark to compare against")
+    # Used by the scanner benchmark to run every mode in a process of its own
+    parser.add_argument("--run-mode", choices=SCANNER_MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--targets", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode is not None:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(run_scanner_mode(mode=args.run_mode, targets=args.targets, workers=args.workers), file)
+    elif args.scanner is not None:
+        benchmark = ScannerBenchmark(host_count=args.hosts, tcp_listeners=args.tcp_listeners, udp_listeners=args.udp_listeners, workers=args.workers)
+        benchmark.run(modes=args.scanner or list(SCANNER_MODES), report_file=args.report, compare_file=args.compare)
+    elif args.store_hosts is not None:
+        StoreBenchmark(host_count=args.store_hosts).run()
+    elif args.stream_hosts is not None:
+        bench_stream(host_counts=args.stream_hosts)
+    else:
+        benchmark = ScanBenchmark(host_count=args.hosts, port_count=args.ports, open_every=args.open_every)
+        benchmark.run(concurrencies=args.concurrency)
@@ -0,0 +1,381 @@
+"""
+Scan Cache Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_cache.py
+
+Purpose:
+    Persistent cache of nmap scan results per host and scan arguments, kept in a SQLite database.
+    Entries older than the TTL are not used, and the least recently used entries are evicted once
+    the cache grows past its size limit. The last result of a host is also what a delta scan compares against
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    SQLite database of the cached scan results, nmap_scan_cache.sqlite3 by default
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/sqlite3.html
+https://www.sqlite.org/lang_upsert.html
+https://www.sqlite.org/wal.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - json
+    - sqlite3
+    - time
+
+Known issues:
+    Nil
+
+
+"""
+
+import json
+import sqlite3
+import time
+
+
+SCAN_CACHE_FILE = "nmap_scan_cache.sqlite3"
+
+# Seconds that a cached scan result is used for
+DEFAULT_CACHE_TTL = 3600
+
+# Size of the cached results that the least recently used ones are evicted at
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Protocols of a python-nmap host result whose port numbers are int keys, JSON turns them into strings
+PORT_PROTOCOLS = ("tcp", "udp", "sctp", "ip")
+
+# Hosts that get_many() looks up with one query, under the 999 variables that older SQLite versions allow per query
+LOOKUP_CHUNK_SIZE = 500
+
+
+# User-defined function
+def restore_port_keys(host_result: dict) -> dict:
+    """
+    Turn the port numbers of a host result that was decoded from JSON back into int keys
+
+    Args:
+        host_result (dict): python-nmap host result
+
+    Returns:
+        dict: The same host result
+    """
+    for protocol in PORT_PROTOCOLS:
+        if protocol in host_result:
+            host_result[protocol] = {int(port): details for port, details in host_result[protocol].items()}
+    return host_result
+
+
+# User-defined function
+def load_entry(text: str) -> dict:
+    """
+    Decode a cached entry, turning the port numbers back into int keys
+
+    Args:
+        text (str): JSON of the entry
+
+    Returns:
+        dict: "address" and "result" of the host
+    """
+    entry = json.loads(text)
+    if entry["result"] is not None:
+        restore_port_keys(host_result=entry["result"])
+    return entry
+
+
+class ScanCache:
+    """
+    A class for a persistent cache of nmap scan results keyed by host and scan arguments
+
+    A cached entry is the address that the host resolved to and its python-nmap host result,
+    both None for a host that was down
+
+    Attributes:
+        hits (int): Lookups of this session that were answered from the cache
+        misses (int): Lookups of this session that were missing or stale
+
+    Methods:
+        __init__(filename, ttl, max_bytes):
+            Open the cache database, creating its tables the first time
+
+            Args:
+                filename (str): SQLite database file
+                ttl (float): Seconds that a cached scan result is used for
+                max_bytes (int): Size of the cached results that the least recently used ones are evicted at
+
+
+        get(host, arguments):
+            Look up the cached scan result of a host, counting a hit or a miss
+
+            Args:
+                host (str): Hostname or IPv4 address as it was given to nmap
+                arguments (str): nmap arguments of the scan
+
+            Returns:
+                dict | None: "address" and "result" of the host, None if it is not cached or is stale
+
+
+        get_many(hosts, arguments):
+            Look up the cached scan results of a chunk of hosts with one query, counting a hit or a miss for every host
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses as they were given to nmap, at most LOOKUP_CHUNK_SIZE
+                arguments (str): nmap arguments of the scan
+
+            Returns:
+                dict: "address" and "result" of every host that is cached and fresh, the other hosts are left out
+
+
+        last_entries(hosts, arguments):
+            Look up the last scan results of a chunk of hosts however old they are with one query, without counting a hit or a miss
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses as they were given to nmap, at most LOOKUP_CHUNK_SIZE
+                arguments (str): nmap arguments of the scan
+
+            Returns:
+                dict: "address", "result" and "scanned_at" of every host that was scanned before, the other hosts are left out
+
+
+        put_many(entries, arguments):
+            Cache the scan results of several hosts in one transaction and evict entries if the cache is too big
+
+            Args:
+                entries (dict): (address, host result) of every host, both None for a host that was down
+                arguments (str): nmap arguments of the scan
+
+
+        evict():
+            Delete the least recently used entries until the cache is within its size limit
+
+            Returns:
+                int: Number of entries that were evicted
+
+
+        stats():
+            Hit and miss counters of this session and of every session, and the size of the cache
+
+            Returns:
+                dict: hits, misses, total_hits, total_misses, entries and bytes
+
+
+        close():
+            Save the counters and close the cache database
+    """
+
+    # Initializer
+    def __init__(self, filename: str = SCAN_CACHE_FILE, ttl: float = DEFAULT_CACHE_TTL,
+                max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        """
+        Open the cache database, creating its tables the first time
+
+        Args:
+            filename (str): SQLite database file
+            ttl (float): Seconds that a cached scan result is used for
+            max_bytes (int): Size of the cached results that the least recently used ones are evicted at
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(filename)
+        # Write ahead logging lets a scan read the cache while another one writes to it
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS scans (
+                    host TEXT NOT NULL,
+                    arguments TEXT NOT NULL,
+                    scanned_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    entry TEXT NOT NULL,
+                    PRIMARY KEY (host, arguments)
+                )""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS scans_last_used ON scans (last_used)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+
+    # User-defined method
+    def get(self, host: str, arguments: str) -> dict | None:
+        """
+        Look up the cached scan result of a host, counting a hit or a miss
+
+        Args:
+            host (str): Hostname or IPv4 address as it was given to nmap
+            arguments (str): nmap arguments of the scan
+
+        Returns:
+            dict | None: "address" and "result" of the host, None if it is not cached or is stale
+        """
+        now = time.time()
+        row = self.db.execute("SELECT entry FROM scans WHERE host = ? AND arguments = ? AND scanned_at >= ?",
+                              (host, arguments, now - self.ttl)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.db:
+            self.db.execute("UPDATE scans SET last_used = ? WHERE host = ? AND arguments = ?", (now, host, arguments))
+
+        return load_entry(text=row[0])
+
+
+    # User-defined method
+    def get_many(self, hosts: list, arguments: str) -> dict:
+        """
+        Look up the cached scan results of a chunk of hosts with one query, counting a hit or a miss for every host
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses as they were given to nmap, at most LOOKUP_CHUNK_SIZE
+            arguments (str): nmap arguments of the scan
+
+        Returns:
+            dict: "address" and "result" of every host that is cached and fresh, the other hosts are left out
+        """
+        hosts = list(hosts)
+        if len(hosts) == 0:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(hosts))
+        rows = self.db.execute(f"SELECT host, entry FROM scans WHERE arguments = ? AND scanned_at >= ? AND host IN ({placeholders})",
+                               (arguments, now - self.ttl, *hosts)).fetchall()
+        self.hits += len(rows)
+        self.misses += len(hosts) - len(rows)
+        if len(rows) > 0:
+            with self.db:
+                self.db.executemany("UPDATE scans SET last_used = ? WHERE host = ? AND arguments = ?",
+                                    [(now, host, arguments) for host, _ in rows])
+        return {host: load_entry(text=text) for host, text in rows}
+
+
+    # User-defined method
+    def last_entries(self, hosts: list, arguments: str) -> dict:
+        """
+        Look up the last scan results of a chunk of hosts however old they are with one query, without counting a hit or a miss
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses as they were given to nmap, at most LOOKUP_CHUNK_SIZE
+            arguments (str): nmap arguments of the scan
+
+        Returns:
+            dict: "address", "result" and "scanned_at" of every host that was scanned before, the other hosts are left out
+        """
+        hosts = list(hosts)
+        if len(hosts) == 0:
+            return {}
+        placeholders = ",".join("?" * len(hosts))
+        rows = self.db.execute(f"SELECT host, entry, scanned_at FROM scans WHERE arguments = ? AND host IN ({placeholders})",
+                               (arguments, *hosts)).fetchall()
+        entries = {}
+        for host, text, scanned_at in rows:
+            entries[host] = load_entry(text=text)
+            entries[host]["scanned_at"] = scanned_at
+        return entries
+
+
+    # User-defined method
+    def put_many(self, entries: dict, arguments: str):
+        """
+        Cache the scan results of several hosts in one transaction and evict entries if the cache is too big
+
+        Args:
+            entries (dict): (address, host result) of every host, both None for a host that was down
+            arguments (str): nmap arguments of the scan
+        """
+        now = time.time()
+        rows = []
+        for host, (address, result) in entries.items():
+            entry = json.dumps({"address": address, "result": result})
+            rows.append((host, arguments, now, now, len(entry), entry))
+
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO scans (host, arguments, scanned_at, last_used, size, entry) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (host, arguments) DO UPDATE SET
+                    scanned_at = excluded.scanned_at, last_used = excluded.last_used, size = excluded.size, entry = excluded.entry
+                """, rows)
+        self.evict()
+
+
+    # User-defined method
+    def evict(self) -> int:
+        """
+        Delete the least recently used entries until the cache is within its size limit
+
+        Returns:
+            int: Number of entries that were evicted
+        """
+        (total,) = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM scans").fetchone()
+        if total <= self.max_bytes:
+            return 0
+
+        evict_keys = []
+        for host, arguments, size in self.db.execute("SELECT host, arguments, size FROM scans ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evict_keys.append((host, arguments))
+            total -= size
+
+        with self.db:
+            self.db.executemany("DELETE FROM scans WHERE host = ? AND arguments = ?", evict_keys)
+        return len(evict_keys)
+
+
+    # User-defined method
+    def stats(self) -> dict:
+        """
+        Hit and miss counters of this session and of every session, and the size of the cache
+
+        Returns:
+            dict: hits, misses, total_hits, total_misses, entries and bytes
+        """
+        counters = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scans").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": counters.get("hits", 0) + self.hits,
+            "total_misses": counters.get("misses", 0) + self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+    # User-defined method
+    def close(self):
+        """
+        Save the counters and close the cache database
+        """
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO counters (name, value) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+                """, [("hits", self.hits), ("misses", self.misses)])
+        self.hits = 0
+        self.misses = 0
+        self.db.close()
+
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,289 @@
+"""
+Scan Control Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_control.py
+
+Purpose:
+    Adaptive controller of a sharded nmap scan, in the way of TCP congestion control. The round trip times and
+    host timeouts of every shard that is done set the number of nmap processes that run at the same time
+    (slow start, then additive increase and multiplicative decrease), the number of hosts in the next shard
+    and the nmap timing template of the next shard
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://datatracker.ietf.org/doc/html/rfc5681
+https://datatracker.ietf.org/doc/html/rfc6298
+https://nmap.org/book/performance-timing-templates.html
+https://nmap.org/book/man-performance.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - collections
+
+Known issues:
+    Nil
+
+
+"""
+
+from collections import Counter
+
+
+# nmap timing templates from the most conservative to the most aggressive, with the largest retransmission
+# timeout (RTO) in microseconds that each one is picked for, half of the template's --max-rtt-timeout
+TIMING_TEMPLATES = (("T3", None), ("T4", 625000), ("T5", 150000))
+
+# Seconds of "--host-timeout" of every timing template, so that nmap reports a host that the template is too fast for
+# as timed out, None for no limit on the most conservative template that timed out hosts are scanned again with
+HOST_TIMEOUTS = {"T3": None, "T4": 300, "T5": 120}
+
+# RTOs that the host timeout is at least, so a slow network raises it instead of timing out every host
+HOST_TIMEOUT_RTOS = 500
+
+# Seconds that a shard should take, the batch size is worked out from the time per host to get close to it
+TARGET_SHARD_SECONDS = 10.0
+
+# Hosts of the first shard and the most hosts that a shard can have
+INITIAL_BATCH_SIZE = 4
+MAX_BATCH_SIZE = 256
+
+# Shards without a timeout after which the timing template is allowed to be one step more aggressive again
+CLEAN_SHARDS_TO_RECOVER = 4
+
+
+class AdaptiveController:
+    """
+    A class for adapting the parallelism, batch size and timing template of a sharded scan to the round trip times
+    and timeouts that are seen, in the way of TCP congestion control
+
+    The congestion window is the number of nmap processes that run at the same time. It grows by one for every
+    shard that is done without a timeout until it reaches the slow start threshold, then by one for every window
+    of shards, and is halved when a host times out or a shard fails
+
+    Attributes:
+        srtt (float | None): Smoothed round trip time in microseconds, None before the first sample
+        rttvar (float | None): Round trip time variation in microseconds, None before the first sample
+        stats (Counter): Shards, hosts, timeouts and failures that were seen, and the shards of every timing template
+
+    Methods:
+        __init__(max_parallel):
+            Initialize the controller with one nmap process, the first batch size and the most conservative template
+
+            Args:
+                max_parallel (int): Most nmap processes that can run at the same time
+
+
+        parallelism():
+            Number of nmap processes that can run at the same time now
+
+            Returns:
+                int: Number of nmap processes
+
+
+        batch_size():
+            Number of hosts of the next shard
+
+            Returns:
+                int: Number of hosts
+
+
+        template():
+            nmap timing template of the next shard, from the retransmission timeout and the timeouts that were seen
+
+            Returns:
+                str: The timing template, e.g. "T4"
+
+
+        host_timeout(template):
+            Seconds of "--host-timeout" of a shard, the template's host timeout raised to HOST_TIMEOUT_RTOS times the
+            retransmission timeout
+
+            Args:
+                template (str): Timing template of the shard
+
+            Returns:
+                int | None: Seconds, None for no host timeout
+
+
+        add_rtt(sample):
+            Add a round trip time sample to the smoothed round trip time and its variation
+
+            Args:
+                sample (float): Round trip time of a host in microseconds
+
+
+        on_shard(hosts, elapsed, rtts, timeouts, failed, template):
+            Adapt to a shard that is done
+
+            Args:
+                hosts (int): Number of hosts of the shard
+                elapsed (float): Seconds that the shard took
+                rtts (list): Round trip time of every host that nmap measured one for, in microseconds
+                timeouts (int): Number of hosts that timed out
+                failed (bool): True if the nmap process failed or was stopped
+                template (str): Timing template that the shard was scanned with
+    """
+
+    # Initializer
+    def __init__(self, max_parallel: int) -> None:
+        """
+        Initialize the controller with one nmap process, the first batch size and the most conservative template
+
+        Args:
+            max_parallel (int): Most nmap processes that can run at the same time
+        """
+        self.max_parallel = max_parallel
+        self.cwnd = 1.0
+        self.ssthresh = float(max_parallel)
+        self.batch = INITIAL_BATCH_SIZE
+        self.seconds_per_host = None
+        self.srtt = None
+        self.rttvar = None
+        # Steps that the template is kept below what the RTO allows, raised by every timeout
+        self.backoff = 0
+        self.clean_shards = 0
+        self.stats = Counter()
+
+
+    # User-defined method
+    def parallelism(self) -> int:
+        """
+        Number of nmap processes that can run at the same time now
+
+        Returns:
+            int: Number of nmap processes
+        """
+        return max(1, min(self.max_parallel, int(self.cwnd)))
+
+
+    # User-defined method
+    def batch_size(self) -> int:
+        """
+        Number of hosts of the next shard
+
+        Returns:
+            int: Number of hosts
+        """
+        return self.batch
+
+
+    # User-defined method
+    def template(self) -> str:
+        """
+        nmap timing template of the next shard, from the retransmission timeout and the timeouts that were seen
+
+        Returns:
+            str: The timing template, e.g. "T4"
+        """
+        # Nothing is known about the network before the first sample, so the first shards are conservative
+        if self.srtt is None:
+            return TIMING_TEMPLATES[0][0]
+
+        rto = self.srtt + 4 * self.rttvar
+        level = 0
+        for index, (_, max_rto) in enumerate(TIMING_TEMPLATES):
+            if max_rto is None or rto <= max_rto:
+                level = index
+        return TIMING_TEMPLATES[max(0, level - self.backoff)][0]
+
+
+    # User-defined method
+    def host_timeout(self, template: str) -> int | None:
+        """
+        Seconds of "--host-timeout" of a shard, the template's host timeout raised to HOST_TIMEOUT_RTOS times the
+        retransmission timeout
+
+        Args:
+            template (str): Timing template of the shard
+
+        Returns:
+            int | None: Seconds, None for no host timeout
+        """
+        timeout = HOST_TIMEOUTS[template]
+        if timeout is None or self.srtt is None:
+            return timeout
+        rto = (self.srtt + 4 * self.rttvar) / 1_000_000
+        return max(timeout, int(HOST_TIMEOUT_RTOS * rto))
+
+
+    # User-defined method
+    def add_rtt(self, sample: float):
+        """
+        Add a round trip time sample to the smoothed round trip time and its variation
+
+        Args:
+            sample (float): Round trip time of a host in microseconds
+        """
+        # RFC 6298 with alpha = 1/8 and beta = 1/4
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+            self.srtt = 0.875 * self.srtt + 0.125 * sample
+
+
+    # User-defined method
+    def on_shard(self, hosts: int, elapsed: float, rtts: list, timeouts: int, failed: bool, template: str):
+        """
+        Adapt to a shard that is done
+
+        Args:
+            hosts (int): Number of hosts of the shard
+            elapsed (float): Seconds that the shard took
+            rtts (list): Round trip time of every host that nmap measured one for, in microseconds
+            timeouts (int): Number of hosts that timed out
+            failed (bool): True if the nmap process failed or was stopped
+            template (str): Timing template that the shard was scanned with
+        """
+        self.stats.update(shards=1, hosts=hosts, timeouts=timeouts, failed=int(failed))
+        self.stats[template] += 1
+        for sample in rtts:
+            self.add_rtt(sample=sample)
+
+        if timeouts > 0 or failed:
+            # Multiplicative decrease, and smaller and more conservative shards until it is clean again
+            self.ssthresh = max(self.cwnd / 2, 1.0)
+            self.cwnd = self.ssthresh
+            self.batch = max(1, self.batch // 2)
+            self.backoff = min(self.backoff + 1, len(TIMING_TEMPLATES) - 1)
+            self.clean_shards = 0
+            return
+
+        # Slow start below the threshold, additive increase of one process per window of shards above it
+        if self.cwnd < self.ssthresh:
+            self.cwnd += 1
+        else:
+            self.cwnd += 1 / self.cwnd
+        self.cwnd = min(self.cwnd, float(self.max_parallel))
+
+        self.clean_shards += 1
+        if self.backoff > 0 and self.clean_shards >= CLEAN_SHARDS_TO_RECOVER:
+            self.backoff -= 1
+            self.clean_shards = 0
+
+        # The batch is sized for shards of about TARGET_SHARD_SECONDS, and at most doubles from one shard to the next
+        seconds_per_host = elapsed / max(hosts, 1)
+        if self.seconds_per_host is None:
+            self.seconds_per_host = seconds_per_host
+        else:
+            self.seconds_per_host = 0.75 * self.seconds_per_host + 0.25 * seconds_per_host
+        target = int(TARGET_SHARD_SECONDS / max(self.seconds_per_host, 1e-3))
+        self.batch = max(1, min(MAX_BATCH_SIZE, target, self.batch * 2))
@@ -0,0 +1,230 @@
+"""
+Scan Delta Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_delta.py
+
+Purpose:
+    Compare a cheap port check and light service fingerprint of a host against its last full scan result, to find
+    the ports that need service and OS detection again, merge the results of both and list what changed between the scans
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://nmap.org/book/man-port-specification.html
+https://nmap.org/book/man-port-scanning-basics.html
+https://nmap.org/book/man-version-detection.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - copy
+
+Known issues:
+    The light fingerprint only tries the most likely probes, so a service change that it can not see on a port
+    that stayed open is only found by a full scan
+
+
+"""
+
+import copy
+
+
+# Port states that service detection is run for
+OPEN_STATES = ("open", "open|filtered")
+
+# Port fields that identify the service on a port
+SERVICE_FIELDS = ("name", "product", "version", "extrainfo", "cpe")
+
+# Port fields of the light fingerprint of the port check that are compared with the last scan
+FINGERPRINT_FIELDS = ("name", "product", "version")
+
+# Host fields that only service and OS detection fill in
+DETECTION_FIELDS = ("osmatch", "portused", "uptime", "hostscript", "vendor")
+
+# nmap -p prefixes of the protocols, e.g. -p T:22,80,U:53
+PORT_SPEC_PREFIXES = {"tcp": "T", "udp": "U", "sctp": "S"}
+
+
+# User-defined function
+def port_states(host_result: dict | None) -> dict:
+    """
+    State of every port of a python-nmap host result
+
+    Args:
+        host_result (dict | None): python-nmap host result, None for a host that was down
+
+    Returns:
+        dict: State of every (protocol, port)
+    """
+    if host_result is None:
+        return {}
+    return {(protocol, port): details["state"]
+            for protocol in PORT_SPEC_PREFIXES if protocol in host_result
+            for port, details in host_result[protocol].items()}
+
+
+# User-defined function
+def fingerprint_changed(previous: dict, check: dict) -> bool:
+    """
+    Check if the light fingerprint of a port in the port check differs from the service of the last scan.
+    Fields that the light fingerprint did not find are not compared, as it tries fewer probes than "-A"
+
+    Args:
+        previous (dict): python-nmap details of the port in the last full scan
+        check (dict): python-nmap details of the port in the port check
+
+    Returns:
+        bool: True if the service on the port changed, False otherwise
+    """
+    return any(check.get(field) and check.get(field) != previous.get(field) for field in FINGERPRINT_FIELDS)
+
+
+# User-defined function
+def changed_ports(previous: dict, check: dict) -> list:
+    """
+    Ports that are open in the port check and were not open with the same state in the last scan, or whose
+    light fingerprint changed
+
+    Args:
+        previous (dict): python-nmap host result of the last full scan
+        check (dict): python-nmap host result of the port check
+
+    Returns:
+        list: (protocol, port) of every port that needs service detection, sorted
+    """
+    before = port_states(host_result=previous)
+    changed = []
+    for (protocol, port), state in port_states(host_result=check).items():
+        if state not in OPEN_STATES:
+            continue
+        if before.get((protocol, port)) != state or fingerprint_changed(previous=previous[protocol][port], check=check[protocol][port]):
+            changed.append((protocol, port))
+    return sorted(changed)
+
+
+# User-defined function
+def port_spec(ports: list) -> str:
+    """
+    nmap -p port specification of a list of ports
+
+    Args:
+        ports (list): (protocol, port) of every port
+
+    Returns:
+        str: The port specification, e.g. "T:22,80,U:53"
+    """
+    by_protocol = {}
+    for protocol, port in ports:
+        by_protocol.setdefault(protocol, []).append(str(port))
+    return ",".join(f"{PORT_SPEC_PREFIXES[protocol]}:{','.join(numbers)}" for protocol, numbers in sorted(by_protocol.items()))
+
+
+# User-defined function
+def merge_host_result(previous: dict | None, check: dict, detail: dict | None) -> dict:
+    """
+    Merge the port check of a host with the service details of its last full scan and of the ports that were probed again
+
+    Args:
+        previous (dict | None): python-nmap host result of the last full scan, None if there is none
+        check (dict): python-nmap host result of the port check
+        detail (dict | None): python-nmap host result of the service detection on the changed ports, None if nothing changed
+
+    Returns:
+        dict: The merged python-nmap host result
+    """
+    merged = {field: copy.deepcopy(value) for field, value in (previous or {}).items() if field not in PORT_SPEC_PREFIXES}
+    for field, value in check.items():
+        if field not in PORT_SPEC_PREFIXES:
+            merged[field] = copy.deepcopy(value)
+    if detail is not None:
+        for field in DETECTION_FIELDS:
+            if field in detail:
+                merged[field] = copy.deepcopy(detail[field])
+
+    for protocol in PORT_SPEC_PREFIXES:
+        if protocol not in check:
+            continue
+        merged[protocol] = {}
+        for port, details in check[protocol].items():
+            if detail is not None and port in detail.get(protocol, {}):
+                merged[protocol][port] = copy.deepcopy(detail[protocol][port])
+            elif (previous is not None and previous.get(protocol, {}).get(port, {}).get("state") == details["state"]
+                  and not fingerprint_changed(previous=previous[protocol][port], check=details)):
+                # Unchanged port, the service details of the last scan still hold
+                merged[protocol][port] = copy.deepcopy(previous[protocol][port])
+                merged[protocol][port]["reason"] = details["reason"]
+            else:
+                merged[protocol][port] = copy.deepcopy(details)
+    return merged
+
+
+# User-defined function
+def service_summary(details: dict) -> str:
+    """
+    One line summary of the service on a port
+
+    Args:
+        details (dict): python-nmap details of the port
+
+    Returns:
+        str: Service name, product, version and CPE that are known
+    """
+    return " ".join(str(details[field]) for field in SERVICE_FIELDS if details.get(field))
+
+
+# User-defined function
+def diff_host_results(host: str, previous: dict | None, current: dict | None, known: bool = True) -> list:
+    """
+    List what changed on a host between its last full scan and the current scan
+
+    Args:
+        host (str): Host as it was given to nmap
+        previous (dict | None): python-nmap host result of the last full scan, None if the host was down
+        current (dict | None): python-nmap host result of the current scan, None if the host is down
+        known (bool): False if the host was never scanned before
+
+    Returns:
+        list: (host, protocol, port, change, before, after) of every change, change is "new host", "host up",
+              "host down", "opened", "closed" or "changed"
+    """
+    if not known:
+        return [(host, "", "", "new host", "", "up" if current is not None else "down")]
+    if previous is None and current is None:
+        return []
+
+    changes = []
+    if previous is None:
+        changes.append((host, "", "", "host up", "down", "up"))
+    elif current is None:
+        return [(host, "", "", "host down", "up", "down")]
+
+    before = port_states(host_result=previous)
+    after = port_states(host_result=current)
+    for protocol, port in sorted(set(before) | set(after)):
+        was_open = before.get((protocol, port)) in OPEN_STATES
+        is_open = after.get((protocol, port)) in OPEN_STATES
+        if is_open and not was_open:
+            changes.append((host, protocol, port, "opened", before.get((protocol, port), ""), service_summary(current[protocol][port])))
+        elif was_open and not is_open:
+            changes.append((host, protocol, port, "closed", service_summary(previous[protocol][port]), after.get((protocol, port), "")))
+        elif is_open and was_open:
+            old_service = service_summary(previous[protocol][port])
+            new_service = service_summary(current[protocol][port])
+            if old_service != new_service:
+                changes.append((host, protocol, port, "changed", old_service, new_service))
+    return changes
@@ -0,0 +1,257 @@
+"""
+Scan Export Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_export.py
+
+Purpose:
+    Export scan result rows to a JSON Lines or CSV file one row at a time, and page through them in the terminal
+    one table of rows at a time. Both take the rows from an iterator, so the whole result is never held as a table
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    JSON Lines (.jsonl) or CSV (.csv) file of the scan result rows
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://jsonlines.org/
+https://docs.python.org/3/library/csv.html
+https://docs.python.org/3/library/itertools.html#itertools.islice
+https://rich.readthedocs.io/en/stable/tables.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - csv
+    - itertools
+    - json
+    - os
+- required external modules installed using pip: pip install <module name>  # e.g. pip install rich
+    - rich
+
+Known issues:
+    Pages that were viewed are kept so that they can be viewed again, the rows after the last viewed page are not read
+
+
+"""
+
+import csv
+import itertools
+import json
+import os
+from rich import box
+from rich.table import Table
+from rich.console import Console
+
+
+# Columns of a scan result row, in the order of ScanStore.rows()
+EXPORT_COLUMNS = ("host", "hostname", "protocol", "port", "state", "product", "extrainfo", "reason", "cpe")
+
+# Column headers of the terminal viewer, the same as the scan output table
+EXPORT_HEADERS = ("Host", "Hostname", "Protocol", "Port ID", "State", "Product", "Extrainfo", "Reason", "CPE")
+
+# File extensions that results can be exported to
+EXPORT_FORMATS = (".jsonl", ".csv")
+
+# Rows of a page of the terminal viewer
+DEFAULT_PAGE_ROWS = 50
+
+
+# User-defined function
+def export_jsonl(rows, filename: str) -> int:
+    """
+    Write every row as one JSON object per line
+
+    Args:
+        rows (Iterable[tuple]): Scan result rows with the columns of EXPORT_COLUMNS
+        filename (str): JSON Lines file to write
+
+    Returns:
+        int: Number of rows that were written
+    """
+    count = 0
+    with open(filename, "w", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n")
+            count += 1
+    return count
+
+
+# User-defined function
+def export_csv(rows, filename: str) -> int:
+    """
+    Write every row as one CSV record after a header record
+
+    Args:
+        rows (Iterable[tuple]): Scan result rows with the columns of EXPORT_COLUMNS
+        filename (str): CSV file to write
+
+    Returns:
+        int: Number of rows that were written
+    """
+    count = 0
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+# User-defined function
+def export_rows(rows, filename: str) -> int:
+    """
+    Write the rows to a JSON Lines or CSV file, picked by the file extension
+
+    Args:
+        rows (Iterable[tuple]): Scan result rows with the columns of EXPORT_COLUMNS
+        filename (str): .jsonl or .csv file to write
+
+    Returns:
+        int: Number of rows that were written
+
+    Raises:
+        ValueError: If the file extension is not one of EXPORT_FORMATS
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".jsonl":
+        return export_jsonl(rows=rows, filename=filename)
+    if extension == ".csv":
+        return export_csv(rows=rows, filename=filename)
+    raise ValueError(f"Results can only be exported to {' or '.join(EXPORT_FORMATS)} files")
+
+
+class PagedViewer:
+    """
+    A class for viewing scan result rows in the terminal one page at a time, only the page that is shown is rendered
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__(rows, page_rows, title):
+            Initialize the viewer, no rows are read until a page is shown
+
+            Args:
+                rows (Iterable[tuple]): Scan result rows with the columns of EXPORT_COLUMNS
+                page_rows (int): Rows of a page
+                title (str): Title of the table
+
+
+        page(number):
+            Rows of a page, reading the rows up to it from the iterator the first time
+
+            Args:
+                number (int): Page number, from 0
+
+            Returns:
+                list: Rows of the page, empty if there are not that many pages
+
+
+        render(number):
+            Render a page as a rich table
+
+            Args:
+                number (int): Page number, from 0
+
+            Returns:
+                Table: The rich table of the page
+
+
+        run():
+            Show the first page and let the user page forwards and backwards until they quit
+    """
+
+    # Initializer
+    def __init__(self, rows, page_rows: int = DEFAULT_PAGE_ROWS, title: str = "") -> None:
+        """
+        Initialize the viewer, no rows are read until a page is shown
+
+        Args:
+            rows (Iterable[tuple]): Scan result rows with the columns of EXPORT_COLUMNS
+            page_rows (int): Rows of a page
+            title (str): Title of the table
+        """
+        self.rows = iter(rows)
+        self.page_rows = page_rows
+        self.title = title
+        self.pages = []
+        self.exhausted = False
+
+
+    # User-defined method
+    def page(self, number: int) -> list:
+        """
+        Rows of a page, reading the rows up to it from the iterator the first time
+
+        Args:
+            number (int): Page number, from 0
+
+        Returns:
+            list: Rows of the page, empty if there are not that many pages
+        """
+        while len(self.pages) <= number and not self.exhausted:
+            rows = list(itertools.islice(self.rows, self.page_rows))
+            if len(rows) > 0:
+                self.pages.append(rows)
+            if len(rows) < self.page_rows:
+                self.exhausted = True
+        return self.pages[number] if number < len(self.pages) else []
+
+
+    # User-defined method
+    def render(self, number: int) -> Table:
+        """
+        Render a page as a rich table
+
+        Args:
+            number (int): Page number, from 0
+
+        Returns:
+            Table: The rich table of the page
+        """
+        table = Table(box=box.SQUARE, show_lines=True, title=self.title)
+        for header in EXPORT_HEADERS:
+            table.add_column(header=header, no_wrap=True)
+        for row in self.page(number=number):
+            table.add_row(*(str(value) for value in row))
+
+        last_page = f"of {len(self.pages)}" if self.exhausted else "of more"
+        table.caption = f"Page {number + 1} {last_page}, rows {number * self.page_rows + 1}-{number * self.page_rows + len(self.page(number=number))}"
+        return table
+
+
+    # User-defined method
+    def run(self):
+        """
+        Show the first page and let the user page forwards and backwards until they quit
+        """
+        console = Console()
+        number = 0
+        while True:
+            console.print(self.render(number=number))
+            choice = input("(N) next page, (P) previous page, (Q) quit (N/P/Q, optional, next page if left blank): ").upper()
+            while choice not in ("", "N", "P", "Q"):
+                print("Please enter N for the next page, P for the previous page or Q to quit")
+                choice = input("(N) next page, (P) previous page, (Q) quit (N/P/Q, optional, next page if left blank): ").upper()
+
+            if choice == "Q":
+                break
+            if choice == "P":
+                number = max(0, number - 1)
+            elif len(self.page(number=number + 1)) > 0:
+                number += 1
+            else:
+                print("This is the last page")
@@ -0,0 +1,204 @@
+"""
+Scan Journal Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_journal.py
+
+Purpose:
+    Append only journal of a sharded scan. The scan job is written as the first line and the result of every shard
+    is appended as soon as the shard is done, along with the cursor of the first shard that is not done yet.
+    A scan that is started again with the same journal and the same job skips the shards in the journal
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Journal of an earlier run of the same scan, if there is one
+
+Output file(s):
+    Journal of the scan, a JSON Lines file
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://jsonlines.org/
+https://docs.python.org/3/library/os.html#os.fsync
+https://en.wikipedia.org/wiki/Write-ahead_logging
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - json
+    - os
+- required external modules installed using pip: pip install <module name>  # e.g. pip install rich
+    - python-nmap
+- custom module(s) from python scripts in the same directory
+    - scan_cache
+
+Known issues:
+    A journal of a different job is started over, the shards of a scan are only the same if the targets,
+    nmap options and number of shards are the same
+
+
+"""
+
+import json
+import os
+import nmap
+from scan_cache import restore_port_keys
+
+
+class ScanJournal:
+    """
+    A class for an append only journal of the shard results of a scan
+
+    Attributes:
+        completed (dict): python-nmap scan result of every shard that was done, by shard index
+        resumed (int): Number of shards that were read from an earlier run
+
+    Methods:
+        __init__(filename, job):
+            Open the journal, reading the shards that are done if it is a journal of the same job,
+            otherwise starting a new journal
+
+            Args:
+                filename (str): Journal file
+                job (dict): Targets, nmap options and number of shards of the scan
+
+
+        load(job):
+            Read the shards of the journal if its first line is the same job, dropping a last line that was cut off
+
+            Args:
+                job (dict): Targets, nmap options and number of shards of the scan
+
+            Returns:
+                int: Size of the journal up to the end of its last complete line, 0 if it has to be started over
+
+
+        cursor():
+            Index of the first shard that is not done
+
+            Returns:
+                int: The shard index
+
+
+        record(index, result):
+            Append the result of a shard that is done and write it through to the disk
+
+            Args:
+                index (int): Index of the shard
+                result (dict): python-nmap scan result of the shard
+
+
+        close():
+            Close the journal
+    """
+
+    # Initializer
+    def __init__(self, filename: str, job: dict) -> None:
+        """
+        Open the journal, reading the shards that are done if it is a journal of the same job,
+        otherwise starting a new journal
+
+        Args:
+            filename (str): Journal file
+            job (dict): Targets, nmap options and number of shards of the scan
+        """
+        self.filename = filename
+        self.completed = {}
+        # Shards are only ever added, so the cursor only moves forward and is advanced from where it last stopped
+        self.next_shard = 0
+        size = self.load(job=job) if os.path.exists(filename) else 0
+        self.resumed = len(self.completed)
+
+        self.file = open(filename, "r+" if size > 0 else "w", encoding="utf-8")
+        if size > 0:
+            self.file.truncate(size)
+            self.file.seek(size)
+        else:
+            self.file.write(json.dumps({"job": job}) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+
+    # User-defined method
+    def load(self, job: dict) -> int:
+        """
+        Read the shards of the journal if its first line is the same job, dropping a last line that was cut off
+
+        Args:
+            job (dict): Targets, nmap options and number of shards of the scan
+
+        Returns:
+            int: Size of the journal up to the end of its last complete line, 0 if it has to be started over
+        """
+        size = 0
+        with open(self.filename, "rb") as file:
+            for number, line in enumerate(file):
+                # A line without its newline, or that is not valid JSON, was cut off when the scan was stopped
+                try:
+                    if not line.endswith(b"\n"):
+                        break
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if number == 0:
+                    if entry.get("job") != job:
+                        return 0
+                else:
+                    result = entry["result"]
+                    result["scan"] = {address: nmap.PortScannerHostDict(restore_port_keys(host_result=host_result))
+                                      for address, host_result in result["scan"].items()}
+                    self.completed[entry["shard"]] = result
+                size += len(line)
+        return size
+
+
+    # User-defined method
+    def cursor(self) -> int:
+        """
+        Index of the first shard that is not done
+
+        Returns:
+            int: The shard index
+        """
+        while self.next_shard in self.completed:
+            self.next_shard += 1
+        return self.next_shard
+
+
+    # User-defined method
+    def record(self, index: int, result: dict):
+        """
+        Append the result of a shard that is done and write it through to the disk
+
+        Args:
+            index (int): Index of the shard
+            result (dict): python-nmap scan result of the shard
+        """
+        self.completed[index] = result
+        self.file.write(json.dumps({"shard": index, "cursor": self.cursor(), "result": result}) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+
+    # User-defined method
+    def close(self):
+        """
+        Close the journal
+        """
+        self.file.close()
+
+
+    def __enter__(self) -> "ScanJournal":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,372 @@
+"""
+Scan Store Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_store.py
+
+Purpose:
+    Compact column store of nmap scan results. Hosts are packed 32 bit integers, protocols and port states are
+    small enum codes, the other strings are interned once and every column is a typed array, so tens of thousands
+    of hosts take a fraction of the memory of python-nmap's nested dicts and can be filtered and grouped quickly
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/array.html
+https://docs.python.org/3/library/socket.html#socket.inet_aton
+https://docs.python.org/3/library/collections.html#collections.Counter
+https://en.wikipedia.org/wiki/Column-oriented_DBMS
+https://en.wikipedia.org/wiki/String_interning
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - array
+    - collections
+    - socket
+    - sys
+
+Known issues:
+    Only IPv4 hosts can be stored
+
+
+"""
+
+import array
+import socket
+import sys
+from collections import Counter
+
+
+# Enum codes of the protocols and port states, their index in the tuple
+PROTOCOLS = ("tcp", "udp", "sctp", "ip")
+STATES = ("open", "closed", "filtered", "unfiltered", "open|filtered", "closed|filtered")
+
+# Port columns that hold interned strings
+STRING_COLUMNS = ("reason", "name", "product", "version", "extrainfo", "cpe")
+
+
+class ScanStore:
+    """
+    A class for a compact column store of nmap scan results, one row per scanned port
+
+    Attributes:
+        Nil
+
+    Methods:
+        __init__():
+            Initialize an empty store
+
+
+        intern(text):
+            Code of a string in the string table, adding it the first time
+
+            Args:
+                text (str): The string
+
+            Returns:
+                int: Code of the string
+
+
+        add_host(address, host_result):
+            Add a host and a row for every one of its ports
+
+            Args:
+                address (str): IPv4 address of the host
+                host_result (dict): python-nmap result of the host
+
+
+        from_scan_result(scan_result):
+            Create a store from a python-nmap scan result
+
+            Args:
+                scan_result (dict): python-nmap scan result
+
+            Returns:
+                ScanStore: The store with every host of the scan result
+
+
+        host_count():
+            Number of hosts
+
+            Returns:
+                int: Number of hosts
+
+
+        rows(host_indexes):
+            Decode the port rows, optionally of only some hosts
+
+            Args:
+                host_indexes (Iterable | None): Indexes of the hosts, None for every host
+
+            Returns:
+                Iterator[tuple]: (host, hostname, protocol, port, state, product, extrainfo, reason, cpe) of every row
+
+
+        filter_rows(protocol, port, state):
+            Indexes of the rows that match every given column, with one pass over the typed arrays
+
+            Args:
+                protocol (str | None): Protocol of the port, None for any
+                port (int | None): Port number, None for any
+                state (str | None): Port state, None for any
+
+            Returns:
+                list: Indexes of the matching rows
+
+
+        hosts_with(port, protocol, state):
+            Hosts that have a port in a state, e.g. every host with 22/tcp open, answered from an index
+
+            Args:
+                port (int): Port number
+                protocol (str): Protocol of the port
+                state (str): Port state
+
+            Returns:
+                list: IPv4 addresses of the hosts
+
+
+        count_by(column):
+            Number of rows for every value of a column, e.g. how many ports there are per state
+
+            Args:
+                column (str): "protocol", "port", "state" or one of STRING_COLUMNS
+
+            Returns:
+                dict: Number of rows of every value, the most common first
+
+
+        nbytes():
+            Approximate memory used by the columns and the string table
+
+            Returns:
+                int: Bytes used
+    """
+
+    # Initializer
+    def __init__(self) -> None:
+        """
+        Initialize an empty store
+        """
+        # String table, code 0 is the empty string
+        self.strings = [""]
+        self.string_codes = {"": 0}
+
+        # Host columns
+        self.host_address = array.array("I")
+        self.host_hostname = array.array("I")
+        self.host_first_row = array.array("I")
+
+        # Port columns, row_host is the index of the host of the row
+        self.row_host = array.array("I")
+        self.row_protocol = array.array("B")
+        self.row_port = array.array("H")
+        self.row_state = array.array("B")
+        self.row_strings = {column: array.array("I") for column in STRING_COLUMNS}
+
+        # (protocol, port, state) to the hosts that have it, built on the first hosts_with() query
+        self.port_index = None
+
+
+    # User-defined method
+    def intern(self, text: str) -> int:
+        """
+        Code of a string in the string table, adding it the first time
+
+        Args:
+            text (str): The string
+
+        Returns:
+            int: Code of the string
+        """
+        code = self.string_codes.get(text)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(text)
+            self.string_codes[text] = code
+        return code
+
+
+    # User-defined method
+    def add_host(self, address: str, host_result: dict):
+        """
+        Add a host and a row for every one of its ports
+
+        Args:
+            address (str): IPv4 address of the host
+            host_result (dict): python-nmap result of the host
+        """
+        host_index = len(self.host_address)
+        hostnames = host_result.get("hostnames") or [{"name": ""}]
+        self.host_address.append(int.from_bytes(socket.inet_aton(address), "big"))
+        self.host_hostname.append(self.intern(text=hostnames[0]["name"]))
+        self.host_first_row.append(len(self.row_host))
+
+        for protocol_code, protocol in enumerate(PROTOCOLS):
+            for port, details in host_result.get(protocol, {}).items():
+                self.row_host.append(host_index)
+                self.row_protocol.append(protocol_code)
+                self.row_port.append(port)
+                self.row_state.append(STATES.index(details["state"]))
+                for column in STRING_COLUMNS:
+                    self.row_strings[column].append(self.intern(text=details.get(column, "")))
+        self.port_index = None
+
+
+    @classmethod
+    def from_scan_result(cls, scan_result: dict) -> "ScanStore":
+        """
+        Create a store from a python-nmap scan result
+
+        Args:
+            scan_result (dict): python-nmap scan result
+
+        Returns:
+            ScanStore: The store with every host of the scan result
+        """
+        store = cls()
+        for address, host_result in scan_result.get("scan", {}).items():
+            store.add_host(address=address, host_result=host_result)
+        return store
+
+
+    # User-defined method
+    def host_count(self) -> int:
+        """
+        Number of hosts
+
+        Returns:
+            int: Number of hosts
+        """
+        return len(self.host_address)
+
+
+    # User-defined method
+    def rows(self, host_indexes=None):
+        """
+        Decode the port rows, optionally of only some hosts
+
+        Args:
+            host_indexes (Iterable | None): Indexes of the hosts, None for every host
+
+        Returns:
+            Iterator[tuple]: (host, hostname, protocol, port, state, product, extrainfo, reason, cpe) of every row
+        """
+        if host_indexes is None:
+            host_indexes = range(len(self.host_address))
+
+        strings = self.strings
+        product = self.row_strings["product"]
+        extrainfo = self.row_strings["extrainfo"]
+        reason = self.row_strings["reason"]
+        cpe = self.row_strings["cpe"]
+        for host_index in host_indexes:
+            host = socket.inet_ntoa(self.host_address[host_index].to_bytes(4, "big"))
+            hostname = strings[self.host_hostname[host_index]]
+            end = self.host_first_row[host_index + 1] if host_index + 1 < len(self.host_first_row) else len(self.row_host)
+            for row in range(self.host_first_row[host_index], end):
+                yield (host, hostname, PROTOCOLS[self.row_protocol[row]], self.row_port[row], STATES[self.row_state[row]],
+                       strings[product[row]], strings[extrainfo[row]], strings[reason[row]], strings[cpe[row]])
+
+
+    # User-defined method
+    def filter_rows(self, protocol: str | None = None, port: int | None = None, state: str | None = None) -> list:
+        """
+        Indexes of the rows that match every given column, with one pass over the typed arrays
+
+        Args:
+            protocol (str | None): Protocol of the port, None for any
+            port (int | None): Port number, None for any
+            state (str | None): Port state, None for any
+
+        Returns:
+            list: Indexes of the matching rows
+        """
+        matches = range(len(self.row_host))
+        # The most selective column is checked first, so the later checks only see its matches
+        if port is not None:
+            matches = [row for row, value in enumerate(self.row_port) if value == port]
+        if protocol is not None:
+            code = PROTOCOLS.index(protocol)
+            matches = [row for row in matches if self.row_protocol[row] == code]
+        if state is not None:
+            code = STATES.index(state)
+            matches = [row for row in matches if self.row_state[row] == code]
+        return list(matches)
+
+
+    # User-defined method
+    def hosts_with(self, port: int, protocol: str = "tcp", state: str = "open") -> list:
+        """
+        Hosts that have a port in a state, e.g. every host with 22/tcp open, answered from an index
+
+        Args:
+            port (int): Port number
+            protocol (str): Protocol of the port
+            state (str): Port state
+
+        Returns:
+            list: IPv4 addresses of the hosts
+        """
+        if self.port_index is None:
+            self.port_index = {}
+            for host_index, protocol_code, port_number, state_code in zip(self.row_host, self.row_protocol, self.row_port, self.row_state):
+                key = (protocol_code, port_number, state_code)
+                if key not in self.port_index:
+                    self.port_index[key] = array.array("I")
+                self.port_index[key].append(host_index)
+
+        host_indexes = self.port_index.get((PROTOCOLS.index(protocol), port, STATES.index(state)), ())
+        return [socket.inet_ntoa(self.host_address[host_index].to_bytes(4, "big")) for host_index in host_indexes]
+
+
+    # User-defined method
+    def count_by(self, column: str) -> dict:
+        """
+        Number of rows for every value of a column, e.g. how many ports there are per state
+
+        Args:
+            column (str): "protocol", "port", "state" or one of STRING_COLUMNS
+
+        Returns:
+            dict: Number of rows of every value, the most common first
+        """
+        if column == "protocol":
+            return {PROTOCOLS[code]: count for code, count in Counter(self.row_protocol).most_common()}
+        if column == "port":
+            return dict(Counter(self.row_port).most_common())
+        if column == "state":
+            return {STATES[code]: count for code, count in Counter(self.row_state).most_common()}
+        if column in STRING_COLUMNS:
+            return {self.strings[code]: count for code, count in Counter(self.row_strings[column]).most_common()}
+        raise ValueError(f"Unknown column \"{column}\"")
+
+
+    # User-defined method
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the columns and the string table
+
+        Returns:
+            int: Bytes used
+        """
+        columns = [self.host_address, self.host_hostname, self.host_first_row, self.row_host,
+                   self.row_protocol, self.row_port, self.row_state, *self.row_strings.values()]
+        size = sum(sys.getsizeof(column) for column in columns)
+        size += sys.getsizeof(self.strings) + sys.getsizeof(self.string_codes) + sum(sys.getsizeof(text) for text in self.strings)
+        return size
@@ -0,0 +1,351 @@
+"""
+Scan Stream Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_stream.py
+
+Purpose:
+    Incremental parser of nmap's "-oX -" XML output. The output is read from the nmap process in chunks while it runs,
+    every <host> element is turned into a python-nmap style host result as soon as it is complete and is then
+    released, so the memory of the parser stays the same however many hosts are scanned
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.XMLPullParser
+https://docs.python.org/3/library/subprocess.html#subprocess.Popen
+https://docs.python.org/3/library/tempfile.html#tempfile.TemporaryFile
+https://nmap.org/book/output-formats-xml-output.html
+https://nmap.org/book/nmap-dtd.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - shlex
+    - subprocess
+    - tempfile
+    - threading
+    - time
+    - xml.etree.ElementTree
+- required external modules installed using pip: pip install <module name>  # e.g. pip install rich
+    - python-nmap
+- custom module(s) from python scripts in the same directory
+    - scan_targets
+
+Known issues:
+    Only the host fields that python-nmap fills in most often are parsed: hostnames, addresses, vendor, status,
+    uptime, osmatch, hostscript and the ports with their scripts, along with the round trip times and host timeout
+    that python-nmap leaves out
+
+
+"""
+
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import nmap
+from scan_targets import target_arguments
+
+
+# Bytes read from the nmap process at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Port fields of a python-nmap host result, taken from the <service> element
+SERVICE_ATTRIBUTES = ("name", "product", "version", "extrainfo", "conf")
+
+
+# User-defined function
+def parse_host(element: ET.Element) -> tuple[str, dict]:
+    """
+    Turn a <host> element into a python-nmap style host result
+
+    Args:
+        element (ET.Element): The complete <host> element
+
+    Returns:
+        tuple[str, dict]: Address of the host and its host result, the address is "" if the host has none
+    """
+    host_result = {"hostnames": [], "addresses": {}, "vendor": {}}
+    for hostname in element.iterfind("hostnames/hostname"):
+        host_result["hostnames"].append({"name": hostname.get("name", ""), "type": hostname.get("type", "")})
+    if len(host_result["hostnames"]) == 0:
+        host_result["hostnames"].append({"name": "", "type": ""})
+
+    for address in element.iterfind("address"):
+        host_result["addresses"][address.get("addrtype")] = address.get("addr")
+        if address.get("vendor"):
+            host_result["vendor"][address.get("addr")] = address.get("vendor")
+
+    status = element.find("status")
+    if status is not None:
+        host_result["status"] = {"state": status.get("state", ""), "reason": status.get("reason", "")}
+
+    # Round trip times in microseconds, and whether nmap gave up on the host at --host-timeout
+    times = element.find("times")
+    if times is not None:
+        host_result["times"] = {"srtt": times.get("srtt", ""), "rttvar": times.get("rttvar", ""), "to": times.get("to", "")}
+    if element.get("timedout") == "true":
+        host_result["timedout"] = True
+
+    uptime = element.find("uptime")
+    if uptime is not None:
+        host_result["uptime"] = {"seconds": uptime.get("seconds", ""), "lastboot": uptime.get("lastboot", "")}
+
+    for port in element.iterfind("ports/port"):
+        state = port.find("state")
+        details = {"state": state.get("state", ""), "reason": state.get("reason", "")}
+        service = port.find("service")
+        for attribute in SERVICE_ATTRIBUTES:
+            details[attribute] = service.get(attribute, "") if service is not None else ""
+        cpe = port.find("service/cpe")
+        details["cpe"] = cpe.text if cpe is not None and cpe.text else ""
+        scripts = {script.get("id"): script.get("output", "") for script in port.iterfind("script")}
+        if len(scripts) > 0:
+            details["script"] = scripts
+        host_result.setdefault(port.get("protocol"), {})[int(port.get("portid"))] = details
+
+    osmatches = [{"name": osmatch.get("name", ""), "accuracy": osmatch.get("accuracy", ""), "line": osmatch.get("line", "")}
+                 for osmatch in element.iterfind("os/osmatch")]
+    if len(osmatches) > 0:
+        host_result["osmatch"] = osmatches
+
+    hostscripts = [{"id": script.get("id"), "output": script.get("output", "")} for script in element.iterfind("hostscript/script")]
+    if len(hostscripts) > 0:
+        host_result["hostscript"] = hostscripts
+
+    addresses = host_result["addresses"]
+    return addresses.get("ipv4", addresses.get("ipv6", "")), host_result
+
+
+class NmapXMLParser:
+    """
+    A class for parsing nmap's XML output incrementally, one chunk at a time
+
+    Only the element that is being parsed is kept, every child of <nmaprun> is released once it is complete
+
+    Attributes:
+        scaninfo (dict): python-nmap scan info of every protocol that was scanned
+        scanstats (dict): python-nmap scan stats, filled in once <runstats> has been parsed
+
+    Methods:
+        __init__():
+            Initialize the parser
+
+
+        read_events():
+            Handle the parser events of the data that was fed so far
+
+            Returns:
+                list: (address, host result) of every host that was completed
+
+
+        feed(data):
+            Parse the next chunk of the XML output
+
+            Args:
+                data (bytes): The chunk
+
+            Returns:
+                list: (address, host result) of every host that was completed by the chunk
+
+
+        close():
+            Finish parsing, the XML output must be complete
+
+            Returns:
+                list: (address, host result) of the hosts that were completed by the end of the output
+    """
+
+    # Initializer
+    def __init__(self) -> None:
+        """
+        Initialize the parser
+        """
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.root = None
+        self.depth = 0
+        self.scaninfo = {}
+        self.scanstats = {}
+
+
+    # User-defined method
+    def read_events(self) -> list:
+        """
+        Handle the parser events of the data that was fed so far
+
+        Returns:
+            list: (address, host result) of every host that was completed
+        """
+        records = []
+        for event, element in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = element
+                self.depth += 1
+                continue
+
+            self.depth -= 1
+            # Elements deeper down are handled with the child of <nmaprun> that they are in
+            if self.depth != 1:
+                continue
+            if element.tag == "host":
+                records.append(parse_host(element=element))
+            elif element.tag == "scaninfo":
+                self.scaninfo[element.get("protocol")] = {"method": element.get("type", ""), "services": element.get("services", "")}
+            elif element.tag == "runstats":
+                finished = element.find("finished")
+                hosts = element.find("hosts")
+                if finished is not None:
+                    self.scanstats.update(timestr=finished.get("timestr", ""), elapsed=finished.get("elapsed", ""))
+                if hosts is not None:
+                    self.scanstats.update(uphosts=hosts.get("up", "0"), downhosts=hosts.get("down", "0"), totalhosts=hosts.get("total", "0"))
+            # Release the element, it is the only child that <nmaprun> has at this point
+            self.root.remove(element)
+        return records
+
+
+    # User-defined method
+    def feed(self, data: bytes) -> list:
+        """
+        Parse the next chunk of the XML output
+
+        Args:
+            data (bytes): The chunk
+
+        Returns:
+            list: (address, host result) of every host that was completed by the chunk
+        """
+        self.parser.feed(data)
+        return self.read_events()
+
+
+    # User-defined method
+    def close(self) -> list:
+        """
+        Finish parsing, the XML output must be complete
+
+        Returns:
+            list: (address, host result) of the hosts that were completed by the end of the output
+        """
+        self.parser.close()
+        return self.read_events()
+
+
+class NmapStream:
+    """
+    A class for running nmap and iterating over the host results while the scan is still running
+
+    Attributes:
+        command_line (str): nmap command line
+        parser (NmapXMLParser): Parser of the output, with the scan info and stats
+        timed_out (bool): True if the nmap process was stopped at the deadline
+
+    Methods:
+        __init__(hosts, options, deadline):
+            Initialize the stream, nmap is started when the stream is iterated over
+
+            Args:
+                hosts (list | TargetSet): Hostnames or IPv4 addresses to scan
+                options (str): nmap options
+                deadline (float | None): time.monotonic() time that nmap is stopped at, None for no limit
+
+
+        __iter__():
+            Run nmap and yield every host as soon as nmap has written it
+
+            Returns:
+                Iterator[tuple[str, dict]]: (address, host result) of every host that was scanned
+
+            Raises:
+                nmap.PortScannerError: If nmap could not be run or failed
+                nmap.PortScannerTimeout: If the deadline was reached, after the hosts that were done have been yielded
+    """
+
+    # Initializer
+    def __init__(self, hosts: list, options: str, deadline: float | None = None) -> None:
+        """
+        Initialize the stream, nmap is started when the stream is iterated over
+
+        Args:
+            hosts (list | TargetSet): Hostnames or IPv4 addresses to scan
+            options (str): nmap options
+            deadline (float | None): time.monotonic() time that nmap is stopped at, None for no limit
+        """
+        self.arguments = ["nmap", "-oX", "-", *shlex.split(options), *target_arguments(hosts=hosts)]
+        self.command_line = " ".join(self.arguments)
+        self.deadline = deadline
+        self.parser = NmapXMLParser()
+        self.timed_out = False
+
+
+    def __iter__(self):
+        """
+        Run nmap and yield every host as soon as nmap has written it
+
+        Returns:
+            Iterator[tuple[str, dict]]: (address, host result) of every host that was scanned
+
+        Raises:
+            nmap.PortScannerError: If nmap could not be run or failed
+            nmap.PortScannerTimeout: If the deadline was reached, after the hosts that were done have been yielded
+        """
+        if self.deadline is not None and self.deadline <= time.monotonic():
+            raise nmap.PortScannerTimeout("Time budget used up before nmap was started")
+        # stderr goes to a file, as a pipe that is only read at the end fills up with the "-vv" messages and blocks nmap
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(self.arguments, stdout=subprocess.PIPE, stderr=stderr_file)
+        except OSError as error:
+            stderr_file.close()
+            raise nmap.PortScannerError(f"nmap could not be run: {error}")
+
+        # A blocking read can not time out, so the process is killed at the deadline and the read then sees the end of the output
+        timer = None
+        if self.deadline is not None:
+            def stop():
+                self.timed_out = True
+                process.kill()
+            timer = threading.Timer(self.deadline - time.monotonic(), stop)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            while True:
+                data = process.stdout.read1(STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                yield from self.parser.feed(data=data)
+            process.wait()
+            stderr_file.seek(0)
+            error = stderr_file.read().decode(errors="replace")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            stderr_file.close()
+
+        if self.timed_out:
+            raise nmap.PortScannerTimeout("Time budget used up before nmap finished")
+        if process.returncode != 0:
+            raise nmap.PortScannerError(error.strip() or f"nmap exited with {process.returncode}")
+        yield from self.parser.close()
@@ -0,0 +1,261 @@
+"""
+Scan Sweep Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_sweep.py
+
+Purpose:
+    asyncio TCP connect sweep of many hosts and ports, to find the hosts that are up and the ports that are open
+    before the slow nmap service and OS detection is run on only those
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.sock_connect
+https://man7.org/linux/man-pages/man7/socket.7.html
+https://docs.python.org/3/library/asyncio-task.html#asyncio.wait_for
+https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.getaddrinfo
+https://nmap.org/book/performance-port-selection.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - asyncio
+    - itertools
+    - socket
+    - struct
+    - time
+
+Known issues:
+    Only TCP is swept, UDP ports can not be found open with a connect()
+
+
+"""
+
+import asyncio
+import itertools
+import socket
+import struct
+import time
+
+
+# nmap's 10 most common TCP ports, the TCP half of "--top-ports 10"
+SWEEP_PORTS = (21, 22, 23, 25, 80, 110, 139, 443, 445, 3389)
+
+# Connections that are open at the same time, stays below the usual limit of 1024 open files
+DEFAULT_SWEEP_CONCURRENCY = 256
+
+# Seconds that a connect() may take before the port is counted as filtered
+DEFAULT_SWEEP_TIMEOUT = 1.0
+
+# SO_LINGER on with a linger time of 0, struct linger { int l_onoff; int l_linger; }
+LINGER_RESET = struct.pack("ii", 1, 0)
+
+
+class ConnectSweeper:
+    """
+    A class for sweeping hosts and ports with asyncio TCP connects, with a bounded number of connects in flight
+
+    A fixed pool of worker coroutines takes the (host, port) pairs from one shared iterator,
+    so memory use does not grow with the number of hosts and ports
+
+    Attributes:
+        probes (int): Connects of the last sweep
+        elapsed (float): Seconds that the last sweep took
+
+    Methods:
+        __init__(concurrency, timeout):
+            Initialize the sweeper
+
+            Args:
+                concurrency (int): Connects that are in flight at the same time
+                timeout (float): Seconds that a connect may take before the port is counted as filtered
+
+
+        probe(address, port):
+            Connect to one port and close the connection straight away
+
+            Args:
+                address (str): IPv4 address
+                port (int): TCP port
+
+            Returns:
+                str: "open", "closed" if the connect was refused, "filtered" if it timed out or failed
+
+
+        resolve(hosts):
+            Resolve every hostname to an IPv4 address once
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses
+
+            Returns:
+                dict: IPv4 address of every host that resolved
+
+
+        sweep(hosts, ports):
+            Connect to every port of every host
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses
+                ports (list): TCP ports
+
+            Returns:
+                tuple[dict, set]: Sorted open ports of every host that has any, and the hosts that answered at all
+
+
+        run(hosts, ports):
+            Run a sweep in a new event loop
+
+            Args:
+                hosts (list): Hostnames or IPv4 addresses
+                ports (list): TCP ports
+
+            Returns:
+                tuple[dict, set]: Sorted open ports of every host that has any, and the hosts that answered at all
+    """
+
+    # Initializer
+    def __init__(self, concurrency: int = DEFAULT_SWEEP_CONCURRENCY, timeout: float = DEFAULT_SWEEP_TIMEOUT) -> None:
+        """
+        Initialize the sweeper
+
+        Args:
+            concurrency (int): Connects that are in flight at the same time
+            timeout (float): Seconds that a connect may take before the port is counted as filtered
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.probes = 0
+        self.elapsed = 0.0
+
+
+    # User-defined method
+    async def probe(self, address: str, port: int) -> str:
+        """
+        Connect to one port and close the connection straight away
+
+        Args:
+            address (str): IPv4 address
+            port (int): TCP port
+
+        Returns:
+            str: "open", "closed" if the connect was refused, "filtered" if it timed out or failed
+        """
+        # A bare non-blocking socket, a stream reader and writer are not needed to only connect
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, (address, port)), timeout=self.timeout)
+            # Linger of 0 closes with a RST instead of a FIN, so no socket is left in TIME_WAIT on either side
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RESET)
+            return "open"
+        except ConnectionRefusedError:
+            return "closed"
+        except (asyncio.TimeoutError, OSError):
+            return "filtered"
+        finally:
+            sock.close()
+
+
+    # User-defined method
+    async def resolve(self, hosts: list) -> dict:
+        """
+        Resolve every hostname to an IPv4 address once
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses
+
+        Returns:
+            dict: IPv4 address of every host that resolved
+        """
+        loop = asyncio.get_running_loop()
+
+        async def resolve_host(host: str):
+            # IPv4 addresses do not need a lookup in the thread pool
+            if host.count(".") == 3:
+                try:
+                    socket.inet_aton(host)
+                    return host, host
+                except OSError:
+                    pass
+            try:
+                infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+                return host, infos[0][4][0]
+            except (socket.gaierror, IndexError):
+                return host, None
+
+        addresses = {}
+        # Resolved in batches, as every lookup runs in the default thread pool
+        for start in range(0, len(hosts), self.concurrency):
+            for host, address in await asyncio.gather(*(resolve_host(host) for host in hosts[start:start + self.concurrency])):
+                if address is not None:
+                    addresses[host] = address
+        return addresses
+
+
+    # User-defined method
+    async def sweep(self, hosts: list, ports: list) -> tuple[dict, set]:
+        """
+        Connect to every port of every host
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses
+            ports (list): TCP ports
+
+        Returns:
+            tuple[dict, set]: Sorted open ports of every host that has any, and the hosts that answered at all
+        """
+        start = time.perf_counter()
+        addresses = await self.resolve(hosts=hosts)
+        # Port major order spreads the connects of one host out over the sweep
+        pairs = ((host, address, port) for port, (host, address) in itertools.product(ports, addresses.items()))
+        open_ports = {}
+        alive = set()
+        probes = 0
+
+        async def worker():
+            nonlocal probes
+            # Every worker takes the next pair from the shared iterator, which is safe as the event loop has one thread
+            for host, address, port in pairs:
+                state = await self.probe(address=address, port=port)
+                probes += 1
+                if state == "open":
+                    open_ports.setdefault(host, []).append(port)
+                    alive.add(host)
+                elif state == "closed":
+                    alive.add(host)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.probes = probes
+        self.elapsed = time.perf_counter() - start
+        return {host: sorted(host_ports) for host, host_ports in open_ports.items()}, alive
+
+
+    # User-defined method
+    def run(self, hosts: list, ports: list) -> tuple[dict, set]:
+        """
+        Run a sweep in a new event loop
+
+        Args:
+            hosts (list): Hostnames or IPv4 addresses
+            ports (list): TCP ports
+
+        Returns:
+            tuple[dict, set]: Sorted open ports of every host that has any, and the hosts that answered at all
+        """
+        return asyncio.run(self.sweep(hosts=hosts, ports=ports))
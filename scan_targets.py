@@ -0,0 +1,416 @@
+"""
+Scan Targets Script
+
+StudentID: p2243452
+Name: Seah Kwan Hock Reuben
+Class: DISM/FT/1B/04
+Assessment: CA1-2
+
+Script name:
+    scan_targets.py
+
+Purpose:
+    Parse scan target specifications of hostnames, IPv4 addresses, CIDR blocks and dash ranges, with targets
+    prefixed by "!" excluded. The addresses are kept as merged, sorted intervals of integers instead of a list of
+    strings, so a /8 with exclusions is validated, counted and split into shards in milliseconds, and every
+    address is only turned into a string when it is iterated over
+
+Usage syntax:
+    Nil, intended to be used as a custom module
+
+Input file(s):
+    Nil
+
+Output file(s):
+    Nil
+
+Python version:
+    Python 3.10.9
+
+Reference:
+https://nmap.org/book/man-target-specification.html
+https://docs.python.org/3/library/ipaddress.html#ipaddress.summarize_address_range
+https://docs.python.org/3/library/bisect.html
+
+Library/Module:
+- modules used that are installed by default in Python 3.10.9
+    - bisect
+    - ipaddress
+    - re
+    - socket
+
+Known issues:
+    Only IPv4 addresses are supported, and dash ranges are either a range of the last octet (10.0.0.1-50)
+    or a range of whole addresses (10.0.0.1-10.0.1.50), nmap's ranges in every octet (10.0-3.0.1-50) are not
+
+
+"""
+
+import bisect
+import ipaddress
+import re
+import socket
+
+
+# A hostname of letters, digits and hyphens in dot separated labels that do not start or end with a hyphen
+HOSTNAME_PATTERN = re.compile(r"^(([a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9\-]*[a-zA-Z0-9])\.)*([A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9\-]*[A-Za-z0-9])$")
+
+# A dotted IPv4 address, the octets are range checked when it is converted
+IPV4_PATTERN = re.compile(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$")
+
+# Prefix of a target that is excluded
+EXCLUDE_PREFIX = "!"
+
+
+# User-defined function
+def address_to_int(address: str) -> int:
+    """
+    Convert a dotted IPv4 address to an integer
+
+    Args:
+        address (str): IPv4 address
+
+    Returns:
+        int: The address as an integer
+
+    Raises:
+        ValueError: If it is not a valid IPv4 address
+    """
+    if not IPV4_PATTERN.match(address):
+        raise ValueError(f"\"{address}\" is not an IPv4 address")
+    octets = [int(octet) for octet in address.split(".")]
+    if max(octets) > 255:
+        raise ValueError(f"\"{address}\" is not an IPv4 address")
+    return (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+
+
+# User-defined function
+def int_to_address(number: int) -> str:
+    """
+    Convert an integer to a dotted IPv4 address
+
+    Args:
+        number (int): The address as an integer
+
+    Returns:
+        str: IPv4 address
+    """
+    return socket.inet_ntoa(number.to_bytes(4, "big"))
+
+
+# User-defined function
+def parse_target(target: str) -> tuple[int, int] | str:
+    """
+    Parse one target into an interval of addresses or a hostname
+
+    Args:
+        target (str): Hostname, IPv4 address, CIDR block (10.0.0.0/24) or dash range (10.0.0.1-50 or 10.0.0.1-10.0.1.50)
+
+    Returns:
+        tuple[int, int] | str: First and last address of the target, or the hostname
+
+    Raises:
+        ValueError: If the target is not valid
+    """
+    if "/" in target:
+        try:
+            network = ipaddress.IPv4Network(target, strict=False)
+        except ValueError:
+            raise ValueError(f"\"{target}\" is not a CIDR block")
+        return int(network.network_address), int(network.broadcast_address)
+
+    if "-" in target and IPV4_PATTERN.match(target.split("-", 1)[0]):
+        first, last = target.split("-", 1)
+        start = address_to_int(address=first)
+        if last.isdigit():
+            # A range of the last octet, e.g. 10.0.0.1-50
+            if int(last) > 255:
+                raise ValueError(f"\"{target}\" is not a valid range")
+            end = (start & 0xFFFFFF00) | int(last)
+        else:
+            end = address_to_int(address=last)
+        if end < start:
+            raise ValueError(f"\"{target}\" is a range that ends before it starts")
+        return start, end
+
+    if IPV4_PATTERN.match(target):
+        number = address_to_int(address=target)
+        return number, number
+
+    # A name of only digits would be taken by nmap as a decimal address
+    if target.isdigit() or not HOSTNAME_PATTERN.match(target):
+        raise ValueError(f"\"{target}\" is not a hostname, IPv4 address, CIDR block or range")
+    return target.lower()
+
+
+# User-defined function
+def merge_intervals(intervals: list) -> list:
+    """
+    Sort intervals and merge the ones that overlap or touch
+
+    Args:
+        intervals (list): (first, last) of every interval
+
+    Returns:
+        list: The merged intervals, sorted
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# User-defined function
+def subtract_intervals(intervals: list, excluded: list) -> list:
+    """
+    Remove the excluded intervals from the intervals, both merged and sorted
+
+    Args:
+        intervals (list): (first, last) of every interval
+        excluded (list): (first, last) of every interval to remove
+
+    Returns:
+        list: What is left of the intervals, merged and sorted
+    """
+    result = []
+    index = 0
+    for start, end in intervals:
+        # Excluded intervals that end before this interval can not touch the ones after it either
+        while index < len(excluded) and excluded[index][1] < start:
+            index += 1
+        position = index
+        while start <= end:
+            if position >= len(excluded) or excluded[position][0] > end:
+                result.append((start, end))
+                break
+            excluded_start, excluded_end = excluded[position]
+            if excluded_start > start:
+                result.append((start, excluded_start - 1))
+            start = excluded_end + 1
+            position += 1
+    return result
+
+
+class TargetSet:
+    """
+    A class for a deduplicated set of scan targets, IPv4 addresses as merged intervals followed by hostnames
+
+    A TargetSet can be used like the list of hosts it stands for: len(), iteration, indexing and slicing all work
+    without the addresses being turned into strings up front
+
+    Attributes:
+        intervals (list): (first, last) of every interval of addresses, merged and sorted
+        hostnames (list): Hostnames in the order they were given
+
+    Methods:
+        __init__(intervals, hostnames):
+            Initialize the target set
+
+            Args:
+                intervals (list): (first, last) of every interval of addresses, merged and sorted
+                hostnames (list): Hostnames without duplicates
+
+
+        parse(tokens):
+            Parse target tokens, the ones prefixed by "!" are excluded from the others
+
+            Args:
+                tokens (list): Target tokens
+
+            Returns:
+                TargetSet: The targets
+
+            Raises:
+                ValueError: If a token is not a valid target or nothing is left to scan
+
+
+        address_count():
+            Number of IPv4 addresses
+
+            Returns:
+                int: Number of addresses
+
+
+        nmap_targets():
+            The targets as few nmap target arguments as possible, the intervals as CIDR blocks
+
+            Returns:
+                list: nmap target arguments
+    """
+
+    # Initializer
+    def __init__(self, intervals: list, hostnames: list) -> None:
+        """
+        Initialize the target set
+
+        Args:
+            intervals (list): (first, last) of every interval of addresses, merged and sorted
+            hostnames (list): Hostnames without duplicates
+        """
+        self.intervals = intervals
+        self.hostnames = hostnames
+        # Index of the first address of every interval, to find the interval of an index with a binary search
+        self.offsets = []
+        count = 0
+        for start, end in intervals:
+            self.offsets.append(count)
+            count += end - start + 1
+        self.count = count
+
+
+    @classmethod
+    def parse(cls, tokens: list) -> "TargetSet":
+        """
+        Parse target tokens, the ones prefixed by "!" are excluded from the others
+
+        Args:
+            tokens (list): Target tokens
+
+        Returns:
+            TargetSet: The targets
+
+        Raises:
+            ValueError: If a token is not a valid target or nothing is left to scan
+        """
+        intervals, excluded_intervals = [], []
+        hostnames, excluded_hostnames = {}, set()
+        for token in tokens:
+            exclude = token.startswith(EXCLUDE_PREFIX)
+            target = parse_target(target=token[len(EXCLUDE_PREFIX):] if exclude else token)
+            if isinstance(target, str):
+                if exclude:
+                    excluded_hostnames.add(target)
+                else:
+                    hostnames[target] = None
+            elif exclude:
+                excluded_intervals.append(target)
+            else:
+                intervals.append(target)
+
+        intervals = subtract_intervals(intervals=merge_intervals(intervals=intervals), excluded=merge_intervals(intervals=excluded_intervals))
+        targets = cls(intervals=intervals, hostnames=[hostname for hostname in hostnames if hostname not in excluded_hostnames])
+        if len(targets) == 0:
+            raise ValueError("No targets are left to scan")
+        return targets
+
+
+    # User-defined method
+    def address_count(self) -> int:
+        """
+        Number of IPv4 addresses
+
+        Returns:
+            int: Number of addresses
+        """
+        return self.count
+
+
+    # User-defined method
+    def nmap_targets(self) -> list:
+        """
+        The targets as few nmap target arguments as possible, the intervals as CIDR blocks
+
+        Returns:
+            list: nmap target arguments
+        """
+        arguments = []
+        for start, end in self.intervals:
+            for network in ipaddress.summarize_address_range(ipaddress.IPv4Address(start), ipaddress.IPv4Address(end)):
+                arguments.append(str(network.network_address) if network.prefixlen == 32 else str(network))
+        return arguments + self.hostnames
+
+
+    def __len__(self) -> int:
+        return self.count + len(self.hostnames)
+
+
+    def __iter__(self):
+        for start, end in self.intervals:
+            for number in range(start, end + 1):
+                yield int_to_address(number=number)
+        yield from self.hostnames
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Only slices with a step of 1 are supported")
+            stop = max(start, stop)
+            intervals = []
+            if start < self.count:
+                # Cut the intervals that the addresses from start to stop are in
+                first = bisect.bisect_right(self.offsets, start) - 1
+                for position in range(first, len(self.intervals)):
+                    offset = self.offsets[position]
+                    if offset >= stop:
+                        break
+                    interval_start, interval_end = self.intervals[position]
+                    intervals.append((interval_start + max(0, start - offset), min(interval_end, interval_start + stop - 1 - offset)))
+            hostnames = self.hostnames[max(0, start - self.count):max(0, stop - self.count)]
+            return TargetSet(intervals=intervals, hostnames=hostnames)
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Target index out of range")
+        if index >= self.count:
+            return self.hostnames[index - self.count]
+        position = bisect.bisect_right(self.offsets, index) - 1
+        return int_to_address(number=self.intervals[position][0] + index - self.offsets[position])
+
+
+    def __contains__(self, host: str) -> bool:
+        if IPV4_PATTERN.match(host):
+            try:
+                number = address_to_int(address=host)
+            except ValueError:
+                return False
+            position = bisect.bisect_right(self.intervals, (number, 0xFFFFFFFF)) - 1
+            return position >= 0 and self.intervals[position][0] <= number <= self.intervals[position][1]
+        return host.lower() in self.hostnames
+
+
+# User-defined function
+def target_arguments(hosts) -> list:
+    """
+    nmap target arguments of a list of hosts or a TargetSet, whose intervals are passed as CIDR blocks
+
+    Args:
+        hosts (list | TargetSet): Hosts to scan
+
+    Returns:
+        list: nmap target arguments
+    """
+    if isinstance(hosts, TargetSet):
+        return hosts.nmap_targets()
+    return list(hosts)
+
+
+# User-defined function
+def join_targets(parts: list):
+    """
+    Join consecutive parts of the same targets back into one, a TargetSet if any part is one, so that the addresses
+    stay intervals instead of a list of strings
+
+    Args:
+        parts (list): Parts of the targets in order, each a TargetSet or a list of hosts
+
+    Returns:
+        list | TargetSet: The joined targets
+    """
+    if not any(isinstance(part, TargetSet) for part in parts):
+        return [host for part in parts for host in part]
+    intervals, hostnames = [], []
+    for part in parts:
+        if len(part) == 0:
+            continue
+        if not isinstance(part, TargetSet):
+            part = TargetSet.parse(tokens=list(part))
+        intervals.extend(part.intervals)
+        hostnames.extend(part.hostnames)
+    return TargetSet(intervals=merge_intervals(intervals=intervals), hostnames=hostnames)